@@ -0,0 +1,153 @@
+# app_launcher/cli/batch_resolve.py
+# -*- coding: utf-8 -*-
+"""
+离线批量解析指令：别名抽取 + AppMatcher 匹配，结果按 JSONL 流式输出（一行一条）。
+用于重新标注、排查没匹配上的日志指令。
+
+用法：
+    python -m app_launcher.cli.batch_resolve commands.txt > results.jsonl
+    cat commands.jsonl | python -m app_launcher.cli.batch_resolve --batch-size 32 -k 5
+
+输入：
+    - 纯文本：一行一条指令
+    - JSONL：一行一个对象，指令放在 "text"（或 --field 指定的字段）里，
+      其余字段原样放进输出的 "input" 里，方便和原始日志对上
+    两种格式可以混在一起，以 "{" 开头的行按 JSON 处理。
+
+输出每行：
+    {"line": 1, "text": ..., "alias": ..., "candidates": [...],
+     "timings_ms": {"extract": ..., "encode": ..., "rank": ...}, "input": {...}}
+    timings_ms 是所在批次各阶段耗时按条数平摊后的值。
+最后在 stderr 打印总条数、各阶段总耗时和吞吐。
+"""
+
+import argparse
+import json
+import sys
+import time
+from typing import Dict, Iterator, List, TextIO, Tuple
+
+from app_launcher.core.alias_model import AliasModelManager
+from app_launcher.core.alias_extractor import extract_aliases
+from app_launcher.core.sentence_encoder import QwenSentenceEncoder, encode_texts
+from app_launcher.core.config_store import AppConfigStore
+from app_launcher.core.matcher import AppMatcher
+
+
+def iter_records(stream: TextIO, field: str) -> Iterator[Tuple[int, str, Dict]]:
+    """逐行读取输入，产出 (行号, 指令, 原始 JSON 对象或 None)；空行跳过"""
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                obj = json.loads(line)
+            except ValueError:
+                obj = None
+            if isinstance(obj, dict):
+                yield line_no, str(obj.get(field) or "").strip(), obj
+                continue
+        yield line_no, line, None
+
+
+def iter_batches(records: Iterator, batch_size: int) -> Iterator[List]:
+    batch = []
+    for rec in records:
+        batch.append(rec)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def resolve_batch(mgr: AliasModelManager, matcher: AppMatcher, batch: List, k: int):
+    """处理一批：批量抽取 -> 批量编码 -> 逐条排序；返回 (结果列表, 各阶段耗时秒)"""
+    texts = [text for _, text, _ in batch]
+
+    t0 = time.perf_counter()
+    valid = [i for i, t in enumerate(texts) if t]
+    aliases = [""] * len(texts)
+    if valid:
+        for i, alias in zip(valid, extract_aliases(mgr, [texts[i] for i in valid])):
+            aliases[i] = alias.strip()
+    t1 = time.perf_counter()
+
+    with_alias = [i for i, a in enumerate(aliases) if a]
+    vecs = encode_texts(mgr, [aliases[i] for i in with_alias]) if with_alias else []
+    t2 = time.perf_counter()
+
+    candidates: List[List[Dict]] = [[] for _ in texts]
+    for row, i in enumerate(with_alias):
+        candidates[i] = matcher.rank(vecs[row], k)
+    t3 = time.perf_counter()
+
+    stage = {"extract": t1 - t0, "encode": t2 - t1, "rank": t3 - t2}
+    n = len(batch)
+    per_item = {name: round(sec * 1000.0 / n, 3) for name, sec in stage.items()}
+
+    results = []
+    for (line_no, text, obj), alias, cands in zip(batch, aliases, candidates):
+        out = {
+            "line": line_no,
+            "text": text,
+            "alias": alias,
+            "candidates": cands,
+            "timings_ms": per_item,
+        }
+        if obj is not None:
+            out["input"] = obj
+        results.append(out)
+    return results, stage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批量解析指令（别名抽取 + 应用匹配），输出 JSONL")
+    parser.add_argument("input", nargs="?", default="-", help="输入文件，默认 stdin")
+    parser.add_argument("-o", "--output", default="-", help="输出文件，默认 stdout")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("-k", type=int, default=3, help="每条返回几个候选")
+    parser.add_argument("--field", default="text", help="JSONL 输入里指令所在字段")
+    parser.add_argument("--config", default=None, help="apps_config.json 路径")
+    parser.add_argument("--precision", default=None, help="推理精度，默认读 settings.json")
+    args = parser.parse_args(argv)
+
+    t_load = time.perf_counter()
+    mgr = AliasModelManager(precision=args.precision)
+    matcher = AppMatcher(QwenSentenceEncoder(mgr), AppConfigStore(args.config))
+    load_s = time.perf_counter() - t_load
+
+    fin = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    fout = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+
+    totals = {"extract": 0.0, "encode": 0.0, "rank": 0.0}
+    count = 0
+    t_start = time.perf_counter()
+    try:
+        for batch in iter_batches(iter_records(fin, args.field), max(1, args.batch_size)):
+            results, stage = resolve_batch(mgr, matcher, batch, args.k)
+            for name, sec in stage.items():
+                totals[name] += sec
+            for out in results:
+                fout.write(json.dumps(out, ensure_ascii=False) + "\n")
+            fout.flush()
+            count += len(batch)
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+
+    elapsed = time.perf_counter() - t_start
+    print(
+        f"resolved {count} commands in {elapsed:.2f}s "
+        f"({count / elapsed if elapsed > 0 else 0:.1f} cmd/s, batch={args.batch_size}); "
+        f"extract {totals['extract']:.2f}s, encode {totals['encode']:.2f}s, "
+        f"rank {totals['rank']:.2f}s; model+catalog load {load_s:.2f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# app_launcher/cli/bench_store.py
+# -*- coding: utf-8 -*-
+"""
+应用目录存储的内存 / 耗时对比：旧的 dict 记录 + json.load/json.dump
+和现在的 AppRecord + 流式读写。
+
+用法：
+    python -m app_launcher.cli.bench_store                  # 生成 10 万条假数据
+    python -m app_launcher.cli.bench_store --apps 20000
+    python -m app_launcher.cli.bench_store --config path/to/apps_config.json
+
+输出：加载耗时、加载时峰值内存、加载后常驻内存（每条多少字节）、保存耗时。
+"AppRecord" 的常驻内存只算记录本身；"AppConfigStore" 额外包含 id / 路径 / 别名索引。
+"""
+
+import argparse
+import gc
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from app_launcher.core.config_store import AppConfigStore
+
+
+def make_catalog(path: str, n: int):
+    """生成 n 条和桌面扫描结果差不多的记录"""
+    with open(path, "w", encoding="utf-8") as f:
+        apps = []
+        for i in range(n):
+            name = f"Program {i}"
+            apps.append({
+                "id": name.replace(" ", "_"),
+                "exe_path": f"C:/Users/Public/Desktop/Vendor {i % 500}/{name}.lnk",
+                "base_name": name,
+                "aliases": [name, f"prog{i}"],
+            })
+        json.dump({"apps": apps}, f, ensure_ascii=False, indent=2)
+
+
+def legacy_load(path: str) -> List[Dict]:
+    """旧实现：json.load 整个文档，再逐条拷成 dict"""
+    with open(path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    apps = []
+    for app in cfg.get("apps", []):
+        base_name = app.get("base_name")
+        aliases = app.get("aliases") or []
+        if base_name and base_name not in aliases:
+            aliases.insert(0, base_name)
+        apps.append({
+            "id": app.get("id", base_name),
+            "exe_path": app.get("exe_path", ""),
+            "base_name": base_name,
+            "aliases": aliases,
+        })
+    return apps
+
+
+def legacy_save(path: str, apps: List[Dict]):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"apps": apps}, f, ensure_ascii=False, indent=2)
+
+
+def measure(loader: Callable[[], object]):
+    """返回 (结果, 耗时秒, 峰值字节, 常驻字节)"""
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = loader()
+    elapsed = time.perf_counter() - t0
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak, current
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):8.1f} MB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="应用目录存储内存 / 耗时对比")
+    parser.add_argument("--apps", type=int, default=100_000, help="生成多少条假数据")
+    parser.add_argument("--config", default=None, help="改用现有的 apps_config.json")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_store_")
+    try:
+        path = os.path.join(workdir, "apps_config.json")
+        if args.config:
+            shutil.copyfile(args.config, path)
+        else:
+            make_catalog(path, args.apps)
+        size = os.path.getsize(path)
+
+        legacy, legacy_s, legacy_peak, legacy_mem = measure(lambda: legacy_load(path))
+        n = len(legacy)
+        t0 = time.perf_counter()
+        legacy_save(os.path.join(workdir, "legacy.json"), legacy)
+        legacy_save_s = time.perf_counter() - t0
+        del legacy
+
+        def load_records():
+            store = AppConfigStore(path)
+            # 只留记录本身，和旧实现的 list[dict] 对比
+            return store.apps
+        _, _, _, record_mem = measure(load_records)
+
+        store, store_s, store_peak, store_mem = measure(lambda: AppConfigStore(path))
+        t0 = time.perf_counter()
+        store.save()
+        store_save_s = time.perf_counter() - t0
+
+        print(f"{n} apps, file {size / (1024 * 1024):.1f} MB")
+        print(f"{'':18}{'load':>9}{'peak':>12}{'resident':>12}{'per app':>10}{'save':>9}")
+        print(f"{'dict + json.load':18}{legacy_s:8.2f}s{_mb(legacy_peak):>12}{_mb(legacy_mem):>12}"
+              f"{legacy_mem / max(n, 1):9.0f}B{legacy_save_s:8.2f}s")
+        print(f"{'AppRecord':18}{'':9}{'':12}{_mb(record_mem):>12}{record_mem / max(n, 1):9.0f}B")
+        print(f"{'AppConfigStore':18}{store_s:8.2f}s{_mb(store_peak):>12}{_mb(store_mem):>12}"
+              f"{store_mem / max(n, 1):9.0f}B{store_save_s:8.2f}s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
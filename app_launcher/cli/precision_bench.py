@@ -0,0 +1,133 @@
+# app_launcher/cli/precision_bench.py
+# -*- coding: utf-8 -*-
+"""
+推理精度对比：拿 fp32 当基准，比较 bf16 / int8 等精度下
+- 别名抽取准确率（和标注比）、与 fp32 输出的一致率
+- 单条抽取延迟（平均 / p95）
+- 句向量和 fp32 的余弦相似度
+- 模型加载耗时、常驻内存增量
+
+用法：
+    python -m app_launcher.cli.precision_bench
+    python -m app_launcher.cli.precision_bench --precisions bf16 int8 --testset aliases.jsonl
+
+测试集是 JSONL，每行 {"text": "打开微信", "alias": "微信"}；不给就用内置的几条。
+"""
+
+import argparse
+import gc
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app_launcher.core.alias_model import AliasModelManager
+from app_launcher.core.alias_extractor import generate_alias
+from app_launcher.core.sentence_encoder import QwenSentenceEncoder
+from app_launcher.utils.memory import current_rss_bytes, format_mb
+
+
+# 内置的小测试集（中 / 韩 / 英混合）
+DEFAULT_CASES: List[Dict[str, str]] = [
+    {"text": "打开微信", "alias": "微信"},
+    {"text": "카카오 켜봐", "alias": "카카오"},
+    {"text": "执行 멜론", "alias": "멜론"},
+    {"text": "실행해줘 Melon", "alias": "Melon"},
+    {"text": "我要去学校，把카카오 맵打开", "alias": "카카오 맵"},
+    {"text": "帮我打开网易云音乐", "alias": "网易云音乐"},
+    {"text": "open chrome please", "alias": "chrome"},
+    {"text": "启动 Visual Studio Code", "alias": "Visual Studio Code"},
+]
+
+
+def load_cases(path: str) -> List[Dict[str, str]]:
+    """读取 JSONL 测试集"""
+    cases = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            obj = json.loads(line)
+            cases.append({"text": obj["text"], "alias": obj.get("alias", "")})
+    return cases
+
+
+def run_precision(precision: str, cases: List[Dict[str, str]]) -> Dict:
+    """用指定精度加载一份模型，跑完整个测试集"""
+    rss_before = current_rss_bytes()
+    t0 = time.perf_counter()
+    mgr = AliasModelManager(precision=precision)
+    load_s = time.perf_counter() - t0
+    rss_delta = current_rss_bytes() - rss_before
+
+    encoder = QwenSentenceEncoder(mgr)
+
+    # 预热一次，避免把首轮的 kernel 初始化算进延迟
+    generate_alias(cases[0]["text"], mgr)
+
+    outputs, latencies = [], []
+    for case in cases:
+        t = time.perf_counter()
+        outputs.append(generate_alias(case["text"], mgr))
+        latencies.append((time.perf_counter() - t) * 1000.0)
+
+    gold = [c["alias"] for c in cases]
+    vecs = encoder.encode(gold)
+
+    result = {
+        "precision": mgr.precision,
+        "load_s": load_s,
+        "rss_delta": rss_delta,
+        "outputs": outputs,
+        "latencies": latencies,
+        "vecs": vecs,
+    }
+
+    # 释放这一份模型，再加载下一种精度
+    del encoder, mgr
+    gc.collect()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="对比不同推理精度的准确率和延迟（基准为 fp32）")
+    parser.add_argument("--precisions", nargs="+", default=["bf16", "int8"],
+                        help="要和 fp32 对比的精度（bf16 / fp16 / int8）")
+    parser.add_argument("--testset", default=None, help="JSONL 测试集路径")
+    args = parser.parse_args(argv)
+
+    cases = load_cases(args.testset) if args.testset else DEFAULT_CASES
+    if not cases:
+        print("测试集为空")
+        return
+
+    baseline = run_precision("fp32", cases)
+    results = [baseline] + [run_precision(p, cases) for p in args.precisions]
+
+    gold = [c["alias"] for c in cases]
+    header = f"{'precision':<10}{'load(s)':>9}{'rss':>12}{'acc':>7}{'agree':>7}" \
+             f"{'avg(ms)':>9}{'p95(ms)':>9}{'cos min':>9}{'cos avg':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        acc = np.mean([o == g for o, g in zip(r["outputs"], gold)])
+        agree = np.mean([o == b for o, b in zip(r["outputs"], baseline["outputs"])])
+        cos = np.sum(r["vecs"] * baseline["vecs"], axis=1)
+        print(
+            f"{r['precision']:<10}{r['load_s']:>9.2f}{format_mb(r['rss_delta']):>12}"
+            f"{acc:>7.2f}{agree:>7.2f}"
+            f"{np.mean(r['latencies']):>9.1f}{np.percentile(r['latencies'], 95):>9.1f}"
+            f"{cos.min():>9.4f}{cos.mean():>9.4f}"
+        )
+
+    # 抽取结果和 fp32 不一致的样本单独列出来
+    for r in results[1:]:
+        for case, out, base in zip(cases, r["outputs"], baseline["outputs"]):
+            if out != base:
+                print(f"[{r['precision']}] {case['text']!r}: fp32={base!r} -> {out!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# app_launcher/cli/precompute_embeddings.py
+# -*- coding: utf-8 -*-
+"""
+离线预计算别名向量 + 导出 / 导入应用目录包。
+
+多台机器的应用目录相同时，在一台机器上算好向量，打包后分发，
+其它机器导入后首次启动不需要再调用编码器。
+
+用法：
+    # 批量编码 apps_config.json 里的所有别名（中断后再跑一次会从断点继续）
+    python -m app_launcher.cli.precompute_embeddings encode --batch-size 32
+
+    # 导出 配置 + 向量 为一个 zip
+    python -m app_launcher.cli.precompute_embeddings export catalog.zip
+
+    # 在新机器上导入（已有配置时需要 --overwrite）
+    python -m app_launcher.cli.precompute_embeddings import catalog.zip
+
+    # 查看目录包 / 本地缓存的指纹是否和本机编码器一致
+    python -m app_launcher.cli.precompute_embeddings info catalog.zip
+"""
+
+import argparse
+import sys
+import time
+
+import torch
+
+from app_launcher.core.alias_model import AliasModelManager, resolve_precision
+from app_launcher.core.app_settings import AppSettings
+from app_launcher.core.catalog_bundle import export_bundle, import_bundle, read_manifest
+from app_launcher.core.config_store import AppConfigStore
+from app_launcher.core.embedding_cache import EmbeddingCache
+from app_launcher.core.sentence_encoder import encode_texts, encoder_fingerprint
+
+
+def local_fingerprint(precision: str = None) -> str:
+    """按本机设置算编码器指纹（不加载模型）"""
+    if precision is None:
+        precision = AppSettings().get("inference_precision")
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    return encoder_fingerprint(resolve_precision(precision, device))
+
+
+def _progress(done: int, total: int, started: float):
+    """stderr 上的单行进度条"""
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed > 0 else 0.0
+    eta = (total - done) / rate if rate > 0 else 0.0
+    width = 30
+    filled = int(width * done / total) if total else width
+    sys.stderr.write(
+        f"\r[{'#' * filled}{'.' * (width - filled)}] {done}/{total} aliases "
+        f"{rate:.1f}/s eta {eta:.0f}s"
+    )
+    sys.stderr.flush()
+
+
+def cmd_encode(args):
+    store = AppConfigStore(args.config)
+    aliases = [a for app in store.apps for a in (app.get("aliases") or [])]
+
+    fingerprint = local_fingerprint(args.precision)
+    cache = EmbeddingCache(fingerprint)
+    todo = cache.missing(aliases)
+    print(f"{len(store.apps)} apps, {len(set(aliases))} unique aliases, "
+          f"{len(todo)} to encode (fingerprint {fingerprint})")
+    if not todo:
+        if cache.prune(aliases) or cache.file_fingerprint != fingerprint:
+            cache.save()
+        return
+
+    mgr = AliasModelManager(precision=args.precision, idle_unload_minutes=0)
+    batch_size = max(1, args.batch_size)
+    started = time.perf_counter()
+    done = 0
+    try:
+        for batch_no, start in enumerate(range(0, len(todo), batch_size), start=1):
+            chunk = todo[start:start + batch_size]
+            for alias, vec in zip(chunk, encode_texts(mgr, chunk)):
+                cache.set(alias, vec)
+            done += len(chunk)
+            _progress(done, len(todo), started)
+            # 定期落盘，中断后从这里继续
+            if batch_no % max(1, args.save_every) == 0:
+                cache.save()
+    except KeyboardInterrupt:
+        sys.stderr.write("\n")
+        cache.save()
+        print(f"interrupted after {done}/{len(todo)} aliases, run again to resume")
+        return
+    sys.stderr.write("\n")
+
+    cache.prune(aliases)
+    cache.save()
+    elapsed = time.perf_counter() - started
+    print(f"encoded {done} aliases in {elapsed:.1f}s ({done / elapsed if elapsed > 0 else 0:.1f}/s)"
+          f" -> {cache.path}")
+
+
+def cmd_export(args):
+    manifest = export_bundle(args.bundle, args.config)
+    print(f"exported {manifest['apps']} apps, {manifest['aliases']} vectors "
+          f"(fingerprint {manifest['fingerprint'] or '-'}) -> {args.bundle}")
+    if manifest["missing"]:
+        print(f"warning: {manifest['missing']} aliases have no vector yet, "
+              f"run `encode` before exporting")
+
+
+def cmd_import(args):
+    try:
+        manifest = import_bundle(args.bundle, args.config, overwrite=args.overwrite)
+    except FileExistsError as e:
+        print(f"{e}\n加 --overwrite 覆盖现有配置")
+        sys.exit(1)
+    print(f"imported {manifest['apps']} apps, {manifest['aliases']} vectors")
+    _check_fingerprint(manifest["fingerprint"], args.precision)
+
+
+def cmd_info(args):
+    if args.bundle:
+        manifest = read_manifest(args.bundle)
+        for key, value in manifest.items():
+            print(f"{key}: {value}")
+        fingerprint = manifest["fingerprint"]
+    else:
+        cache = EmbeddingCache()
+        print(f"cache: {cache.path}")
+        print(f"vectors: {len(cache.cache)}")
+        print(f"fingerprint: {cache.file_fingerprint or '-'}")
+        fingerprint = cache.file_fingerprint
+    _check_fingerprint(fingerprint, args.precision)
+
+
+def _check_fingerprint(fingerprint: str, precision: str = None):
+    local = local_fingerprint(precision)
+    if fingerprint and fingerprint != local:
+        print(f"warning: vectors were encoded with fingerprint {fingerprint}, "
+              f"this machine is {local}; they will be re-encoded on first start")
+    else:
+        print(f"fingerprint matches this machine ({local})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="预计算别名向量 / 导出导入应用目录包")
+    parser.add_argument("--config", default=None, help="apps_config.json 路径")
+    parser.add_argument("--precision", default=None, help="推理精度，默认读 settings.json")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("encode", help="批量编码所有别名，支持断点续跑")
+    p.add_argument("--batch-size", type=int, default=32)
+    p.add_argument("--save-every", type=int, default=10, help="每多少批落盘一次")
+    p.set_defaults(func=cmd_encode)
+
+    p = sub.add_parser("export", help="导出 配置 + 向量 为一个 zip")
+    p.add_argument("bundle")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("import", help="导入目录包")
+    p.add_argument("bundle")
+    p.add_argument("--overwrite", action="store_true", help="覆盖现有配置")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("info", help="查看目录包或本地缓存的信息")
+    p.add_argument("bundle", nargs="?", default=None)
+    p.set_defaults(func=cmd_info)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
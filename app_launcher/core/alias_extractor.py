@@ -1,11 +1,14 @@
 # app_launcher/core/alias_extractor.py
-from typing import Tuple
+from typing import List
 import torch
 from app_launcher.core.alias_model import AliasModelManager
-from app_launcher.core.alias_att_pt_model import AliasAttPTModel
+from app_launcher.core.prefix_head import AliasPrefixHead
 def clean_alias(alias_part: str, input_text: str) -> str:
-    # 1. 取第一行
-    alias_line = alias_part.strip().splitlines()[0].strip()
+    # 1. 取第一行（模型什么都没生成时直接返回空，批量抽取时不能让一条拖垮整批）
+    lines = alias_part.strip().splitlines()
+    if not lines:
+        return ""
+    alias_line = lines[0].strip()
 
     # 2. 先干掉明显的对话标记
     for sep in ["Human:", "Assistant:", "User:", "AI:", "系统:", "用户:", "助手:"]:
@@ -47,7 +50,8 @@ def clean_alias(alias_part: str, input_text: str) -> str:
 
 
 def build_prefixed_inputs(
-    model: AliasAttPTModel,       # 我们的 AliasAttPT 模型
+    head: AliasPrefixHead,        # 加载时准备好的融合小头
+    base_model,                   # 冻结的 Qwen 基座
     input_ids: torch.Tensor,      # 原始 input_ids，形状 [batch, seq_len]
     attention_mask: torch.Tensor, # 原始 attention_mask，形状 [batch, seq_len]
 ):
@@ -57,106 +61,71 @@ def build_prefixed_inputs(
       - 把 prompt_context 拼在原句 embedding 前面
       - 同时构造对应的 attention_mask
 
-    这里最关键的一步：把所有相关张量和小头权重的 dtype
-    统一成和 base_model 的 embedding 输出一样，避免 Half / Float 打架。
+    小头的 dtype / device 在 AliasModelManager 加载时已经和 embedding 对齐，
+    这里不再做任何 cast。
     """
 
-    # 0. 从小头中取出基座模型
-    base_model = model.base_model  # 冻结的大模型
-
     # 1. 使用基座模型的 embedding 层将 input_ids 转为 embedding
     inputs_embeds = base_model.get_input_embeddings()(input_ids)  # [batch, seq_len, hidden]
 
-    # 取出当前实际使用的 dtype（可能是 fp16，也可能是 fp32）
-    base_dtype = inputs_embeds.dtype  # 比如 torch.float16 或 torch.float32
-
-    # 为了安全，统一把小头的参数也 cast 到这个 dtype 和设备上
-    model.attn.to(device=inputs_embeds.device, dtype=base_dtype)             # 注意力层权重 dtype 对齐
-    model.ffn.to(device=inputs_embeds.device, dtype=base_dtype)              # 前馈网络权重 dtype 对齐
-    model.prompt_layer_norm.to(device=inputs_embeds.device, dtype=base_dtype)  # LayerNorm 权重 dtype 对齐
-
-    # 2. 构造 batch 维度的虚拟 prompt 初始向量
-    #    这里不能直接用原来的 model.prompt_embeddings（它可能是 float32），
-    #    我们要先把它 cast 成和 inputs_embeds 一样的 dtype，再扩展 batch 维。
-    prompt_weight = model.prompt_embeddings.to(  # 把参数 cast 到统一 dtype 和设备
-        device=inputs_embeds.device,
-        dtype=base_dtype,
-    )  # 形状仍然是 [num_virtual_tokens, hidden]
-
-    prompt_embeds = prompt_weight.unsqueeze(0).expand(
-        inputs_embeds.size(0),  # batch 大小
-        -1,                     # 虚拟 token 数量不变
-        -1,                     # hidden 维度不变
-    )  # 得到 [batch, num_virtual_tokens, hidden]，dtype 与 inputs_embeds 一致
-
-    # 3. 用多头注意力让 prompt_embeds 去“看”句子 embedding
-    attn_output, _ = model.attn(
-        query=prompt_embeds,   # 查询：虚拟 prompt（已经是 base_dtype）
-        key=inputs_embeds,     # 键：原句 embedding（base_dtype）
-        value=inputs_embeds,   # 值：原句 embedding（base_dtype）
-    )  # 得到 attn_output，形状 [batch, num_virtual_tokens, hidden]，dtype 同样为 base_dtype
-
-    # 残差连接：prompt_embeds + 注意力输出
-    prompt_context = prompt_embeds + attn_output  # 形状不变，dtype 仍是 base_dtype
-
-    # 通过前馈网络
-    prompt_context = model.ffn(prompt_context)  # 形状 [batch, num_virtual_tokens, hidden]
-
-    # 通过 LayerNorm 提升稳定性
-    prompt_context = model.prompt_layer_norm(prompt_context)  # 形状不变
-
-    # 4. 把 prompt_context 拼在原句 embedding 前面
+    # 2. 小头计算上下文相关的 prompt：[batch, num_virtual_tokens, hidden]
+    prompt_context = head.prompt_context(inputs_embeds, attention_mask)
+
+    # 3. 把 prompt_context 拼在原句 embedding 前面
     full_embeds = torch.cat(
         [prompt_context, inputs_embeds],  # [batch, num_virtual_tokens + seq_len, hidden]
         dim=1,                            # 在序列长度维度拼接
-    )  # full_embeds 的 dtype 与 base_dtype 一致
-
-    # 5. 构造对应的 attention_mask
-    if attention_mask is not None:  # 如果提供了原始 mask
-        # 为 prompt 部分构造全 1 的 mask（全部参与注意力）
-        prompt_mask = torch.ones(
-            attention_mask.size(0),        # batch 大小
-            model.num_virtual_tokens,      # prompt token 数量
-            dtype=attention_mask.dtype,    # 和原 attention_mask 同 dtype（一般是 long）
-            device=attention_mask.device,  # 同一设备
-        )  # 形状 [batch, num_virtual_tokens]
-
-        # 拼接 prompt_mask 和原 attention_mask
-        full_attention_mask = torch.cat(
-            [prompt_mask, attention_mask],  # 得到 [batch, num_virtual_tokens + seq_len]
-            dim=1,                          # 在序列维度拼接
-        )
-    else:
-        full_attention_mask = None  # 如果没有 mask，就直接设置为 None
+    )
+
+    # 4. 构造对应的 attention_mask（prompt 部分全部参与注意力）
+    prompt_mask = attention_mask.new_ones(attention_mask.size(0), head.num_virtual_tokens)
+    full_attention_mask = torch.cat([prompt_mask, attention_mask], dim=1)
 
-    # 返回构造好的 embedding 和 attention_mask
     return full_embeds, full_attention_mask
 
 
-def generate_alias(input_text: str) -> str:
+PROMPT_TEMPLATE = "用户指令: {}\n对应的App别名: "
+ALIAS_MARKER = "对应的App别名:"
+
+
+def _left_pad(tokenizer, prompts: List[str], device):
     """
-    高层接口：GUI 只用传一条字符串进来，拿到 alias 字符串。
-    模型的加载、device 管理都由 AliasModelManager 负责。
+    批量生成要左 padding（右边要接着生成新 token）。
+    手动 pad，不去改共享 tokenizer 的 padding_side（编码器那边用右 padding）。
     """
-    mgr = AliasModelManager.instance()
-    model = mgr.alias_model
+    encoded = [tokenizer(p)["input_ids"] for p in prompts]
+    max_len = max(len(ids) for ids in encoded)
+    pad_id = tokenizer.pad_token_id
+    input_ids = torch.full((len(encoded), max_len), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(encoded), max_len), dtype=torch.long)
+    for row, ids in enumerate(encoded):
+        input_ids[row, max_len - len(ids):] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[row, max_len - len(ids):] = 1
+    return input_ids.to(device), attention_mask.to(device)
+
+
+def extract_aliases(mgr: AliasModelManager, input_texts: List[str]) -> List[str]:
+    """
+    真正跑模型的地方：一次 generate 抽取一批指令的别名。
+    调用方负责分批；这里会拿 mgr 的模型锁。
+    """
+    if not input_texts:
+        return []
     tokenizer = mgr.tokenizer
-    device = mgr.device
-
-    prompt = f"用户指令: {input_text}\n对应的App别名: "
-
-    inputs = tokenizer(prompt, return_tensors="pt")
-    input_ids = inputs["input_ids"].to(device)
-    attention_mask = inputs["attention_mask"].to(device)
-
-    full_embeds, full_attention_mask = build_prefixed_inputs(
-        model=model,
-        input_ids=input_ids,
-        attention_mask=attention_mask,
-    )
-
-    with torch.no_grad():
-        output_ids = model.base_model.generate(
+    prompts = [PROMPT_TEMPLATE.format(t) for t in input_texts]
+
+    # acquire(): 拿模型锁，模型被空闲卸载过的话这里会重新加载
+    with mgr.acquire(), torch.no_grad():
+        input_ids, attention_mask = _left_pad(tokenizer, prompts, mgr.device)
+
+        base_model = mgr.base_model
+        full_embeds, full_attention_mask = build_prefixed_inputs(
+            head=mgr.prefix_head,
+            base_model=base_model,
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+        )
+        output_ids = base_model.generate(
             inputs_embeds=full_embeds,
             attention_mask=full_attention_mask,
             max_new_tokens=8,
@@ -166,13 +135,29 @@ def generate_alias(input_text: str) -> str:
             pad_token_id=tokenizer.pad_token_id,
         )
 
-    generated_text = tokenizer.decode(output_ids[0], skip_special_tokens=True)
+    aliases = []
+    for row, input_text in enumerate(input_texts):
+        generated_text = tokenizer.decode(output_ids[row], skip_special_tokens=True)
+
+        if ALIAS_MARKER in generated_text:
+            alias_part = generated_text.split(ALIAS_MARKER)[-1]
+        else:
+            alias_part = generated_text
 
-    marker = "对应的App别名:"
-    if marker in generated_text:
-        alias_part = generated_text.split(marker)[-1]
-    else:
-        alias_part = generated_text
+        aliases.append(clean_alias(alias_part, input_text))
+    return aliases
 
-    alias = clean_alias(alias_part, input_text)
-    return alias
+
+def generate_alias(input_text: str, mgr: AliasModelManager = None) -> str:
+    """
+    高层接口：GUI 只用传一条字符串进来，拿到 alias 字符串。
+    模型的加载、device 管理都由 AliasModelManager 负责。
+
+    mgr 默认 None -> 交给全局 ModelScheduler，和其它并发请求合并成一批；
+    精度对比之类的场景可以传入单独加载的实例，直接在当前线程上跑。
+    """
+    if mgr is None:
+        # 放在这里 import，避免 model_scheduler <-> alias_extractor 循环导入
+        from app_launcher.core.model_scheduler import ModelScheduler
+        return ModelScheduler.instance().extract(input_text)
+    return extract_aliases(mgr, [input_text])[0]
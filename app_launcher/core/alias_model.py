@@ -1,68 +1,505 @@
 # app_launcher/core/alias_model.py
 # -*- coding: utf-8 -*-
 
+import contextlib
+import gc
+import hashlib
+import inspect
+import os
+import threading
+import time
+
 import torch
+import torch.nn as nn
 from transformers import AutoTokenizer, AutoModelForCausalLM
-import os
 from app_launcher.core.alias_att_pt_model import AliasAttPTModel
+from app_launcher.core.app_settings import AppSettings, PRECISION_CHOICES
+from app_launcher.core.prefix_head import AliasPrefixHead
 from app_launcher.models.paths import BASE_MODEL_PATH, ADAPTER_DIR
+from app_launcher.utils.memory import (
+    current_rss_bytes, peak_rss_bytes, format_mb, release_free_memory,
+)
+
+try:
+    from safetensors.torch import load_file as load_safetensors, save_file as save_safetensors
+except ImportError:
+    load_safetensors = None
+    save_safetensors = None
+
+try:
+    import accelerate  # noqa: F401  low_cpu_mem_usage / device_map 依赖它
+    _HAS_ACCELERATE = True
+except ImportError:
+    _HAS_ACCELERATE = False
+
+
+# 小头权重文件名：训练产物是 pytorch_model.bin，首次加载时转换成 safetensors
+ADAPTER_BIN_NAME = "pytorch_model.bin"
+ADAPTER_SAFETENSORS_NAME = "alias_head.safetensors"
+
+# 小头自己的参数前缀（其余 base_model.* 都是冻结的基座权重）
+BASE_PREFIX = "base_model."
+
+# 量化后的基座模型缓存目录：放在 config 目录下
+QUANT_CACHE_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "config", "model_cache"
+)
+
+
+@contextlib.contextmanager
+def _init_on_meta():
+    """
+    构造小头时跳过随机初始化：
+    在 meta device 上创建参数（不分配内存、不跑 randn），之后用 assign=True 直接换成真实权重。
+    老版本 torch 不支持 device 上下文时就退化成普通构造。
+    """
+    supports_assign = "assign" in inspect.signature(nn.Module.load_state_dict).parameters
+    if supports_assign and hasattr(torch.device("meta"), "__enter__"):
+        with torch.device("meta"):
+            yield True
+    else:
+        yield False
+
+
+def _head_state_dict(state_dict: dict) -> dict:
+    """从完整 state_dict 里只挑出小头参数（去掉 base_model.* 这部分冻结权重）"""
+    return {
+        k: v.contiguous()
+        for k, v in state_dict.items()
+        if not k.startswith(BASE_PREFIX)
+    }
+
+
+def convert_adapter_to_safetensors(adapter_dir: str = ADAPTER_DIR) -> str:
+    """
+    把 adapter 目录下的 pytorch_model.bin 转成只含小头参数的 safetensors 文件。
+    训练时保存的是整个 AliasAttPTModel，里面带了一整份基座权重，
+    这里只保留小头，之后加载不用再把 GB 级的 bin 读一遍。
+
+    :return: safetensors 文件路径；无法转换时返回空字符串
+    """
+    st_path = os.path.join(adapter_dir, ADAPTER_SAFETENSORS_NAME)
+    bin_path = os.path.join(adapter_dir, ADAPTER_BIN_NAME)
+    bin_exists = os.path.exists(bin_path)
+    if os.path.exists(st_path):
+        # bin 比转换结果新（重新训练过），就重新转换
+        if not bin_exists or os.path.getmtime(st_path) >= os.path.getmtime(bin_path):
+            return st_path
+    if save_safetensors is None or not bin_exists:
+        return ""
+
+    state_dict = torch.load(bin_path, map_location="cpu")
+    head_sd = _head_state_dict(state_dict)
+    del state_dict
+
+    tmp_path = st_path + ".tmp"
+    try:
+        save_safetensors(head_sd, tmp_path, metadata={"format": "pt"})
+        os.replace(tmp_path, st_path)
+    except OSError as e:
+        # 安装目录只读等情况：这次直接用 bin，下次再试
+        print("convert adapter to safetensors failed:", e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return ""
+    return st_path
+
+
+def resolve_precision(precision: str, device: str) -> str:
+    """
+    把设置里的精度名字落到具体值：
+    - auto：GPU -> fp16，CPU -> fp32
+    - int8 只在 CPU 上可用（动态量化没有 CUDA kernel），GPU 上退回 fp16
+    - fp16 在 CPU 上很多算子没实现，退回 fp32
+    """
+    precision = (precision or "auto").lower()
+    if precision not in PRECISION_CHOICES:
+        print(f"unknown inference precision {precision!r}, use auto")
+        precision = "auto"
+    if precision == "auto":
+        return "fp16" if device == "cuda" else "fp32"
+    if device == "cuda" and precision == "int8":
+        return "fp16"
+    if device == "cpu" and precision == "fp16":
+        return "fp32"
+    return precision
+
+
+_PRECISION_DTYPES = {
+    "fp32": torch.float32,
+    "fp16": torch.float16,
+    "bf16": torch.bfloat16,
+    "int8": torch.float32,  # 先按 fp32 加载，再量化 Linear 层
+}
+
+
+def _base_model_fingerprint() -> str:
+    """
+    基座模型的指纹：config + 权重文件的大小/mtime + torch 版本。
+    任何一个变了，量化缓存就作废重建。
+    """
+    h = hashlib.sha1()
+    h.update(torch.__version__.encode("utf-8"))
+    if os.path.isdir(BASE_MODEL_PATH):
+        for name in sorted(os.listdir(BASE_MODEL_PATH)):
+            path = os.path.join(BASE_MODEL_PATH, name)
+            if not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            h.update(f"{name}:{st.st_size}:{int(st.st_mtime)}".encode("utf-8"))
+    return h.hexdigest()[:16]
 
 
 class AliasModelManager:
     """
     负责加载：
       - tokenizer（从 Qwen 基座目录 BASE_MODEL_PATH）
-      - Qwen 基座模型（从 BASE_MODEL_PATH）
-      - AliasAttPT 小头权重（从 ADAPTER_DIR/pytorch_model.bin）
+      - Qwen 基座模型（从 BASE_MODEL_PATH，safetensors mmap + low_cpu_mem_usage）
+      - AliasAttPT 小头权重（从 ADAPTER_DIR/alias_head.safetensors，
+        没有的话先从 pytorch_model.bin 转换出来）
+      - 推理用的融合小头 prefix_head（加载时 cast 好 dtype，可选编译）
 
     提供单例接口，保证整个进程只加载一次。
+    加载耗时和峰值内存记录在 load_stats 里，启动时会打印出来。
+
+    内存策略：超过 idle_unload_minutes（settings.json）没有使用就卸载基座和小头，
+    下次通过 acquire() 使用时自动重新加载（safetensors mmap，权重还在页缓存里时很快）。
+
+    推理精度（precision）由 settings.json 的 inference_precision 决定，
+    generate_alias 和 QwenSentenceEncoder 共用同一个基座，所以两边精度一致。
     """
 
     _instance = None
+    _instance_lock = threading.Lock()
 
-    def __init__(self):
+    def __init__(self, precision: str = None, idle_unload_minutes: float = None):
         device = "cuda" if torch.cuda.is_available() else "cpu"
         self.device = device
+        self.settings = AppSettings()
+        if precision is None:
+            precision = self.settings.get("inference_precision")
+        if idle_unload_minutes is None:
+            idle_unload_minutes = self.settings.get("idle_unload_minutes")
+        self.precision = resolve_precision(precision, device)
+        self.idle_unload_seconds = max(0.0, float(idle_unload_minutes or 0) * 60.0)
+        self.load_stats = {}
+
+        # 所有对模型的访问都要拿这把锁（见 acquire()），卸载时也一样
+        self.lock = threading.RLock()
+        self.last_used = time.monotonic()
+        self._loading_lock = threading.Lock()
+        self._loading_thread = None
+        self._idle_thread = None
+        self._stop_event = threading.Event()
+
+        self.tokenizer = None
+        self.base_model = None
+        self.alias_model = None
+        self.prefix_head = None
+
         print("BASE_MODEL_PATH exists?", os.path.isdir(BASE_MODEL_PATH), BASE_MODEL_PATH)
         print("ADAPTER_DIR exists?", os.path.isdir(ADAPTER_DIR), ADAPTER_DIR)
+        self.load()
+
+    # ---------------- 加载 / 卸载 ----------------
+
+    @property
+    def is_loaded(self) -> bool:
+        """基座模型当前是否在内存里"""
+        return self.base_model is not None
+
+    @property
+    def is_loading(self) -> bool:
+        """后台是否正在加载模型"""
+        return self._loading_thread is not None and self._loading_thread.is_alive()
+
+    def load(self):
+        """加载 tokenizer / 基座 / 小头；已经加载过就什么都不做"""
+        with self.lock:
+            if self.is_loaded:
+                return
+            self._load_all()
+            self.last_used = time.monotonic()
+
+    def _load_all(self):
+        t_start = time.perf_counter()
+        rss_start = current_rss_bytes()
+
         # 1) 从 Qwen 基座目录加载 tokenizer，而不是从 adapter 目录
         #    adapter 目录通常没有 tokenizer 配置文件。
-        self.tokenizer = AutoTokenizer.from_pretrained(
-            BASE_MODEL_PATH,
-            trust_remote_code=True,
-            local_files_only=True,  # 不从网上下，纯本地
+        #    tokenizer 很小，卸载模型时保留，重新加载时复用。
+        if self.tokenizer is None:
+            self.tokenizer = AutoTokenizer.from_pretrained(
+                BASE_MODEL_PATH,
+                trust_remote_code=True,
+                local_files_only=True,  # 不从网上下，纯本地
+            )
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+                self.tokenizer.pad_token_id = self.tokenizer.eos_token_id
+        t_tokenizer = time.perf_counter()
+
+        # 2) 从 Qwen 基座目录加载 base_model（int8 时优先读量化缓存）
+        if self.precision == "int8":
+            base_model = self._load_quantized_base_model()
+        else:
+            base_model = self._load_base_model(_PRECISION_DTYPES[self.precision])
+        t_base = time.perf_counter()
+
+        # 3) 构造 AliasAttPT 小头 + 加载小头权重
+        alias_model = self._load_alias_model(base_model)
+        #    小头的 dtype 和基座 embedding 对齐，只在这里做一次
+        embed_dtype = base_model.get_input_embeddings().weight.dtype
+        prefix_head = AliasPrefixHead(alias_model, embed_dtype, self.device).prepare(
+            self.settings.get("prefix_head_compile")
+        )
+        t_head = time.perf_counter()
+
+        # 全部加载成功后再一起挂上去，避免半加载状态被别人看到
+        self.base_model = base_model
+        self.alias_model = alias_model
+        self.prefix_head = prefix_head
+
+        self.load_stats = {
+            "tokenizer_s": t_tokenizer - t_start,
+            "base_model_s": t_base - t_tokenizer,
+            "alias_head_s": t_head - t_base,
+            "total_s": t_head - t_start,
+            "rss_delta_bytes": current_rss_bytes() - rss_start,
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+        print(
+            "AliasModelManager[{precision}] loaded in {total:.2f}s "
+            "(tokenizer {tok:.2f}s, base {base:.2f}s, head {head:.2f}s), "
+            "rss +{delta}, peak rss {peak}".format(
+                precision=self.precision,
+                total=self.load_stats["total_s"],
+                tok=self.load_stats["tokenizer_s"],
+                base=self.load_stats["base_model_s"],
+                head=self.load_stats["alias_head_s"],
+                delta=format_mb(self.load_stats["rss_delta_bytes"]),
+                peak=format_mb(self.load_stats["peak_rss_bytes"]),
+            )
+        )
+
+    def load_async(self) -> threading.Thread:
+        """
+        在后台线程里加载模型（GUI 不会被卡住）。
+        已经在加载中就直接返回那个线程。
+        """
+        with self._loading_lock:
+            if self.is_loading:
+                return self._loading_thread
+            self._loading_thread = threading.Thread(
+                target=self.load, name="AliasModelLoader", daemon=True
+            )
+            self._loading_thread.start()
+            return self._loading_thread
+
+    def unload(self):
+        """
+        释放基座 / 小头（保留 tokenizer）。
+        匹配器里的别名向量矩阵和嵌入缓存不在这里，不受影响。
+        """
+        with self.lock:
+            if not self.is_loaded:
+                return
+            rss_before = current_rss_bytes()
+            self.base_model = None
+            self.alias_model = None
+            self.prefix_head = None
+            gc.collect()
+            if self.device == "cuda":
+                torch.cuda.empty_cache()
+            release_free_memory()
+            print(
+                f"AliasModelManager unloaded after idle, "
+                f"rss -{format_mb(max(0, rss_before - current_rss_bytes()))}"
+            )
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """
+        使用模型的唯一入口：
+            with mgr.acquire():
+                mgr.base_model(...)
+        拿锁、必要时重新加载、刷新最近使用时间。
+        """
+        with self.lock:
+            if not self.is_loaded:
+                self._load_all()
+            try:
+                yield self
+            finally:
+                self.last_used = time.monotonic()
+
+    def resident_bytes(self) -> int:
+        """模型参数 + buffer 当前占用的字节数（未加载时为 0）"""
+        model = self.base_model
+        head = self.prefix_head
+        if model is None:
+            return 0
+        total = 0
+        seen = set()
+        for module in (model, head):
+            if module is None:
+                continue
+            for t in list(module.parameters()) + list(module.buffers()):
+                key = t.data_ptr()
+                if key in seen:
+                    continue
+                seen.add(key)
+                total += t.numel() * t.element_size()
+        # 动态量化后的 Linear 权重是打包参数，不在 parameters() 里
+        for m in model.modules():
+            packed = getattr(m, "_packed_params", None)
+            if packed is not None and hasattr(packed, "_weight_bias"):
+                w, b = packed._weight_bias()
+                total += w.numel() * w.element_size()
+                if b is not None:
+                    total += b.numel() * b.element_size()
+        return total
+
+    # ---------------- 空闲卸载 ----------------
+
+    def start_idle_monitor(self, check_interval: float = 30.0):
+        """启动空闲检测线程：超过 idle_unload_seconds 没用过就卸载模型（0 表示不卸载）"""
+        if self._idle_thread is not None and self._idle_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._idle_thread = threading.Thread(
+            target=self._idle_loop, args=(check_interval,),
+            name="AliasModelIdleMonitor", daemon=True,
         )
-        if self.tokenizer.pad_token is None:
-            self.tokenizer.pad_token = self.tokenizer.eos_token
-            self.tokenizer.pad_token_id = self.tokenizer.eos_token_id
-
-        # 2) 从 Qwen 基座目录加载 base_model
-        self.base_model = AutoModelForCausalLM.from_pretrained(
-            BASE_MODEL_PATH,
-            torch_dtype=torch.float16 if device == "cuda" else torch.float32,
+        self._idle_thread.start()
+
+    def stop_idle_monitor(self):
+        self._stop_event.set()
+
+    def set_idle_unload_minutes(self, minutes: float):
+        """修改空闲卸载时间（分钟，0 表示永不卸载）"""
+        self.idle_unload_seconds = max(0.0, float(minutes or 0) * 60.0)
+
+    def _idle_loop(self, check_interval: float):
+        while not self._stop_event.wait(check_interval):
+            self.unload_if_idle()
+
+    def unload_if_idle(self) -> bool:
+        """如果空闲超时就卸载；模型正在被使用（锁被占）时跳过这一轮"""
+        timeout = self.idle_unload_seconds
+        if timeout <= 0 or not self.is_loaded:
+            return False
+        if time.monotonic() - self.last_used < timeout:
+            return False
+        if not self.lock.acquire(blocking=False):
+            return False
+        try:
+            if time.monotonic() - self.last_used < timeout:
+                return False
+            self.unload()
+            return True
+        finally:
+            self.lock.release()
+
+    def _load_base_model(self, torch_dtype):
+        """
+        加载基座模型：
+        - 有 safetensors 权重时 transformers 会直接 mmap，不再整份读进内存再拷贝
+        - low_cpu_mem_usage 跳过随机初始化（先在 meta device 上建结构）
+        - 装了 accelerate 时用 device_map 直接把权重放到目标设备，省掉一次 .to(device)
+        """
+        kwargs = dict(
+            torch_dtype=torch_dtype,
             trust_remote_code=True,
             local_files_only=True,
-        ).to(device)
+        )
+        if _HAS_ACCELERATE:
+            kwargs["low_cpu_mem_usage"] = True
+            kwargs["device_map"] = self.device
+            return AutoModelForCausalLM.from_pretrained(BASE_MODEL_PATH, **kwargs)
+        return AutoModelForCausalLM.from_pretrained(BASE_MODEL_PATH, **kwargs).to(self.device)
+
+    def _load_quantized_base_model(self):
+        """
+        CPU 动态 int8 量化：
+        - 第一次：按 fp32 加载，quantize_dynamic 把所有 nn.Linear 换成 int8 权重，
+          然后整个模块存到 config/model_cache/ 下
+        - 之后：直接读缓存，跳过 fp32 加载和量化这两步
+        缓存文件名里带基座指纹，模型或 torch 版本变了会自动重建。
+        """
+        cache_path = os.path.join(
+            QUANT_CACHE_DIR, f"base-int8-{_base_model_fingerprint()}.pt"
+        )
+        if os.path.exists(cache_path):
+            try:
+                model = torch.load(cache_path, map_location="cpu", weights_only=False)
+                model.eval()
+                return model
+            except Exception as e:
+                # 缓存损坏 / 版本不兼容：重新量化
+                print("load quantized cache failed:", e)
 
-        # 3) 构造 AliasAttPT 小头结构（参数要和训练时一致）
-        self.alias_model = AliasAttPTModel(
-            base_model=self.base_model,
-            num_virtual_tokens=32,   # 按你训练时的设置来改
-            num_attn_heads=8,        # 同上
+        model = self._load_base_model(torch.float32)
+        model.eval()
+        model = torch.ao.quantization.quantize_dynamic(
+            model, {nn.Linear}, dtype=torch.qint8
         )
 
-        # 4) 从 adapter 目录加载小头权重
-        adapter_ckpt = os.path.join(ADAPTER_DIR, "pytorch_model.bin")
-        if not os.path.exists(adapter_ckpt):
-            raise FileNotFoundError(f"找不到小头权重文件: {adapter_ckpt}")
+        try:
+            os.makedirs(QUANT_CACHE_DIR, exist_ok=True)
+            # 旧指纹的缓存没用了，顺手删掉
+            for name in os.listdir(QUANT_CACHE_DIR):
+                if name.startswith("base-int8-") and name.endswith(".pt"):
+                    os.remove(os.path.join(QUANT_CACHE_DIR, name))
+            tmp_path = cache_path + ".tmp"
+            torch.save(model, tmp_path)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            print("save quantized cache failed:", e)
+        return model
+
+    def _load_alias_model(self, base_model) -> AliasAttPTModel:
+        """构造 AliasAttPT 小头结构，并从 adapter 目录加载小头权重"""
+        # 参数要和训练时一致
+        with _init_on_meta() as on_meta:
+            alias_model = AliasAttPTModel(
+                base_model=base_model,
+                num_virtual_tokens=32,   # 按你训练时的设置来改
+                num_attn_heads=8,        # 同上
+            )
+
+        st_path = convert_adapter_to_safetensors(ADAPTER_DIR)
+        if st_path and load_safetensors is not None:
+            # safetensors：mmap 读取，只包含小头参数
+            head_sd = load_safetensors(st_path, device=self.device)
+        else:
+            adapter_ckpt = os.path.join(ADAPTER_DIR, ADAPTER_BIN_NAME)
+            if not os.path.exists(adapter_ckpt):
+                raise FileNotFoundError(f"找不到小头权重文件: {adapter_ckpt}")
+            head_sd = _head_state_dict(torch.load(adapter_ckpt, map_location=self.device))
+
+        if on_meta:
+            result = alias_model.load_state_dict(head_sd, strict=False, assign=True)
+        else:
+            result = alias_model.load_state_dict(head_sd, strict=False)
+
+        # 基座参数本来就不在小头文件里，其余 key 必须一一对上
+        missing = [k for k in result.missing_keys if not k.startswith(BASE_PREFIX)]
+        if missing or result.unexpected_keys:
+            raise RuntimeError(
+                f"小头权重和模型结构不匹配: missing={missing}, "
+                f"unexpected={list(result.unexpected_keys)}"
+            )
 
-        state_dict = torch.load(adapter_ckpt, map_location=device)
-        self.alias_model.load_state_dict(state_dict, strict=True)
-        self.alias_model.to(device)
-        self.alias_model.eval()
+        alias_model.to(self.device)
+        alias_model.eval()
+        return alias_model
 
     @classmethod
     def instance(cls) -> "AliasModelManager":
-        if cls._instance is None:
-            cls._instance = cls()
-        return cls._instance
\ No newline at end of file
+        """全局单例；第一次创建时同步加载模型并启动空闲检测"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                cls._instance.start_idle_monitor()
+            return cls._instance
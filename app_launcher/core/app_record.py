@@ -0,0 +1,101 @@
+# app_launcher/core/app_record.py
+# -*- coding: utf-8 -*-
+
+"""
+AppConfigStore 里的一条应用记录。
+
+以前每条记录是一个 dict（4 个字符串字段 + 别名列表），扫描出十万级别的应用时
+dict 本身的开销比数据还大。AppRecord 用 __slots__ 存字段，字符串做 intern
+（base_name 和第一个别名通常是同一个字符串，只存一份）。
+
+同时保留 dict 的读写方式，老代码里的 app.get("aliases", [])、app["exe_path"] = ...
+都不用改；要转成 JSON 时用 to_dict()。
+"""
+
+import sys
+from typing import Dict, Iterator, List
+
+FIELDS = ("id", "exe_path", "base_name", "aliases")
+
+
+def _intern(value) -> str:
+    return sys.intern(value) if isinstance(value, str) else ("" if value is None else str(value))
+
+
+class AppRecord:
+    __slots__ = FIELDS
+
+    def __init__(self, id: str, exe_path: str, base_name: str, aliases: List[str] = None):
+        self.id = _intern(id)
+        self.exe_path = exe_path or ""
+        self.base_name = _intern(base_name)
+        self.aliases = [_intern(a) for a in (aliases or [])]
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AppRecord":
+        return cls(data.get("id", ""), data.get("exe_path", ""), data.get("base_name", ""),
+                   data.get("aliases") or [])
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "exe_path": self.exe_path,
+            "base_name": self.base_name,
+            "aliases": list(self.aliases),
+        }
+
+    def copy(self) -> "AppRecord":
+        """别名列表也复制一份（事务回滚用）"""
+        return AppRecord(self.id, self.exe_path, self.base_name, list(self.aliases))
+
+    # ---------------- dict 兼容 ----------------
+
+    def get(self, key: str, default=None):
+        if key in FIELDS:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key: str):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key not in FIELDS:
+            raise KeyError(key)
+        if key == "aliases":
+            value = [_intern(a) for a in (value or [])]
+        elif key != "exe_path":
+            value = _intern(value)
+        setattr(self, key, value)
+
+    def __contains__(self, key) -> bool:
+        return key in FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def keys(self):
+        return list(FIELDS)
+
+    def values(self):
+        return [getattr(self, k) for k in FIELDS]
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in FIELDS]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, AppRecord):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    # 记录是可变的，放进 set / 当 dict key 时按对象身份
+    __hash__ = object.__hash__
+
+    def __repr__(self) -> str:
+        return f"AppRecord({self.to_dict()!r})"
@@ -0,0 +1,98 @@
+# app_launcher/core/app_settings.py
+# -*- coding: utf-8 -*-
+import json
+import os
+from typing import Any, Dict
+
+from app_launcher.core.ignore_rules import DEFAULT_SCAN_EXCLUDES
+
+DEFAULT_SETTINGS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "config", "settings.json"
+)
+
+# 推理精度可选值：
+#   auto -> GPU 用 fp16，CPU 用 fp32（和以前的行为一致）
+#   fp32 / fp16 / bf16 -> 直接按这个 dtype 加载基座
+#   int8 -> CPU 上对 Linear 层做动态 int8 量化（结果缓存在磁盘上）
+PRECISION_CHOICES = ["auto", "fp32", "fp16", "bf16", "int8"]
+
+DEFAULT_SETTINGS: Dict[str, Any] = {
+    "inference_precision": "auto",
+    # AliasAttPT 小头的编译方式：none / compile（torch.compile）/ script（TorchScript）
+    "prefix_head_compile": "none",
+    # 模型空闲多少分钟后卸载（0 表示常驻不卸载）
+    "idle_unload_minutes": 30,
+    # 扫描桌面：最多进几层文件夹（null 不限）、最多检查多少项 / 多少秒（0 不限）、gitignore 风格的排除规则
+    "scan_max_depth": 4,
+    "scan_max_entries": 50000,
+    "scan_timeout_seconds": 30,
+    "scan_excludes": list(DEFAULT_SCAN_EXCLUDES),
+    # 监视桌面：新建 / 删除 / 改名后自动增量扫描并更新应用列表
+    "watch_desktop": False,
+    # 扫描哪些来源（desktop / start_menu / extra / xdg，见 app_sources），以及 extra 要扫的目录
+    "index_sources": ["desktop", "start_menu", "extra", "xdg"],
+    "index_extra_roots": [],
+    # 启动记录：常用应用在相似度上最多加多少分、启动计数的半衰期（天）
+    "usage_boost_weight": 0.1,
+    "usage_half_life_days": 14,
+    # 输入框补全：最多记多少条历史指令 / 别名
+    "query_history_max": 2000,
+}
+
+
+class AppSettings:
+    """
+    程序级设置（和 app 列表分开存）：
+
+    {
+      "inference_precision": "auto",
+      "prefix_head_compile": "none",
+      "idle_unload_minutes": 30,
+      "scan_max_depth": 4,
+      "scan_max_entries": 50000,
+      "scan_timeout_seconds": 30,
+      "scan_excludes": [".git/", "node_modules/", "*.tmp", ...],
+      "watch_desktop": false,
+      "index_sources": ["desktop", "start_menu", "extra", "xdg"],
+      "index_extra_roots": ["D:/PortableApps"],
+      "usage_boost_weight": 0.1,
+      "usage_half_life_days": 14,
+      "query_history_max": 2000
+    }
+
+    文件不存在或字段缺失时用 DEFAULT_SETTINGS 里的默认值。
+    """
+
+    def __init__(self, settings_path: str = None):
+        self.settings_path = os.path.abspath(settings_path or DEFAULT_SETTINGS_PATH)
+        self.values: Dict[str, Any] = dict(DEFAULT_SETTINGS)
+        self.load()
+
+    def load(self):
+        """从 JSON 文件加载设置"""
+        self.values = dict(DEFAULT_SETTINGS)
+        if not os.path.exists(self.settings_path):
+            return
+        with open(self.settings_path, "r", encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                data = {}
+        if isinstance(data, dict):
+            self.values.update(data)
+
+    def save(self):
+        """把设置写回 JSON 文件"""
+        os.makedirs(os.path.dirname(self.settings_path), exist_ok=True)
+        with open(self.settings_path, "w", encoding="utf-8") as f:
+            json.dump(self.values, f, ensure_ascii=False, indent=2)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """取一个设置项；没有就用 DEFAULT_SETTINGS / default"""
+        if key in self.values:
+            return self.values[key]
+        return DEFAULT_SETTINGS.get(key, default)
+
+    def set(self, key: str, value: Any):
+        """设置一个设置项（不会自动保存）"""
+        self.values[key] = value
@@ -0,0 +1,475 @@
+# app_launcher/core/app_sources.py
+# -*- coding: utf-8 -*-
+
+"""
+多来源应用索引：桌面之外，还从开始菜单、设置里指定的额外目录、Linux 的 XDG .desktop 应用目录找应用。
+
+    AppSource                 一类来源：要扫描的根目录 + 怎么把目录里的一项变成候选 + 自己的增量快照
+      DesktopSource           桌面（和以前的“扫描桌面”一样，所有文件和文件夹）
+      StartMenuSource         开始菜单 Programs（只要快捷方式 / 程序，跳过卸载程序）
+      ExtraRootsSource        settings.json 里 index_extra_roots 列出的目录
+      XdgApplicationsSource   $XDG_DATA_HOME/applications、$XDG_DATA_DIRS/*/applications 下的 .desktop
+    AppIndexer                所有来源同时扫描，合并成一个去重的候选流，接口和 DesktopScan 一样
+
+每个来源各跑一个 DesktopScan（目录本身也在线程池里并发列出），快照分开存，
+某个来源的目录没变就只花 stat 的时间。
+"""
+
+import os
+import queue
+import re
+import shlex
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple
+
+from app_launcher.core.desktop_scanner import (
+    SCAN_WORKERS, SNAPSHOT_PATH, DesktopScan, ScanDelta, ScanOptions, ScanSnapshot,
+    _DirEntryInfo, _entry_candidate, _norm_key, _path_key, _release_com_shell, get_possible_desktop_dirs,
+)
+
+try:
+    import pythoncom  # 各来源的扫描线程里要解析 .lnk（COM 兜底），先初始化 COM
+except ImportError:
+    pythoncom = None
+
+# 除桌面以外的来源，快照放在 config 目录下 <来源名>_snapshot.json
+SNAPSHOT_DIR = os.path.dirname(SNAPSHOT_PATH)
+
+# 默认启用的来源（settings.json 里的 index_sources）
+DEFAULT_INDEX_SOURCES = ["desktop", "start_menu", "extra", "xdg"]
+
+# .desktop 文件只读开头这么多字节
+MAX_DESKTOP_FILE_BYTES = 64 * 1024
+
+
+class AppSource:
+    """
+    一类应用来源。子类实现 roots() 和 candidate()：
+    - roots()      要扫描的根目录（不存在的会被跳过）
+    - candidate()  目录里的一项 -> (显示名称, 路径, 文件身份)，不算应用返回 None
+    """
+
+    name = ""
+
+    def __init__(self, options: ScanOptions = None):
+        self.options = options or ScanOptions()
+
+    def roots(self) -> List[Path]:
+        raise NotImplementedError
+
+    def candidate(self, entry: _DirEntryInfo) -> Optional[Tuple[str, str, Hashable]]:
+        return _entry_candidate(entry)
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(SNAPSHOT_DIR, f"{self.name}_snapshot.json")
+
+    def make_scan(self, use_snapshot: bool = True, max_workers: int = None) -> DesktopScan:
+        snapshot = ScanSnapshot(self.snapshot_path) if use_snapshot else None
+        return DesktopScan(self.roots(), self.options, snapshot, max_workers, self.candidate)
+
+
+def _existing_unique_dirs(paths) -> List[Path]:
+    dirs, seen = [], set()
+    for p in paths:
+        if not p:
+            continue
+        p = Path(os.path.expandvars(os.path.expanduser(str(p))))
+        if not p.is_dir():
+            continue
+        key = _norm_key(str(p.resolve()))
+        if key not in seen:
+            seen.add(key)
+            dirs.append(p.resolve())
+    return dirs
+
+
+class DesktopSource(AppSource):
+    name = "desktop"
+
+    def roots(self) -> List[Path]:
+        return get_possible_desktop_dirs()
+
+    @property
+    def snapshot_path(self) -> str:
+        return SNAPSHOT_PATH  # 沿用原来的桌面快照
+
+
+class StartMenuSource(AppSource):
+    """
+    开始菜单（当前用户 + 所有用户）的 Programs 目录。
+    这里的文件夹只是分组，不当成应用；卸载程序、说明文档之类的快捷方式也跳过。
+    """
+
+    name = "start_menu"
+
+    APP_EXTENSIONS = (".lnk", ".exe", ".url", ".appref-ms")
+    _SKIP_NAME = re.compile(r"uninstall|卸载|readme|说明", re.IGNORECASE)
+
+    def roots(self) -> List[Path]:
+        candidates = []
+        for env in ("APPDATA", "ProgramData"):
+            base = os.environ.get(env)
+            if base:
+                candidates.append(os.path.join(base, "Microsoft", "Windows", "Start Menu", "Programs"))
+        return _existing_unique_dirs(candidates)
+
+    def candidate(self, entry: _DirEntryInfo) -> Optional[Tuple[str, str, Hashable]]:
+        if entry.is_dir or not entry.name.lower().endswith(self.APP_EXTENSIONS):
+            return None
+        if self._SKIP_NAME.search(entry.name):
+            return None
+        return _entry_candidate(entry)
+
+
+class ExtraRootsSource(AppSource):
+    """设置里 index_extra_roots 指定的目录（比如绿色软件目录），规则和桌面一样"""
+
+    name = "extra"
+
+    def __init__(self, extra_roots: List[str] = (), options: ScanOptions = None):
+        super().__init__(options)
+        self.extra_roots = list(extra_roots or ())
+
+    def roots(self) -> List[Path]:
+        return _existing_unique_dirs(self.extra_roots)
+
+
+# ---------------- XDG .desktop ----------------
+
+class DesktopEntry(NamedTuple):
+    """.desktop 文件 [Desktop Entry] 段里用得到的字段"""
+    name: str          # 按当前语言选的 Name[xx]，没有就是 Name
+    exec: str          # 原始 Exec（含 %f / %U 之类的占位符）
+    try_exec: str
+    entry_type: str    # Application / Link / Directory
+    hidden: bool       # NoDisplay=true 或 Hidden=true
+
+
+def _locale_keys(key: str) -> List[str]:
+    """Name -> [Name[zh_CN], Name[zh], Name]（按 LC_ALL / LC_MESSAGES / LANG）"""
+    lang = ""
+    for env in ("LC_ALL", "LC_MESSAGES", "LANG"):
+        lang = os.environ.get(env, "")
+        if lang:
+            break
+    lang = lang.split(".", 1)[0].split("@", 1)[0]
+    keys = []
+    if lang and lang not in ("C", "POSIX"):
+        keys.append(f"{key}[{lang}]")
+        if "_" in lang:
+            keys.append(f"{key}[{lang.split('_', 1)[0]}]")
+    keys.append(key)
+    return keys
+
+
+def parse_desktop_entry(text: str) -> DesktopEntry:
+    """解析 .desktop 文本（Desktop Entry 规范），只看 [Desktop Entry] 段"""
+    values: Dict[str, str] = {}
+    in_group = False
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("["):
+            in_group = line == "[Desktop Entry]"
+            continue
+        if in_group and "=" in line:
+            key, value = line.split("=", 1)
+            values.setdefault(key.strip(), value.strip())
+
+    name = ""
+    for key in _locale_keys("Name"):
+        if values.get(key):
+            name = values[key]
+            break
+    return DesktopEntry(
+        name=name,
+        exec=values.get("Exec", ""),
+        try_exec=values.get("TryExec", ""),
+        entry_type=values.get("Type", ""),
+        hidden=values.get("NoDisplay", "").lower() == "true" or values.get("Hidden", "").lower() == "true",
+    )
+
+
+def parse_desktop_file(path: str) -> DesktopEntry:
+    with open(path, "rb") as f:
+        return parse_desktop_entry(f.read(MAX_DESKTOP_FILE_BYTES).decode("utf-8", errors="replace"))
+
+
+# Exec 里的占位符（%f %F %u %U %i %c %k，以及已废弃的 %d %D %n %N %v %m）
+_FIELD_CODE = re.compile(r"^%[fFuUickdDnNvm]$")
+
+
+def exec_argv(exec_line: str) -> List[str]:
+    """Exec -> 参数列表：按规范的引号规则拆开，去掉占位符，%% 还原成 %"""
+    try:
+        args = shlex.split(exec_line)
+    except ValueError:
+        return []
+    return [a.replace("%%", "%") for a in args if not _FIELD_CODE.match(a)]
+
+
+def desktop_entry_target(desktop_path: str, entry: DesktopEntry) -> Optional[str]:
+    """
+    启动时用的路径：
+    - Exec 只有程序本身（去掉占位符后没有别的参数）-> 程序的绝对路径，和桌面上的 exe 一样去重
+    - 带参数的（flatpak run xx、env X=1 xx ...）-> .desktop 文件本身，由启动器按 .desktop 启动
+    - TryExec 指定的程序不存在 / 不是应用 / 被隐藏 -> None
+    """
+    if entry.entry_type != "Application" or entry.hidden or not entry.exec:
+        return None
+    if entry.try_exec and shutil.which(entry.try_exec) is None:
+        return None
+    argv = exec_argv(entry.exec)
+    if not argv:
+        return None
+    if len(argv) == 1:
+        program = shutil.which(argv[0])
+        if program:
+            return os.path.abspath(program)
+    return desktop_path
+
+
+class DesktopEntryCache:
+    """按 (mtime, 大小) 缓存 .desktop 的解析结果，和 lnk_parser.LnkTargetCache 一样，多个扫描线程可以同时用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, int, Optional[DesktopEntry]]] = {}
+
+    def get(self, path: str) -> Optional[DesktopEntry]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._entries.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        try:
+            entry = parse_desktop_file(path)
+        except OSError:
+            entry = None
+        with self._lock:
+            self._entries[path] = (st.st_mtime_ns, st.st_size, entry)
+        return entry
+
+
+default_desktop_entry_cache = DesktopEntryCache()
+
+
+class XdgApplicationsSource(AppSource):
+    """
+    XDG 应用目录下的 .desktop（Linux 桌面环境的“所有应用”列表）。
+    同一个 desktop id（相对 applications 的路径，/ 换成 -）在多个目录里都有时，
+    按 XDG_DATA_HOME、XDG_DATA_DIRS 的顺序只认第一个（用户目录里的可以覆盖 / 隐藏系统的）。
+    """
+
+    name = "xdg"
+
+    def __init__(self, options: ScanOptions = None, cache: DesktopEntryCache = None):
+        super().__init__(options)
+        self.cache = cache or default_desktop_entry_cache
+        self._roots: Optional[List[Path]] = None
+
+    def roots(self) -> List[Path]:
+        if self._roots is None:
+            data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share")
+            data_dirs = (os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share").split(":")
+            self._roots = _existing_unique_dirs(
+                os.path.join(d, "applications") for d in [data_home] + data_dirs if d)
+        return self._roots
+
+    def candidate(self, entry: _DirEntryInfo) -> Optional[Tuple[str, str, Hashable]]:
+        if entry.is_dir or not entry.name.endswith(".desktop"):
+            return None
+        roots = [os.path.join(str(r), "") for r in self.roots()]
+        for i, root in enumerate(roots):
+            if entry.path.startswith(root):
+                rel = entry.path[len(root):]
+                if any(os.path.lexists(earlier + rel) for earlier in roots[:i]):
+                    return None
+                break
+        desktop = self.cache.get(entry.path)
+        if desktop is None:
+            return None
+        target = desktop_entry_target(entry.path, desktop)
+        if target is None:
+            return None
+        name = desktop.name or entry.name[:-len(".desktop")]
+        if target == entry.path:
+            return name, target, entry.key
+        return name, target, _path_key(target)
+
+
+# ---------------- 合并 ----------------
+
+def make_sources(settings) -> List[AppSource]:
+    """按 settings.json 的 index_sources / index_extra_roots / scan_* 创建来源"""
+    options = ScanOptions.from_settings(settings)
+    names = settings.get("index_sources") or DEFAULT_INDEX_SOURCES
+    sources: List[AppSource] = []
+    for name in names:
+        if name == "desktop":
+            sources.append(DesktopSource(options))
+        elif name == "start_menu":
+            sources.append(StartMenuSource(options))
+        elif name == "extra":
+            sources.append(ExtraRootsSource(settings.get("index_extra_roots") or [], options))
+        elif name == "xdg":
+            sources.append(XdgApplicationsSource(options))
+        else:
+            print("unknown index source ignored:", name)
+    return sources
+
+
+class AppIndexer:
+    """
+    所有来源一起扫：for name, path in AppIndexer(...) 边扫边输出去重后的 (显示名称, 路径)。
+    接口和 DesktopScan 一样（cancel / stop_reason / entries_seen / delta()），DesktopScanWorker 直接能用。
+
+    - 每个来源一个线程跑自己的 DesktopScan，线程池按来源个数平分
+    - 同一个路径（不同来源都指向同一个程序）只输出一次，先到先得
+    - 用快照时每个来源只输出自己上次没有的候选；快照各自保存
+    - removed：某个来源里消失、其它来源也没有的候选；有来源没扫完时为空
+    """
+
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self, sources: List[AppSource], use_snapshots: bool = True, max_workers: int = None):
+        # 没有根目录的来源（比如 Linux 上的开始菜单）不参与，线程按真正要扫的来源平分
+        self.sources = [source for source in sources if source.roots()]
+        workers = max_workers or SCAN_WORKERS
+        per_source = max(2, workers // max(len(self.sources), 1))
+        self.scans: Dict[str, DesktopScan] = {
+            source.name: source.make_scan(use_snapshots, per_source) for source in self.sources
+        }
+        self.use_snapshots = use_snapshots
+        self.candidates: List[Tuple[str, str]] = []
+        self.stop_reason = ""
+        self._candidate_keys = set()
+        self._cancel_event = threading.Event()
+
+    @classmethod
+    def from_settings(cls, settings, use_snapshots: bool = True) -> "AppIndexer":
+        return cls(make_sources(settings), use_snapshots)
+
+    def roots(self) -> List[str]:
+        """所有来源的根目录（给 DesktopWatcher 用）"""
+        return [str(root) for scan in self.scans.values() for root in scan.roots]
+
+    @property
+    def entries_seen(self) -> int:
+        return sum(scan.entries_seen for scan in self.scans.values())
+
+    @property
+    def truncated(self) -> bool:
+        return bool(self.stop_reason)
+
+    def cancel(self):
+        self._cancel_event.set()
+        for scan in self.scans.values():
+            scan.cancel()
+
+    def clear_snapshots(self):
+        for scan in self.scans.values():
+            if scan.snapshot is not None:
+                scan.snapshot.clear()
+
+    def _run_scan(self, name: str, scan: DesktopScan, out: "queue.SimpleQueue"):
+        # .lnk 在迭代 DesktopScan 的线程里解析，纯 Python 解析不了的要用 WScript.Shell，
+        # 这个线程不是 DesktopScanWorker 的线程，COM 要自己初始化
+        if pythoncom is not None:
+            pythoncom.CoInitialize()
+        try:
+            for item in scan:
+                out.put((name, item))
+        except Exception as e:
+            print(f"{name} scan failed:", e)
+        finally:
+            if pythoncom is not None:
+                _release_com_shell()
+                pythoncom.CoUninitialize()
+        out.put((name, None))
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        out: "queue.SimpleQueue[Tuple[str, Optional[Tuple[str, str]]]]" = queue.SimpleQueue()
+        running = set(self.scans)
+        yielded = set()  # 规范化路径
+        threads = [
+            threading.Thread(target=self._run_scan, args=(name, scan, out), name=f"app-index-{name}", daemon=True)
+            for name, scan in self.scans.items()
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            while running:
+                if self._cancel_event.is_set():
+                    self.stop_reason = "cancelled"
+                    break
+                try:
+                    name, item = out.get(timeout=self._POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    running.discard(name)
+                    continue
+                key = _norm_key(item[1])
+                if key in yielded:
+                    continue
+                yielded.add(key)
+                yield item
+        finally:
+            if running:
+                for scan in self.scans.values():
+                    scan.cancel()
+                if not self.stop_reason:
+                    self.stop_reason = "cancelled"  # 调用方提前结束了 for 循环
+                # 各来源处理完手上这个目录就会停；等它们停下再读 candidates / added，免得边读边被追加
+                for thread in threads:
+                    thread.join()
+            else:
+                reasons = [scan.stop_reason for scan in self.scans.values() if scan.stop_reason]
+                self.stop_reason = reasons[0] if reasons else ""
+            self._merge_candidates()
+
+    def _merge_candidates(self):
+        seen = set()
+        self.candidates = []
+        for scan in self.scans.values():
+            for item in scan.candidates:
+                key = _norm_key(item[1])
+                if key not in seen:
+                    seen.add(key)
+                    self.candidates.append(item)
+        self._candidate_keys = seen
+
+    def delta(self) -> ScanDelta:
+        """扫描结束后调用；合并各来源的结果"""
+        added, seen = [], set()
+        for scan in self.scans.values():
+            for item in scan.delta().added:
+                key = _norm_key(item[1])
+                if key not in seen:
+                    seen.add(key)
+                    added.append(item)
+        removed = []
+        if not self.stop_reason:
+            for scan in self.scans.values():
+                removed.extend(c for c in scan.removed if _norm_key(c[1]) not in self._candidate_keys)
+        return ScanDelta(
+            added, removed, list(self.candidates),
+            sum(scan.rescanned_dirs for scan in self.scans.values()),
+            sum(scan.total_dirs for scan in self.scans.values()),
+        )
+
+
+def index_apps_incremental(settings) -> ScanDelta:
+    """所有来源增量扫描一遍（不需要边扫边处理时用），返回合并后的新增 / 消失候选"""
+    indexer = AppIndexer.from_settings(settings)
+    for _ in indexer:
+        pass
+    return indexer.delta()
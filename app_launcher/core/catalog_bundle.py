@@ -0,0 +1,130 @@
+# app_launcher/core/catalog_bundle.py
+# -*- coding: utf-8 -*-
+
+"""
+应用目录包（catalog bundle）：把 apps_config.json 和预计算好的别名向量打成一个 zip，
+拷到别的机器上导入后，首次启动 AppMatcher.rebuild 不需要再调用编码器。
+
+zip 里的内容：
+    manifest.json       格式版本、编码器指纹、应用 / 别名数量
+    apps_config.json    和 config/apps_config.json 相同格式
+    app_embeddings.npz  和 config/app_embeddings.npz 相同格式（EmbeddingCache）
+
+只依赖标准库 + numpy，不需要加载模型。
+"""
+
+import json
+import os
+import time
+import zipfile
+from typing import Dict
+
+from app_launcher.core.config_store import AppConfigStore, DEFAULT_CONFIG_PATH
+from app_launcher.core.embedding_cache import EmbeddingCache, EMB_PATH, validate_npz
+
+BUNDLE_FORMAT = 1
+
+_MANIFEST_NAME = "manifest.json"
+_CONFIG_NAME = "apps_config.json"
+_EMB_NAME = "app_embeddings.npz"
+
+
+def export_bundle(bundle_path: str, config_path: str = None, emb_path: str = None) -> Dict:
+    """
+    把配置 + 向量缓存导出成一个 zip。
+    :return: manifest；其中 missing 是配置里还没有向量的别名数（应先跑预计算）
+    """
+    config_path = os.path.abspath(config_path or DEFAULT_CONFIG_PATH)
+    emb_path = os.path.abspath(emb_path or EMB_PATH)
+
+    store = AppConfigStore(config_path)
+    cache = EmbeddingCache(path=emb_path)
+    aliases = [a for app in store.apps for a in (app.get("aliases") or [])]
+    missing = cache.missing(aliases)
+    # 只导出配置里用得到的向量
+    cache.prune(aliases)
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "fingerprint": cache.file_fingerprint,
+        "apps": len(store.apps),
+        "aliases": len(cache.cache),
+        "missing": len(missing),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+    tmp_emb = bundle_path + ".emb.npz"
+    tmp_bundle = bundle_path + ".tmp"
+    try:
+        export_cache = EmbeddingCache(path=tmp_emb)
+        export_cache.cache = cache.cache
+        export_cache.fingerprint = cache.file_fingerprint
+        export_cache.save()
+
+        with zipfile.ZipFile(tmp_bundle, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(_MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+            zf.writestr(_CONFIG_NAME, json.dumps({"apps": [app.to_dict() for app in store.apps]},
+                                                  ensure_ascii=False, indent=2))
+            if os.path.exists(tmp_emb):
+                zf.write(tmp_emb, _EMB_NAME)
+        os.replace(tmp_bundle, bundle_path)
+    finally:
+        for path in (tmp_emb, tmp_bundle):
+            if os.path.exists(path):
+                os.remove(path)
+    return manifest
+
+
+def read_manifest(bundle_path: str) -> Dict:
+    """只读 manifest，不解压其它内容"""
+    with zipfile.ZipFile(bundle_path, "r") as zf:
+        manifest = json.loads(zf.read(_MANIFEST_NAME).decode("utf-8"))
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"不支持的目录包格式：{manifest.get('format')}")
+    return manifest
+
+
+def import_bundle(bundle_path: str, config_path: str = None, emb_path: str = None,
+                  overwrite: bool = False) -> Dict:
+    """
+    导入目录包：写入 apps_config.json 和向量缓存。
+    已经有配置（且不是空的）时默认拒绝，overwrite=True 才覆盖。
+    向量文件先写到临时文件，用 validate_npz 检查过（不用 pickle 能读、形状对得上）才替换本机缓存，
+    包里的东西不合法就抛 ValueError，本机文件一个都不动。
+    :return: manifest
+    """
+    config_path = os.path.abspath(config_path or DEFAULT_CONFIG_PATH)
+    emb_path = os.path.abspath(emb_path or EMB_PATH)
+
+    manifest = read_manifest(bundle_path)
+    if not overwrite and AppConfigStore(config_path).apps:
+        raise FileExistsError(f"已经存在应用配置：{config_path}")
+
+    with zipfile.ZipFile(bundle_path, "r") as zf:
+        config_bytes = zf.read(_CONFIG_NAME)
+        emb_bytes = zf.read(_EMB_NAME) if _EMB_NAME in zf.namelist() else None
+
+    # 先全部写成临时文件并检查，都没问题再替换，导入一半失败不会留下坏文件
+    staged = []
+    try:
+        for path, data in ((emb_path, emb_bytes), (config_path, config_bytes)):
+            if data is None:
+                continue
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            staged.append((tmp_path, path))
+        if emb_bytes is not None:
+            try:
+                validate_npz(emb_path + ".tmp")
+            except ValueError as e:
+                raise ValueError(f"目录包里的向量文件不合法：{e}")
+        for tmp_path, path in staged:
+            os.replace(tmp_path, path)
+        staged = []
+    finally:
+        for tmp_path, _ in staged:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return manifest
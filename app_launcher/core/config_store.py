@@ -1,14 +1,227 @@
 # app_launcher/core/config_store.py
 # -*- coding: utf-8 -*-
+import contextlib
+import copy
 import json
 import os
-from typing import List, Dict
+import threading
+from typing import Callable, Iterator, List, Dict, Optional, Set
+
+from app_launcher.core.app_record import AppRecord
 
 DEFAULT_CONFIG_PATH = os.path.join(
     os.path.dirname(__file__), "..", "config", "apps_config.json"
 )
 
 
+def normalize_alias(alias: str) -> str:
+    """别名索引用：去掉所有空白 + 小写（“Kakao Map” 和 “kakaomap” 算同一个）"""
+    return "".join((alias or "").split()).lower()
+
+
+def normalize_path(path: str) -> str:
+    """路径索引用：统一分隔符 / 去掉多余的 ..，Windows 上不区分大小写"""
+    if not path:
+        return ""
+    return os.path.normcase(os.path.normpath(path))
+
+
+# 流式读取时每次从文件读多少字符
+_READ_CHUNK = 64 * 1024
+
+
+def iter_config_apps(f) -> Iterator[Dict]:
+    """
+    流式读取 {"apps": [ {...}, {...} ]}：逐个解析数组里的对象，不把整个文档读进内存。
+    文件结构不是这样（比如 apps 前面还有别的键）时抛 ValueError，调用方退回 json.load。
+    """
+    decoder = json.JSONDecoder()
+    buf = f.read(_READ_CHUNK)
+    eof = not buf
+    pos = 0
+
+    def skip_ws(p):
+        while p < len(buf) and buf[p] in " \t\r\n":
+            p += 1
+        return p
+
+    def fill(p):
+        """缓冲区快用完时再读一块；返回新的 pos"""
+        nonlocal buf, eof
+        if not eof:
+            more = f.read(_READ_CHUNK)
+            if more:
+                buf = buf[p:] + more
+                return 0
+            eof = True
+        return p
+
+    # 开头必须是 { "apps" : [
+    for token in ("{", '"apps"', ":", "["):
+        pos = skip_ws(pos)
+        while len(buf) - pos < len(token) and not eof:
+            pos = fill(pos)
+            pos = skip_ws(pos)
+        if not buf.startswith(token, pos):
+            raise ValueError("apps_config.json 不是 {\"apps\": [...]} 结构")
+        pos += len(token)
+
+    while True:
+        pos = skip_ws(pos)
+        if pos >= len(buf) - 1 and not eof:
+            pos = skip_ws(fill(pos))
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        if pos < len(buf) and buf[pos] == ",":
+            pos += 1
+            continue
+        # 解析一个对象；失败且文件还没读完，说明对象被切断了，再读一块
+        while True:
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                new_pos = fill(pos)
+                if new_pos == pos and eof:
+                    raise
+                pos = new_pos
+        yield obj
+        pos = end
+        if pos > _READ_CHUNK:
+            buf = buf[pos:]
+            pos = 0
+
+
+def _display_name(app: Dict) -> str:
+    aliases = app.get("aliases") or []
+    return aliases[0] if aliases else app.get("id", "")
+
+
+def _search_key(app: Dict) -> str:
+    return f"{_display_name(app)}\n{app.get('exe_path', '')}".lower()
+
+
+# 索引的值：只有一个 app 时直接存 app（绝大多数情况），多个时才存 list，省掉十万个小 list
+
+
+def _multi_add(index: Dict, key: str, app: AppRecord):
+    cur = index.get(key)
+    if cur is None:
+        index[key] = app
+    elif cur is app:
+        return
+    elif type(cur) is list:
+        for a in cur:
+            if a is app:
+                return
+        cur.append(app)
+    else:
+        index[key] = [cur, app]
+
+
+def _multi_remove(index: Dict, key: str, app: AppRecord):
+    cur = index.get(key)
+    if cur is None:
+        return
+    if type(cur) is list:
+        rest = [a for a in cur if a is not app]
+        if len(rest) == 1:
+            index[key] = rest[0]
+        elif rest:
+            index[key] = rest
+        else:
+            del index[key]
+    elif cur is app:
+        del index[key]
+
+
+def _multi_get(index: Dict, key: str) -> List[AppRecord]:
+    cur = index.get(key)
+    if cur is None:
+        return []
+    return list(cur) if type(cur) is list else [cur]
+
+
+class ChangeSet:
+    """
+    一次保存里累计的改动（按 app id / 别名文本记录），保存后交给监听者，
+    比如 AppMatcher.apply_changes 只在真的有改动时才重建。
+    同一批里先加后删的别名会互相抵消。
+    """
+
+    def __init__(self):
+        self.added_apps: List[str] = []
+        self.removed_apps: List[str] = []
+        self.updated_apps: List[str] = []
+        self.added_aliases: Set[str] = set()
+        self.removed_aliases: Set[str] = set()
+        self.reset = False  # 整个列表被替换（load / clear_apps）
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.reset or self.added_apps or self.removed_apps or self.updated_apps
+            or self.added_aliases or self.removed_aliases
+        )
+
+    def add_alias(self, alias: str):
+        if alias in self.removed_aliases:
+            self.removed_aliases.discard(alias)
+        else:
+            self.added_aliases.add(alias)
+
+    def remove_alias(self, alias: str):
+        if alias in self.added_aliases:
+            self.added_aliases.discard(alias)
+        else:
+            self.removed_aliases.add(alias)
+
+    def summary(self) -> str:
+        if self.reset:
+            return "reset"
+        return (
+            f"+{len(self.added_apps)} -{len(self.removed_apps)} ~{len(self.updated_apps)} apps, "
+            f"+{len(self.added_aliases)} -{len(self.removed_aliases)} aliases"
+        )
+
+
+def diff_apps(old: List[Dict], new: List[Dict]) -> ChangeSet:
+    """
+    比较两份 apps 列表（重新加载外部修改过的文件时用）：
+    - app 按 id 对应（id 重复时按出现顺序第几个对应）
+    - 别名按全目录去重后的集合比较：只出现在新列表里的算新增，只出现在旧列表里的算删除
+    """
+    def keyed(apps):
+        seen: Dict[str, int] = {}
+        result = {}
+        for app in apps:
+            app_id = app.get("id", "")
+            n = seen.get(app_id, 0)
+            seen[app_id] = n + 1
+            result[(app_id, n)] = app
+        return result
+
+    old_map, new_map = keyed(old), keyed(new)
+    changes = ChangeSet()
+    for key, app in new_map.items():
+        before = old_map.get(key)
+        if before is None:
+            changes.added_apps.append(key[0])
+        elif (before.get("exe_path"), before.get("base_name"), list(before.get("aliases") or [])) != \
+                (app.get("exe_path"), app.get("base_name"), list(app.get("aliases") or [])):
+            changes.updated_apps.append(key[0])
+    for key in old_map:
+        if key not in new_map:
+            changes.removed_apps.append(key[0])
+
+    old_aliases = {a for app in old for a in (app.get("aliases") or [])}
+    new_aliases = {a for app in new for a in (app.get("aliases") or [])}
+    changes.added_aliases = new_aliases - old_aliases
+    changes.removed_aliases = old_aliases - new_aliases
+    return changes
+
+
 class AppConfigStore:
     """
     管理 app 配置（原始名称 + 路径 + 别名列表）
@@ -25,103 +238,455 @@ class AppConfigStore:
         ...
       ]
     }
+    内存里每条是 AppRecord（__slots__，可以像 dict 一样 .get / [] 读写）；读写文件都是逐条流式进行。
+
+    改动和保存：
+    - add_app / delete_app / update_app / add_alias / remove_alias 只改内存，并记进当前的 ChangeSet
+    - save() 原子写入（临时文件 + 替换），然后把累计的 ChangeSet 交给 add_listener 注册的回调
+    - with store.batch(): 里的 save() 推迟到最外层结束时只写一次；中途抛异常则回滚内存里的改动
+    - schedule_save(): 防抖写入，连续编辑时只在停下来 write_behind_delay 秒后写一次（在定时器线程里写）
+
+    索引（每次修改时同步更新，查询不用扫整个列表）：
+    - get_by_id(id)                 id -> app
+    - find_by_exe_path(path)        规范化后的路径 -> apps
+    - apps_for_alias(alias)         规范化后的别名 -> apps
+    - search(keyword)               名称 / 路径子串过滤（预先小写好，关键字变长时只在上次结果里筛）
+    - index_of(app)                 app 在 apps 里的下标
+    直接改 self.apps 的代码需要之后调用 reindex()。
+
+    外部修改：reload_from_disk() 发现文件不是自己最后一次读 / 写的那份时重新加载，
+    返回和内存里旧列表的差异（ChangeSet），配合 ConfigFileWatcher 做热加载。
     """
 
-    def __init__(self, config_path: str = None):
+    def __init__(self, config_path: str = None, write_behind_delay: float = 1.0):
         self.config_path = os.path.abspath(config_path or DEFAULT_CONFIG_PATH)
         self.apps: List[Dict] = []
-        self.load()
+        self.write_behind_delay = write_behind_delay
+
+        self._lock = threading.RLock()  # 定时器线程写文件时，GUI 线程不能同时改 apps
+        self._batch_depth = 0
+        self._save_requested = False    # batch 里调用过 save()
+        self._changes = ChangeSet()     # 上次保存以来的改动
+        self._listeners: List[Callable[[ChangeSet], None]] = []
+        self._save_timer: Optional[threading.Timer] = None
+
+        self._by_id: Dict = {}
+        self._by_path: Dict = {}
+        self._by_alias: Dict = {}
+        self._search_text: Dict[int, str] = {}  # id(app) -> "名称\n路径"（小写），第一次 search 时才建
+        self._mutations = 0                     # 每次修改 +1，search 的增量缓存用
+        self._last_search = ("", -1, [])        # (关键字, _mutations, 结果)
+        self._positions = (-1, {})              # (_mutations, id(app) -> 在 apps 里的下标)，index_of 用
+        self._disk_signature = None             # 最后一次读 / 写时文件的 (mtime_ns, size)
+        self._load()
 
     def load(self):
-        """从 JSON 文件加载配置"""
-        if not os.path.exists(self.config_path):
+        """从 JSON 文件重新加载配置（内存里没保存的改动丢弃，按“整体替换”通知下一次保存）"""
+        with self._lock:
+            self._load()
+            self._changes = ChangeSet()
+            self._changes.reset = True
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.config_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def reload_from_disk(self) -> Optional[ChangeSet]:
+        """
+        文件被外部修改过（和最后一次读 / 写时不一样）就重新加载，返回差异；
+        没变化返回 None。自己 save() 写的文件不会触发。
+        内存里还没保存的改动（包括防抖中的）会被丢弃，以文件为准。
+        文件不是合法 JSON（比如别的程序写到一半）时保持现状，等下一次修改。
+        """
+        with self._lock:
+            if self._batch_depth:
+                return None  # 事务进行中，等它结束后下一次检查再说
+            signature = self._file_signature()
+            if signature == self._disk_signature:
+                return None
+            try:
+                new_apps = self._read_apps()
+            except ValueError as e:
+                print("apps_config.json is not valid JSON, keep current apps:", e)
+                self._disk_signature = signature
+                return None
+            old_apps = self.apps
+            self._cancel_timer()
+            self._disk_signature = signature
+            self.apps = new_apps
+            self.reindex()
+            self._changes = ChangeSet()
+            self._save_requested = False
+            changes = diff_apps(old_apps, self.apps)
+        return changes
+
+    def _load(self):
+        """从 JSON 文件加载配置（优先流式解析，结构不标准时退回 json.load）"""
+        self._disk_signature = self._file_signature()
+        try:
+            self.apps = self._read_apps()
+        except json.JSONDecodeError:
             self.apps = []
-            return
+        self.reindex()
+
+    def _read_apps(self) -> List[AppRecord]:
+        """读文件得到记录列表；文件不存在返回空列表，不是合法 JSON 时抛 JSONDecodeError"""
+        if not os.path.exists(self.config_path):
+            return []
+        try:
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                return [self._record_from_json(app) for app in iter_config_apps(f)]
+        except ValueError:
+            pass  # 包括 JSONDecodeError
+        # 结构不标准：整体重读一遍（不是合法 JSON 时 JSONDecodeError 抛给调用方）
         with open(self.config_path, "r", encoding="utf-8") as f:
-            try:
-                cfg = json.load(f)
-            except json.JSONDecodeError:
-                cfg = {"apps": []}
-        # 确保每条记录都有 base_name / aliases 字段
-        self.apps = []
-        for app in cfg.get("apps", []):
-            base_name = app.get("base_name")
-            aliases = app.get("aliases") or []
-            # 兼容旧结构：只有 aliases[0] 没有 base_name 的情况
-            if base_name is None:
-                if aliases:
-                    base_name = aliases[0]
-                else:
-                    base_name = app.get("id", "")
-            # 确保 base_name 在 aliases 里
-            if base_name and base_name not in aliases:
-                aliases.insert(0, base_name)
-            self.apps.append({
-                "id": app.get("id", base_name),
-                "exe_path": app.get("exe_path", ""),
-                "base_name": base_name,
-                "aliases": aliases,
-            })
-
-    def save(self):
-        """把 apps 写回 JSON 文件"""
+            cfg = json.load(f)
+        raw_apps = cfg.get("apps", []) if isinstance(cfg, dict) else []
+        return [self._record_from_json(app) for app in raw_apps]
+
+    @staticmethod
+    def _record_from_json(app: Dict) -> AppRecord:
+        """确保每条记录都有 base_name / aliases 字段"""
+        base_name = app.get("base_name")
+        aliases = app.get("aliases") or []
+        # 兼容旧结构：只有 aliases[0] 没有 base_name 的情况
+        if base_name is None:
+            if aliases:
+                base_name = aliases[0]
+            else:
+                base_name = app.get("id", "")
+        # 确保 base_name 在 aliases 里
+        if base_name and base_name not in aliases:
+            aliases.insert(0, base_name)
+        return AppRecord(app.get("id", base_name), app.get("exe_path", ""), base_name, aliases)
+
+    # ---------------- 索引 ----------------
+
+    def reindex(self):
+        """按当前 self.apps 重建全部索引"""
+        with self._lock:
+            self._by_id = {}
+            self._by_path = {}
+            self._by_alias = {}
+            self._search_text = {}
+            for app in self.apps:
+                self._index_app(app)
+            self._mutations += 1
+
+    def _index_app(self, app: Dict):
+        _multi_add(self._by_id, app.get("id", ""), app)
+        _multi_add(self._by_path, normalize_path(app.get("exe_path", "")), app)
+        for alias in app.get("aliases") or []:
+            _multi_add(self._by_alias, normalize_alias(alias), app)
+        if self._search_text:
+            self._search_text[id(app)] = _search_key(app)
+
+    def _unindex_app(self, app: Dict):
+        _multi_remove(self._by_id, app.get("id", ""), app)
+        _multi_remove(self._by_path, normalize_path(app.get("exe_path", "")), app)
+        for alias in app.get("aliases") or []:
+            _multi_remove(self._by_alias, normalize_alias(alias), app)
+        self._search_text.pop(id(app), None)
+
+    def _touch(self):
+        self._mutations += 1
+
+    def get_by_id(self, app_id: str) -> Optional[Dict]:
+        """按 id 取 app（id 重复时返回第一个）"""
+        bucket = _multi_get(self._by_id, app_id)
+        return bucket[0] if bucket else None
+
+    def find_by_exe_path(self, exe_path: str) -> List[Dict]:
+        return _multi_get(self._by_path, normalize_path(exe_path))
+
+    def has_exe_path(self, exe_path: str) -> bool:
+        return normalize_path(exe_path) in self._by_path
+
+    def apps_for_alias(self, alias: str) -> List[Dict]:
+        """哪些 app 有这个别名（规范化后比较）"""
+        return _multi_get(self._by_alias, normalize_alias(alias))
+
+    def index_of(self, app: Dict) -> int:
+        """app 在 self.apps 里的下标（表格过滤后的行 -> update_app / delete_app 用的下标），不在返回 -1"""
+        with self._lock:
+            mutations, positions = self._positions
+            if mutations != self._mutations:
+                positions = {id(a): i for i, a in enumerate(self.apps)}
+                self._positions = (self._mutations, positions)
+            index = positions.get(id(app), -1)
+            if 0 <= index < len(self.apps) and self.apps[index] is app:
+                return index
+        return -1
+
+    def search(self, keyword: str) -> List[Dict]:
+        """
+        名称（第一个别名）或路径包含关键字（不区分大小写）的 app，按原顺序。
+        输入框里逐字输入时，新关键字包含上一次的关键字，只需要在上次结果里继续筛。
+        """
+        key = (keyword or "").strip().lower()
+        if not key:
+            return list(self.apps)
+        with self._lock:
+            last_key, last_mut, last_result = self._last_search
+            if last_key and last_mut == self._mutations and last_key in key:
+                pool = last_result
+            else:
+                pool = self.apps
+            texts = self._search_text
+            if not texts and self.apps:
+                for app in self.apps:
+                    texts[id(app)] = _search_key(app)
+            result = [app for app in pool if key in texts.get(id(app), "")]
+            self._last_search = (key, self._mutations, result)
+        return result
+
+    # ---------------- 保存 / 事务 / 防抖 ----------------
+
+    def add_listener(self, callback: Callable[[ChangeSet], None]):
+        """保存成功后回调 callback(changes)；可能在定时器线程里调用"""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[ChangeSet], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def save(self) -> Optional[ChangeSet]:
+        """
+        把 apps 写回 JSON 文件（先写临时文件再替换，写一半崩溃也不会留下坏文件），
+        然后通知监听者。batch() 里调用时只做标记，返回 None。
+        :return: 这次保存带出去的 ChangeSet
+        """
+        with self._lock:
+            if self._batch_depth:
+                self._save_requested = True
+                return None
+            self._cancel_timer()
+            self._write_atomic()
+            changes, self._changes = self._changes, ChangeSet()
+        self._notify(changes)
+        return changes
+
+    def _write_atomic(self):
         os.makedirs(os.path.dirname(self.config_path), exist_ok=True)
-        with open(self.config_path, "w", encoding="utf-8") as f:
-            json.dump({"apps": self.apps}, f, ensure_ascii=False, indent=2)
+        tmp_path = self.config_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            # 一条记录一行地写，不先拼出整个文档
+            f.write('{\n  "apps": [')
+            for i, app in enumerate(self.apps):
+                f.write(",\n    " if i else "\n    ")
+                f.write(json.dumps(app.to_dict(), ensure_ascii=False))
+            f.write("\n  ]\n}\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.config_path)
+        self._disk_signature = self._file_signature()
+
+    def _notify(self, changes: ChangeSet):
+        for callback in list(self._listeners):
+            try:
+                callback(changes)
+            except Exception as e:
+                print("config change listener failed:", e)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        事务：
+            with store.batch():
+                store.add_app(...)
+                store.add_app(...)
+                store.save()      # 可以照常调用，会推迟到最外层 with 结束
+        - 最外层结束时，只要有改动或调用过 save()，就写一次文件、发一次合并后的 ChangeSet
+        - 中途抛异常：apps 回滚到进入前的样子，不写文件
+        可以嵌套。
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                backup = ([app.copy() for app in self.apps], self._changes, self._save_requested)
+                self._changes = copy.deepcopy(self._changes)
+            self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.apps, self._changes, self._save_requested = backup
+                    self.reindex()
+            raise
+        with self._lock:
+            self._batch_depth -= 1
+            if self._batch_depth:
+                return
+            need_save = self._save_requested or bool(self._changes)
+            self._save_requested = False
+        if need_save:
+            self.save()
+
+    def schedule_save(self, delay: float = None):
+        """防抖写入：delay 秒内再次调用会重新计时，停下来后只写一次"""
+        delay = self.write_behind_delay if delay is None else delay
+        with self._lock:
+            self._cancel_timer()
+            timer = threading.Timer(delay, self._timer_save)
+            timer.daemon = True
+            self._save_timer = timer
+            timer.start()
+
+    def _timer_save(self):
+        with self._lock:
+            if self._save_timer is None or threading.current_thread() is not self._save_timer:
+                return  # 已经被 flush / save / 新的 schedule_save 取代
+            self._save_timer = None
+        self.save()
+
+    def _cancel_timer(self):
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+    def has_pending_save(self) -> bool:
+        return self._save_timer is not None
+
+    def flush(self) -> Optional[ChangeSet]:
+        """有待写入的防抖保存就立即写（关闭对话框 / 退出前调用）"""
+        with self._lock:
+            if self._save_timer is None:
+                return None
+            self._cancel_timer()
+        return self.save()
+
+    # ---------------- 编辑 ----------------
 
     def add_app(self, app_id: str, exe_path: str, base_name: str):
         """添加一条新记录，初始别名只有 base_name 一个"""
-        self.apps.append({
-            "id": app_id,
-            "exe_path": exe_path,
-            "base_name": base_name,
-            "aliases": [base_name] if base_name else [],
-        })
+        with self._lock:
+            app = AppRecord(app_id, exe_path, base_name, [base_name] if base_name else [])
+            self.apps.append(app)
+            self._index_app(app)
+            self._touch()
+            self._changes.added_apps.append(app_id)
+            if base_name:
+                self._changes.add_alias(base_name)
 
     def delete_app(self, app_index: int):
         """按索引删一条记录"""
-        if 0 <= app_index < len(self.apps):
-            self.apps.pop(app_index)
+        with self._lock:
+            if 0 <= app_index < len(self.apps):
+                app = self.apps.pop(app_index)
+                self._unindex_app(app)
+                self._touch()
+                self._changes.removed_apps.append(app.get("id"))
+                for alias in app.get("aliases", []):
+                    self._changes.remove_alias(alias)
+
+    def delete_apps_by_exe_path(self, exe_path: str) -> int:
+        """删掉路径是 exe_path（规范化后比较）的所有记录，返回删了几条"""
+        with self._lock:
+            targets = self.find_by_exe_path(exe_path)
+            for app in targets:
+                index = next(i for i, a in enumerate(self.apps) if a is app)
+                self.delete_app(index)
+            return len(targets)
+
+    def add_scanned_apps(self, candidates) -> int:
+        """
+        扫描结果 [(显示名称, 路径), ...] 里新的路径追加成新记录，返回加了几条：
+        已存在的（按规范化路径）不动，别名也不改
+        """
+        added = 0
+        with self._lock:
+            for name, path in candidates:
+                if self.has_exe_path(path):
+                    continue
+                self.add_app(name.replace(" ", "_"), path, name)
+                added += 1
+        return added
+
+    def remove_vanished_apps(self, candidates) -> int:
+        """
+        扫描时从桌面消失的候选 [(显示名称, 路径), ...]：路径本身也已经不存在（打不开了）的记录删掉，
+        只是快捷方式被挪走、目标还在的保留。返回删了几条
+        """
+        removed = 0
+        with self._lock:
+            for _, path in candidates:
+                if not os.path.exists(path):
+                    removed += self.delete_apps_by_exe_path(path)
+        return removed
+
+    def clear_apps(self):
+        """清空所有记录（“初始化(清空)”用）"""
+        with self._lock:
+            self.apps = []
+            self.reindex()
+            self._changes.reset = True
 
     def update_app(self, index: int, base_name: str, exe_path: str):
         """更新原始名称和路径（别名列表保留）"""
-        if index < 0 or index >= len(self.apps):
-            return
-        app = self.apps[index]
-        app["exe_path"] = exe_path
-        old_base = app.get("base_name", "")
-        app["base_name"] = base_name
-        aliases = app.get("aliases", [])
-        # 把老的 base_name 替换成新的
-        if old_base in aliases:
-            aliases[aliases.index(old_base)] = base_name
-        elif base_name and base_name not in aliases:
-            aliases.insert(0, base_name)
-        app["aliases"] = aliases
+        with self._lock:
+            if index < 0 or index >= len(self.apps):
+                return
+            app = self.apps[index]
+            old_base = app.get("base_name", "")
+            if app.get("exe_path") == exe_path and old_base == base_name:
+                return  # 没有变化
+            self._unindex_app(app)
+            app["exe_path"] = exe_path
+            app["base_name"] = base_name
+            aliases = app.get("aliases", [])
+            # 把老的 base_name 替换成新的
+            if old_base in aliases:
+                aliases[aliases.index(old_base)] = base_name
+                if old_base != base_name:
+                    self._changes.remove_alias(old_base)
+                    self._changes.add_alias(base_name)
+            elif base_name and base_name not in aliases:
+                aliases.insert(0, base_name)
+                self._changes.add_alias(base_name)
+            app["aliases"] = aliases
+            self._index_app(app)
+            self._touch()
+            self._changes.updated_apps.append(app.get("id"))
 
     def add_alias(self, index: int, alias: str):
         """给某个 app 添加一个自定义别名"""
-        if index < 0 or index >= len(self.apps):
-            return
-        alias = alias.strip()
-        if not alias:
-            return
-        app = self.apps[index]
-        aliases = app.get("aliases", [])
-        if alias not in aliases:
+        with self._lock:
+            if index < 0 or index >= len(self.apps):
+                return
+            alias = alias.strip()
+            if not alias:
+                return
+            app = self.apps[index]
+            aliases = app.get("aliases", [])
+            if alias in aliases:
+                return
             aliases.append(alias)
             app["aliases"] = aliases
+            _multi_add(self._by_alias, normalize_alias(alias), app)
+            if len(aliases) == 1 and self._search_text:
+                self._search_text[id(app)] = _search_key(app)
+            self._touch()
+            self._changes.add_alias(alias)
 
     def remove_alias(self, index: int, alias: str):
         """从某个 app 的别名列表里删除一个别名（base_name 不允许删）"""
-        if index < 0 or index >= len(self.apps):
-            return
-        app = self.apps[index]
-        base_name = app.get("base_name", "")
-        if alias == base_name:
-            # 原始名称不允许删除
-            return
-        aliases = app.get("aliases", [])
-        if alias in aliases:
-            aliases.remove(alias)
-            app["aliases"] = aliases
+        with self._lock:
+            if index < 0 or index >= len(self.apps):
+                return
+            app = self.apps[index]
+            base_name = app.get("base_name", "")
+            if alias == base_name:
+                # 原始名称不允许删除
+                return
+            aliases = app.get("aliases", [])
+            if alias in aliases:
+                self._unindex_app(app)
+                aliases.remove(alias)
+                app["aliases"] = aliases
+                self._index_app(app)
+                self._touch()
+                self._changes.remove_alias(alias)
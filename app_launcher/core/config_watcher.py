@@ -0,0 +1,71 @@
+# app_launcher/core/config_watcher.py
+# -*- coding: utf-8 -*-
+
+"""
+监视 apps_config.json 的外部修改（比如部署脚本直接改文件），不用重启（重启要重新加载模型）。
+
+用一个后台线程定期 stat 文件：
+- (mtime, size) 变了之后，等它 debounce 秒内不再变化（脚本可能分几次写完）再回调
+- 回调里一般调用 store.reload_from_disk()，它会忽略程序自己 save() 写出的文件
+只用标准库，GUI 和 headless 守护进程都能用。
+"""
+
+import os
+import threading
+from typing import Callable, Optional, Tuple
+
+
+class ConfigFileWatcher:
+    def __init__(self, path: str, on_change: Callable[[], None],
+                 interval: float = 1.0, debounce: float = 0.5):
+        """
+        :param path:      要监视的文件
+        :param on_change: 文件稳定下来后调用（在监视线程里）
+        :param interval:  多久 stat 一次（秒）
+        :param debounce:  变化后需要保持不变多久才算写完（秒）
+        """
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.interval = interval
+        self.debounce = debounce
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last = self._signature()
+
+    def _signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="ConfigFileWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            sig = self._signature()
+            if sig == self._last:
+                continue
+            # 等文件稳定：debounce 秒内没有再变
+            while not self._stop_event.wait(self.debounce):
+                newer = self._signature()
+                if newer == sig:
+                    break
+                sig = newer
+            if self._stop_event.is_set():
+                return
+            self._last = sig
+            if sig is None:
+                continue  # 文件被删了（或者正在被替换），等它重新出现
+            try:
+                self.on_change()
+            except Exception as e:
+                print("config reload failed:", e)
@@ -1,17 +1,51 @@
 # app_launcher/core/desktop_scanner.py
 # -*- coding: utf-8 -*-
 
+import itertools
+import json
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple
+
+from app_launcher.core.ignore_rules import DEFAULT_SCAN_EXCLUDES, IgnoreRules
+from app_launcher.core.lnk_parser import default_lnk_cache
 
 try:
-    import win32com.client  # 用来解析 .lnk 快捷方式
+    import win32com.client  # lnk_parser 解析不了的 .lnk 再用它
 except ImportError:
     win32com = None
 
+# 目录快照（增量扫描用）：放在 config 目录下
+SNAPSHOT_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "config", "desktop_snapshot.json"
+)
+SNAPSHOT_FORMAT = 1
+
+# mtime 离扫描时刻太近的目录下次一定重新列：有的文件系统（FAT / 部分网络盘）mtime 精度只有 1~2 秒，
+# 同一秒里再改一次 mtime 可能不变
+_MTIME_SLACK_NS = 2 * 1_000_000_000
+
+# 同一个快照文件同时只有一个线程在写（对话框的扫描和桌面监视触发的扫描可能同时结束）
+_snapshot_locks: Dict[str, threading.Lock] = {}
+_snapshot_locks_guard = threading.Lock()
+
+
+def _snapshot_lock(path: str) -> threading.Lock:
+    with _snapshot_locks_guard:
+        lock = _snapshot_locks.get(path)
+        if lock is None:
+            lock = _snapshot_locks[path] = threading.Lock()
+        return lock
+
+# 并发列目录的线程数：主要在等磁盘 / 网络 IO，比 CPU 核数多一些也没关系
+SCAN_WORKERS = min(16, (os.cpu_count() or 1) + 4)
 
-def _get_possible_desktop_dirs() -> List[Path]:
+
+def get_possible_desktop_dirs() -> List[Path]:
     """
     返回可能的“桌面”目录列表：
     - 当前用户 Desktop / 桌面
@@ -54,29 +88,309 @@ def _get_possible_desktop_dirs() -> List[Path]:
     return unique_dirs
 
 
-def _resolve_lnk(path: Path) -> Path:
+_com_shell = threading.local()  # 每个线程一个 WScript.Shell（COM 对象不能跨线程用）
+
+
+def _resolve_lnk_com(path: str) -> Optional[str]:
+    """pywin32 兜底：只给纯 Python 解析不了的快捷方式用（比如只有 IDList 的）"""
+    if win32com is None:
+        return None
+    try:
+        shell = getattr(_com_shell, "shell", None)
+        if shell is None:
+            shell = _com_shell.shell = win32com.client.Dispatch("WScript.Shell")
+        return shell.CreateShortCut(path).Targetpath or None
+    except Exception:
+        return None
+
+
+def _release_com_shell():
+    """线程结束前（CoUninitialize 之前）释放本线程的 WScript.Shell"""
+    _com_shell.shell = None
+
+
+def _resolve_lnk(path: str) -> Optional[str]:
     """
-    如果是 .lnk，尝试解析真实目标路径。
-    - 成功：返回目标（可能是 exe、文件夹、别的文件）
-    - 失败：返回原 .lnk 本身
+    .lnk 的目标路径（可能是 exe、文件夹、别的文件）：
+    - 先用 lnk_parser 直接读文件（按 mtime + 大小缓存），不需要 COM
+    - 解析不了再交给 WScript.Shell
+    - 都不行返回 None
     """
-    if win32com is None:
-        return path
+    return default_lnk_cache.resolve(path) or _resolve_lnk_com(path)
+
+
+class _DirEntryInfo(NamedTuple):
+    """scandir 得到的一项（只用 DirEntry 自带的数据，不额外 resolve）"""
+    name: str
+    path: str
+    is_dir: bool
+    is_symlink: bool
+    key: Hashable  # 去重用的文件身份，见 _entry_key
+
+
+class _DirListing(NamedTuple):
+    dirs: List[_DirEntryInfo]
+    files: List[_DirEntryInfo]
+    mtime_ns: int = 0  # 列目录时目录本身的 mtime；0 表示下次必须重新列
 
+
+def _norm_key(path: str) -> str:
+    return os.path.normcase(os.path.normpath(path))
+
+
+def _entry_key(entry: os.DirEntry, dev: int) -> Hashable:
+    """
+    文件身份：POSIX 上用 (设备号, inode)，scandir 已经带了 inode，同一目录的文件和目录本身在同一个设备上，
+    不需要再 stat；Windows 上 DirEntry.inode() 要额外一次系统调用，就退回规范化后的路径。
+    符号链接用目标的身份（和原来 resolve 之后去重一致）。
+    """
+    if os.name != "nt":
+        try:
+            if entry.is_symlink():
+                st = entry.stat()
+                return st.st_dev, st.st_ino
+            ino = entry.inode()
+            if ino:
+                return dev, ino
+        except OSError:
+            pass
+    elif entry.is_symlink():
+        return _norm_key(os.path.realpath(entry.path))
+    return _norm_key(entry.path)
+
+
+def _path_key(path: str) -> Hashable:
+    """任意路径（.lnk 的目标）的文件身份，和 _entry_key 得到的一致"""
+    if os.name != "nt":
+        try:
+            st = os.stat(path)
+            return st.st_dev, st.st_ino
+        except OSError:
+            pass
+    return _norm_key(os.path.realpath(path))
+
+
+def _scan_dir(path: str, previous: _DirListing = None) -> _DirListing:
+    """
+    列出一个目录（不递归）；没有权限 / 已经不存在就当空目录，和 os.walk 一样忽略错误。
+    给了上次的结果并且目录 mtime 没变（目录里没有增删改名），直接复用，只花一次 stat。
+    """
+    dirs: List[_DirEntryInfo] = []
+    files: List[_DirEntryInfo] = []
+    mtime_ns = 0
     try:
-        shell = win32com.client.Dispatch("WScript.Shell")
-        shortcut = shell.CreateShortCut(str(path))
-        target = shortcut.Targetpath
-        if target:
-            target_path = Path(target)
-            if target_path.exists():
-                return target_path
-    except Exception:
+        st = os.stat(path)
+        if previous is not None and previous.mtime_ns and previous.mtime_ns == st.st_mtime_ns:
+            return previous
+        if time.time_ns() - st.st_mtime_ns > _MTIME_SLACK_NS:
+            mtime_ns = st.st_mtime_ns
+        dev = st.st_dev
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                    is_symlink = entry.is_symlink()
+                except OSError:
+                    is_dir, is_symlink = False, False
+                info = _DirEntryInfo(entry.name, entry.path, is_dir, is_symlink, _entry_key(entry, dev))
+                (dirs if is_dir else files).append(info)
+    except OSError:
         pass
-    return path
+    dirs.sort(key=lambda e: e.name)
+    files.sort(key=lambda e: e.name)
+    return _DirListing(dirs, files, mtime_ns)
+
+
+class ScanOptions(NamedTuple):
+    """扫描范围限制（None 表示不限）"""
+    max_depth: Optional[int] = None    # 往下进几层文件夹：0 只看桌面本身，1 再看桌面上文件夹里面的 ...
+    max_entries: Optional[int] = None  # 最多检查多少项（文件 + 文件夹），到了就停
+    timeout: Optional[float] = None    # 最多扫多少秒，到了就停
+    excludes: Tuple[str, ...] = tuple(DEFAULT_SCAN_EXCLUDES)  # gitignore 风格，见 ignore_rules
+
+    @classmethod
+    def from_settings(cls, settings) -> "ScanOptions":
+        """从 AppSettings 读 scan_* 设置（0 / null 表示不限）"""
+        max_depth = settings.get("scan_max_depth")
+        return cls(
+            max_depth=None if max_depth is None or max_depth < 0 else int(max_depth),
+            max_entries=int(settings.get("scan_max_entries") or 0) or None,
+            timeout=float(settings.get("scan_timeout_seconds") or 0) or None,
+            excludes=tuple(settings.get("scan_excludes") or ()),
+        )
 
 
-def scan_desktop_executables() -> List[Tuple[str, str]]:
+class DesktopScan:
+    """
+    一次流式扫描：for name, path in DesktopScan(...) 边扫边输出 (显示名称, 真实路径)。
+
+    - 目录在线程池里并发列出：每个目录是一个任务，列完马上把子目录提交进去，
+      所以不同桌面根目录、同一棵树下的不同子目录都会同时列（OneDrive / 网络盘上主要耗时在等 IO）；
+      输出顺序是目录列完的顺序
+    - 同一个文件（硬链接 / 符号链接 / 多个桌面目录）只输出一次，见 _entry_key
+    - 不进入符号链接目录（和 os.walk 默认一样）
+    - ScanOptions：深度限制、条目预算、超时、排除规则（被排除的目录整个不进去）
+    - cancel() 可以在别的线程里调用；for 循环里 break 也会停止扫描
+    - candidate_fn 决定目录里的一项算不算候选、显示成什么（默认 _entry_candidate：所有文件和文件夹），
+      开始菜单 / XDG 等来源见 app_sources
+
+    给了 snapshot（增量扫描）：
+    - mtime 没变的目录直接用快照里的内容，不再 scandir（仍然往下检查子目录，子目录里的变化不改变父目录 mtime）
+    - 只输出上次扫描没有的候选
+    - 完整扫完才更新并保存快照；中途停止的不保存，消失的候选也无从判断
+
+    扫完（或停止）后可以读：
+    - candidates    这次找到的所有候选（包括没输出的旧候选）
+    - stop_reason   "" 表示扫完；否则是 "max_entries" / "timeout" / "cancelled"
+    - entries_seen / rescanned_dirs / total_dirs
+    - delta()       和快照比较的结果
+    """
+
+    # 等待目录列完时多久检查一次取消 / 超时（秒）
+    _POLL_INTERVAL = 0.1
+
+    def __init__(self, desktop_dirs: List[Path] = None, options: ScanOptions = None,
+                 snapshot: "ScanSnapshot" = None, max_workers: int = None,
+                 candidate_fn: Callable[["_DirEntryInfo"], Optional[Tuple[str, str, Hashable]]] = None):
+        if desktop_dirs is None:
+            desktop_dirs = get_possible_desktop_dirs()
+        self.roots = [str(d) for d in desktop_dirs]
+        self.options = options or ScanOptions()
+        self.snapshot = snapshot
+        self.max_workers = max_workers or SCAN_WORKERS
+        self.candidate_fn = candidate_fn or _entry_candidate
+
+        self.candidates: List[Tuple[str, str]] = []
+        self.added: List[Tuple[str, str]] = []
+        self.removed: List[Tuple[str, str]] = []
+        self.listings: Dict[str, _DirListing] = {}
+        self.stop_reason = ""
+        self.entries_seen = 0
+        self.rescanned_dirs = 0
+        self._finished = False
+        self._cancel_event = threading.Event()
+
+    @property
+    def total_dirs(self) -> int:
+        return len(self.listings)
+
+    @property
+    def truncated(self) -> bool:
+        return bool(self.stop_reason)
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        opts = self.options
+        rules = IgnoreRules(opts.excludes)
+        previous = self.snapshot.dirs if self.snapshot is not None else {}
+        known = {path for _, path in self.snapshot.candidates} if self.snapshot is not None else None
+        deadline = time.monotonic() + opts.timeout if opts.timeout else None
+        seen_keys = set()  # 文件身份，见 _entry_key / _path_key
+
+        # 完成的任务放进队列（子目录可能有几万个，不用 wait() 每次扫一遍所有未完成的 future）
+        done_queue: "queue.SimpleQueue[Tuple[str, Future]]" = queue.SimpleQueue()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="desktop-scan")
+        where: Dict[str, Tuple[str, int]] = {}  # 已提交的目录 -> (相对根目录的路径, 深度)
+
+        def submit(path: str, rel: str, depth: int):
+            where[path] = (rel, depth)
+            pool.submit(_scan_dir, path, previous.get(path)).add_done_callback(
+                lambda f: done_queue.put((path, f)))
+
+        try:
+            for root in self.roots:
+                submit(root, "", 0)
+            while where and not self.stop_reason:
+                if self._cancel_event.is_set():
+                    self.stop_reason = "cancelled"
+                    break
+                wait = self._POLL_INTERVAL
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        self.stop_reason = "timeout"
+                        break
+                try:
+                    path, future = done_queue.get(timeout=wait)
+                except queue.Empty:
+                    continue
+
+                listing = future.result()
+                rel, depth = where.pop(path)
+                self.listings[path] = listing
+                if previous.get(path) is not listing:
+                    self.rescanned_dirs += 1
+
+                # 先处理文件夹本身（可以打开），再处理文件（包括 .lnk）
+                for entry in itertools.chain(listing.dirs, listing.files):
+                    if opts.max_entries is not None and self.entries_seen >= opts.max_entries:
+                        self.stop_reason = "max_entries"
+                        break
+                    self.entries_seen += 1
+
+                    entry_rel = f"{rel}/{entry.name}" if rel else entry.name
+                    if rules and rules.is_ignored(entry_rel, entry.is_dir):
+                        continue
+                    if entry.is_dir and not entry.is_symlink and \
+                            (opts.max_depth is None or depth < opts.max_depth):
+                        submit(entry.path, entry_rel, depth + 1)
+
+                    candidate = self.candidate_fn(entry)
+                    if candidate is None or candidate[2] in seen_keys:
+                        continue
+                    seen_keys.add(candidate[2])
+                    item = candidate[:2]
+                    self.candidates.append(item)
+                    if known is None:
+                        yield item
+                    elif item[1] not in known:
+                        self.added.append(item)
+                        yield item
+            self._finished = not self.stop_reason
+        finally:
+            if not self._finished and not self.stop_reason:
+                self.stop_reason = "cancelled"  # 调用方提前结束了 for 循环
+            pool.shutdown(wait=False, cancel_futures=True)
+            if self._finished and self.snapshot is not None:
+                self._update_snapshot()
+
+    def _update_snapshot(self):
+        snapshot = self.snapshot
+        after = {path for _, path in self.candidates}
+        self.removed = [c for c in snapshot.candidates if c[1] not in after]
+        changed = self.rescanned_dirs or self.added or self.removed or len(self.listings) != len(snapshot.dirs)
+        snapshot.dirs = self.listings  # 已经不存在 / 被排除的目录也就不在快照里了
+        snapshot.candidates = list(self.candidates)
+        if changed:
+            snapshot.save()
+
+    def delta(self) -> "ScanDelta":
+        """扫描结束后调用；没扫完时 removed 为空（没检查到的目录不能当成被删了）"""
+        added = self.added if self.snapshot is not None else list(self.candidates)
+        return ScanDelta(added, self.removed, list(self.candidates), self.rescanned_dirs, self.total_dirs)
+
+
+def _entry_candidate(entry: _DirEntryInfo) -> Optional[Tuple[str, str, Hashable]]:
+    """一项目录内容 -> (显示名称, 真实路径, 文件身份)；.lnk 目标不存在时返回 None"""
+    if not entry.is_dir and entry.name.lower().endswith(".lnk"):
+        # 如果是 .lnk，尽量解析真实目标；目标不存在（失效的快捷方式）就直接跳过，
+        # 解析不了的保留 .lnk 本身，交给系统去打开
+        target = _resolve_lnk(entry.path)
+        if target is None:
+            return entry.name, entry.path, entry.key
+        target_str = os.path.abspath(target)
+        if os.path.exists(target_str):
+            return entry.name, target_str, _path_key(target_str)
+        return None
+    # 文件夹名 / 文件名（含扩展名）完整保留
+    path = os.path.realpath(entry.path) if entry.is_symlink else entry.path
+    return entry.name, path, entry.key
+
+
+def scan_desktop_executables(desktop_dirs: List[Path] = None, max_workers: int = None,
+                             options: ScanOptions = None) -> List[Tuple[str, str]]:
     """
     扫描所有可能的“桌面”目录，返回【能打开的路径】列表。
 
@@ -89,51 +403,122 @@ def scan_desktop_executables() -> List[Tuple[str, str]]:
         * 任意文件
         * .lnk 快捷方式（尽量解析成真实目标）
     - 使用 os.startfile(path) 即可打开
+    - 想边扫边处理 / 提前停止用 DesktopScan
     """
-    candidates: List[Tuple[str, str]] = []
-    seen_paths = set()
+    return list(DesktopScan(desktop_dirs, options, max_workers=max_workers))
 
-    desktop_dirs = _get_possible_desktop_dirs()
-    if not desktop_dirs:
-        return candidates
 
-    for desktop in desktop_dirs:
-        # 遍历桌面以及子目录的所有内容
-        for root, dirs, files in os.walk(desktop):
-            root_path = Path(root)
+# ---------------- 增量扫描 ----------------
 
-            # 1) 先处理文件夹本身（可以打开）
-            for dname in dirs:
-                dpath = root_path / dname
-                real_path = dpath.resolve()
-                real_path_str = str(real_path)
-                if real_path_str in seen_paths:
-                    continue
-                seen_paths.add(real_path_str)
+class ScanDelta(NamedTuple):
+    """一次增量扫描的结果（都是 (显示名称, 真实路径)）"""
+    added: List[Tuple[str, str]]       # 上次没有、这次有
+    removed: List[Tuple[str, str]]     # 上次有、这次没有
+    candidates: List[Tuple[str, str]]  # 这次的完整列表
+    rescanned_dirs: int                # 重新列过的目录数（其余直接用快照）
+    total_dirs: int
 
-                display_name = dpath.name  # 文件夹名，完整保留
-                candidates.append((display_name, real_path_str))
 
-            # 2) 再处理文件（包括 .lnk）
-            for fname in files:
-                fpath = root_path / fname
-                lower = fname.lower()
+def _key_to_json(key: Hashable):
+    return list(key) if isinstance(key, tuple) else key
 
-                # 如果是 .lnk，尽量解析真实目标
-                if lower.endswith(".lnk"):
-                    real_path = _resolve_lnk(fpath).resolve()
-                    if not real_path.exists():
-                        # 目标不存在就直接跳过
-                        continue
-                else:
-                    real_path = fpath.resolve()
 
-                real_path_str = str(real_path)
-                if real_path_str in seen_paths:
-                    continue
-                seen_paths.add(real_path_str)
+def _key_from_json(value) -> Hashable:
+    return tuple(value) if isinstance(value, list) else value
+
+
+def _entries_from_json(dir_path: str, rows: List, is_dir: bool) -> List[_DirEntryInfo]:
+    prefix = os.path.join(dir_path, "")  # 和 DirEntry.path 一样：目录 + 分隔符 + 名称
+    return [_DirEntryInfo(name, prefix + name, is_dir, bool(link), _key_from_json(key))
+            for name, link, key in rows]
+
+
+class ScanSnapshot:
+    """
+    上一次扫描的目录快照：每个目录的 mtime + 目录内容，以及上次的候选列表。
+    保存在 config/desktop_snapshot.json，下次打开程序也能增量扫描。
+
+    文件格式：
+    {
+      "format": 1,
+      "candidates": [["微信.lnk", "C:/.../WeChat.exe"], ...],
+      "dirs": {
+        "C:/Users/xx/Desktop": {"mtime_ns": ..., "dirs": [[名称, 是否符号链接, 身份], ...], "files": [...]},
+        ...
+      }
+    }
+    """
+
+    def __init__(self, path: str = None):
+        self.path = os.path.abspath(path or SNAPSHOT_PATH)
+        self.dirs: Dict[str, _DirListing] = {}
+        self.candidates: List[Tuple[str, str]] = []
+        self.load()
+
+    def load(self):
+        """读取快照；文件不存在 / 损坏 / 格式不对就当没有快照（下次全量扫描）"""
+        self.dirs, self.candidates = {}, []
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("format") != SNAPSHOT_FORMAT:
+                return
+            dirs = {}
+            for dir_path, item in data.get("dirs", {}).items():
+                dirs[dir_path] = _DirListing(_entries_from_json(dir_path, item["dirs"], True),
+                                             _entries_from_json(dir_path, item["files"], False),
+                                             int(item.get("mtime_ns", 0)))
+            self.dirs = dirs
+            self.candidates = [(name, path) for name, path in data.get("candidates", [])]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print("desktop snapshot ignored:", e)
+            self.dirs, self.candidates = {}, []
 
-                display_name = fpath.name  # 文件名，含扩展名
-                candidates.append((display_name, real_path_str))
+    def save(self):
+        """
+        先写临时文件再替换。临时文件名带进程号 / 线程号，同一路径的写入按锁排队：
+        两次扫描同时保存、或者 GUI 和守护进程同时保存，都不会写坏同一个临时文件
+        """
+        data = {
+            "format": SNAPSHOT_FORMAT,
+            "candidates": [list(c) for c in self.candidates],
+            "dirs": {
+                dir_path: {
+                    "mtime_ns": listing.mtime_ns,
+                    "dirs": [[e.name, e.is_symlink, _key_to_json(e.key)] for e in listing.dirs],
+                    "files": [[e.name, e.is_symlink, _key_to_json(e.key)] for e in listing.files],
+                }
+                for dir_path, listing in self.dirs.items()
+            },
+        }
+        # dumps 一次编码完（C 实现），比 json.dump 逐块写快好几倍
+        text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        path = os.path.abspath(self.path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with _snapshot_lock(path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
 
-    return candidates
+    def clear(self):
+        """丢掉快照（比如应用列表被清空后，下次扫描应该把所有东西都当成新增）"""
+        self.dirs, self.candidates = {}, []
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def scan_desktop_incremental(snapshot: ScanSnapshot = None, desktop_dirs: List[Path] = None,
+                             max_workers: int = None, options: ScanOptions = None) -> ScanDelta:
+    """
+    增量扫描桌面（一次扫完，不需要边扫边处理时用）：
+    - 每个目录先 stat，mtime 和快照里一样就直接用快照里的内容，不再 scandir
+    - 和上次的候选列表比较，返回新增 / 消失的候选（按路径比较，同一个文件每次扫出来的路径字符串相同）
+    - 扫完更新并保存快照；第一次扫描（没有快照）时所有候选都算新增
+    """
+    scan = DesktopScan(desktop_dirs, options, snapshot or ScanSnapshot(), max_workers)
+    for _ in scan:
+        pass
+    return scan.delta()
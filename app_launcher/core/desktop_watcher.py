@@ -0,0 +1,249 @@
+# app_launcher/core/desktop_watcher.py
+# -*- coding: utf-8 -*-
+
+"""
+监视桌面目录，有新建 / 删除 / 改名时通知（用户装了软件、往桌面拖了快捷方式，不用再手动点“扫描桌面”）。
+
+- Linux：inotify（ctypes 直接调 libc，不需要第三方库），子目录按 max_depth 递归加监视
+- 其它系统：定时 stat 目录的 mtime（目录里增删改名都会改变它）
+- 事件不逐个回调：攒到安静 debounce 秒（或最多 max_delay 秒）后，把发生变化的目录集合一次交给回调，
+  回调里一般跑一次增量扫描（DesktopScan + ScanSnapshot，只重新列这些 mtime 变了的目录）
+
+回调在监视线程里执行；GUI 里要用信号转回 GUI 线程。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from app_launcher.core.ignore_rules import DEFAULT_SCAN_EXCLUDES, IgnoreRules
+
+# inotify 事件掩码（<sys/inotify.h>）
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_ISDIR = 0x40000000
+
+_WATCH_MASK = (_IN_CREATE | _IN_DELETE | _IN_MOVED_FROM | _IN_MOVED_TO
+               | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+def _iter_watch_dirs(root: str, max_depth: Optional[int], rules: IgnoreRules,
+                     rel: str = "", depth: int = 0) -> Iterable[str]:
+    """root 以及 max_depth 层以内、没被排除的子目录（不进符号链接）"""
+    yield root
+    if max_depth is not None and depth >= max_depth:
+        return
+    try:
+        with os.scandir(root) as it:
+            entries = [e for e in it if e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return
+    for entry in entries:
+        entry_rel = f"{rel}/{entry.name}" if rel else entry.name
+        if rules and rules.is_ignored(entry_rel, True):
+            continue
+        yield from _iter_watch_dirs(entry.path, max_depth, rules, entry_rel, depth + 1)
+
+
+class _InotifyBackend:
+    """Linux inotify：每个目录一个 watch，新建的子目录自动加上"""
+
+    def __init__(self, roots: List[str], max_depth: Optional[int], rules: IgnoreRules):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.roots = roots
+        self.max_depth = max_depth
+        self.rules = rules
+        self._dirs: Dict[int, str] = {}  # wd -> 目录
+        self._where: Dict[str, tuple] = {}  # 目录 -> (根目录, 相对路径, 深度)
+        for root in roots:
+            self._watch_tree(root, root, "", 0)
+
+    def _watch_tree(self, root: str, path: str, rel: str, depth: int):
+        remaining = None if self.max_depth is None else self.max_depth - depth
+        for dir_path in _iter_watch_dirs(path, remaining, self.rules, rel):
+            sub_rel = os.path.relpath(dir_path, root).replace(os.sep, "/")
+            sub_rel = "" if sub_rel == "." else sub_rel
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dir_path), _WATCH_MASK)
+            if wd < 0:
+                continue  # 没权限 / 已经删了 / 超过 max_user_watches
+            self._dirs[wd] = dir_path
+            self._where[dir_path] = (root, sub_rel, sub_rel.count("/") + 1 if sub_rel else 0)
+
+    def read(self, timeout: float) -> Set[str]:
+        """等最多 timeout 秒，返回发生变化的目录"""
+        changed: Set[str] = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].split(b"\0", 1)[0]
+            offset += _EVENT_HEADER.size + length
+
+            if mask & _IN_Q_OVERFLOW:
+                changed.update(self.roots)  # 丢了事件：整个重新检查
+                continue
+            dir_path = self._dirs.get(wd)
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                if dir_path:
+                    self._where.pop(dir_path, None)
+                continue
+            if dir_path is None:
+                continue
+            changed.add(dir_path)
+            if mask & _IN_ISDIR and mask & (_IN_CREATE | _IN_MOVED_TO) and name:
+                # 新出现的子目录也要监视（里面可能已经有东西了，调用方会扫描它）
+                root, rel, depth = self._where[dir_path]
+                child = os.path.join(dir_path, os.fsdecode(name))
+                child_rel = f"{rel}/{os.fsdecode(name)}" if rel else os.fsdecode(name)
+                if (self.max_depth is None or depth < self.max_depth) and \
+                        not (self.rules and self.rules.is_ignored(child_rel, True)):
+                    self._watch_tree(root, child, child_rel, depth + 1)
+        return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class _PollingBackend:
+    """没有 inotify 时：每 interval 秒重新 stat 一遍要监视的目录"""
+
+    def __init__(self, roots: List[str], max_depth: Optional[int], rules: IgnoreRules,
+                 interval: float = 2.0):
+        self.roots = roots
+        self.max_depth = max_depth
+        self.rules = rules
+        self.interval = interval
+        self._mtimes = self._snapshot()
+        self._next_poll = time.monotonic() + interval
+
+    def _snapshot(self) -> Dict[str, int]:
+        mtimes = {}
+        for root in self.roots:
+            for dir_path in _iter_watch_dirs(root, self.max_depth, self.rules):
+                try:
+                    mtimes[dir_path] = os.stat(dir_path).st_mtime_ns
+                except OSError:
+                    pass
+        return mtimes
+
+    def read(self, timeout: float) -> Set[str]:
+        wait = self._next_poll - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return set()
+        if wait > 0:
+            time.sleep(wait)
+        self._next_poll = time.monotonic() + self.interval
+        current = self._snapshot()
+        changed = {d for d, m in current.items() if self._mtimes.get(d) != m}
+        # 消失的目录：它的父目录 mtime 也会变，这里把它本身也报上去
+        changed.update(d for d in self._mtimes if d not in current)
+        self._mtimes = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def _inotify_available() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return hasattr(libc, "inotify_init1")
+    except OSError:
+        return False
+
+
+class DesktopWatcher:
+    def __init__(self, roots: Iterable[str], on_change: Callable[[Set[str]], None],
+                 max_depth: Optional[int] = 4, excludes: Iterable[str] = DEFAULT_SCAN_EXCLUDES,
+                 debounce: float = 1.0, max_delay: float = 10.0, poll_interval: float = 2.0):
+        """
+        :param roots:         要监视的根目录（一般是 desktop_scanner.get_possible_desktop_dirs()）
+        :param on_change:     on_change(发生变化的目录集合)，在监视线程里调用
+        :param max_depth:     往下监视几层子目录（和 ScanOptions.max_depth 一致，None 不限）
+        :param excludes:      gitignore 风格的排除规则，被排除的目录不监视
+        :param debounce:      最后一个事件之后安静多久才回调（秒）
+        :param max_delay:     事件一直不断时，最多攒多久也要回调一次（秒）
+        :param poll_interval: 轮询模式下多久检查一次（秒）
+        """
+        self.roots = [os.path.abspath(str(r)) for r in roots]
+        self.on_change = on_change
+        self.max_depth = max_depth
+        self.rules = IgnoreRules(excludes)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.backend_name = ""
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="DesktopWatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _make_backend(self):
+        if _inotify_available():
+            try:
+                backend = _InotifyBackend(self.roots, self.max_depth, self.rules)
+                self.backend_name = "inotify"
+                return backend
+            except OSError as e:
+                print("inotify unavailable, falling back to polling:", e)
+        self.backend_name = "polling"
+        return _PollingBackend(self.roots, self.max_depth, self.rules, self.poll_interval)
+
+    def _run(self):
+        backend = self._make_backend()
+        pending: Set[str] = set()
+        first_event = last_event = 0.0
+        try:
+            while not self._stop_event.is_set():
+                changed = backend.read(0.5)
+                now = time.monotonic()
+                if changed:
+                    if not pending:
+                        first_event = now
+                    pending |= changed
+                    last_event = now
+                if pending and (now - last_event >= self.debounce or now - first_event >= self.max_delay):
+                    batch, pending = pending, set()
+                    try:
+                        self.on_change(batch)
+                    except Exception as e:
+                        print("desktop change handler failed:", e)
+        finally:
+            backend.close()
@@ -2,11 +2,20 @@
 # -*- coding: utf-8 -*-
 
 """
-把 (app_index, alias) 对应的向量缓存到一个 npz 文件里，避免每次重启都重算所有别名的嵌入。
+把 alias -> 向量缓存到一个 npz 文件里，避免每次重启都重算所有别名的嵌入。
+
+- key 只用别名文本：同一个别名不管属于哪个 app、排第几行，向量都一样，
+  删除 / 调整顺序后缓存依然有效
+- 文件里记录编码器指纹（见 sentence_encoder.encoder_fingerprint）：
+  换了模型 / 精度，旧向量整体作废
+- 旧格式（key 是 (app_index, alias)、没有指纹）读入时自动转换
+- 别名存成定长 unicode 数组，读的时候 allow_pickle=False：目录包（catalog_bundle）会在机器之间拷来拷去，
+  不能因为导入别人的文件就反序列化任意对象。只有本机旧版本写的缓存（object 数组）才用 pickle 读一次，
+  读完立即按新格式重写
 """
 
 import os  # 处理路径
-from typing import Dict, Tuple  # 类型注解（可选）
+from typing import Dict, Iterable, Optional  # 类型注解（可选）
 
 import numpy as np  # 存放 / 读写向量
 
@@ -20,54 +29,165 @@ EMB_PATH = os.path.join(
 )
 
 
+class _PickleRequired(ValueError):
+    """文件里有 object 数组，不用 pickle 读不了"""
+
+
+def _read_npz(path: str, allow_pickle: bool) -> Dict[str, np.ndarray]:
+    """把 npz 里的数组全部读出来（读完就关文件）"""
+    data = np.load(path, allow_pickle=allow_pickle)
+    if not hasattr(data, "files"):
+        raise ValueError("不是 npz 文件")
+    with data:
+        try:
+            return {name: data[name] for name in data.files}
+        except ValueError as e:
+            if not allow_pickle and "allow_pickle" in str(e):
+                raise _PickleRequired(str(e))
+            raise
+
+
+def validate_npz(path: str) -> int:
+    """
+    检查 npz 是不是合法的缓存文件（不用 pickle 能读、形状对得上），返回向量条数；不合法抛 ValueError。
+    导入目录包时，替换本机缓存之前先用它检查。
+    """
+    try:
+        data = _read_npz(path, allow_pickle=False)
+    except (OSError, EOFError, ValueError) as e:
+        raise ValueError(f"读取失败（旧版本导出的目录包请重新导出）：{e}")
+    if "aliases" not in data or "vecs" not in data:
+        raise ValueError("缺少 aliases / vecs")
+    aliases, vecs = data["aliases"], data["vecs"]
+    fingerprint = data.get("fingerprint", np.array(""))
+    if aliases.ndim != 1 or aliases.dtype.kind != "U":
+        raise ValueError("aliases 必须是一维字符串数组")
+    if vecs.ndim != 2 or vecs.dtype.kind != "f" or vecs.shape[0] != aliases.shape[0]:
+        raise ValueError(f"vecs 形状不对：{vecs.shape}，别名 {aliases.shape[0]} 个")
+    if fingerprint.ndim != 0 or fingerprint.dtype.kind != "U":
+        raise ValueError("fingerprint 必须是字符串")
+    return int(aliases.shape[0])
+
+
 class EmbeddingCache:
     """
     简单的嵌入缓存：
-    - 内存里用 dict 存 (app_index, alias) -> 向量
-    - 磁盘上用 npz 存 keys 和 vecs
+    - 内存里用 dict 存 alias -> 向量
+    - 磁盘上用 npz 存 aliases / vecs / fingerprint
     """
 
-    def __init__(self):
-        """构造函数：初始化空缓存并尝试从磁盘加载"""
-        self.cache: Dict[Tuple[int, str], np.ndarray] = {}  # 内存里的缓存字典
+    def __init__(self, fingerprint: str = "", path: str = None):
+        """
+        :param fingerprint: 当前编码器指纹；文件里的指纹不一致时丢弃旧向量。
+                            传空字符串表示不校验（导出 / 检查工具用）
+        :param path:        npz 路径，默认 config/app_embeddings.npz
+        """
+        self.path = os.path.abspath(path or EMB_PATH)
+        self.fingerprint = fingerprint
+        self.file_fingerprint = ""  # 磁盘文件里记录的指纹（旧格式为空）
+        self.cache: Dict[str, np.ndarray] = {}  # 内存里的缓存字典
         self.load()  # 从本地 npz 文件读取已有缓存
 
     def load(self):
         """从 npz 文件加载缓存到内存"""
-        if not os.path.exists(EMB_PATH):
+        self.cache = {}
+        if not os.path.exists(self.path):
             # 没有缓存文件就算了
             return
-        data = np.load(EMB_PATH, allow_pickle=True)  # 读取 npz
-        keys = data["keys"].tolist()  # 取出 keys（是一个 object 数组，里面是 (idx, alias)）
-        vecs = data["vecs"]           # 取出向量矩阵
+        try:
+            data, legacy = _read_npz(self.path, allow_pickle=False), False
+        except _PickleRequired:
+            # 旧版本写的 object 数组（本机自己的缓存文件）：用 pickle 读一次，下面转成新格式
+            try:
+                data, legacy = _read_npz(self.path, allow_pickle=True), True
+            except (OSError, ValueError, EOFError) as e:
+                print("load embedding cache failed:", e)
+                return
+        except (OSError, ValueError, EOFError) as e:
+            print("load embedding cache failed:", e)
+            return
+
+        if "fingerprint" in data:
+            self.file_fingerprint = str(data["fingerprint"])
+        if self.fingerprint and self.file_fingerprint and self.file_fingerprint != self.fingerprint:
+            # 编码器换了，旧向量没法用
+            print("embedding cache fingerprint changed, re-encode all aliases")
+            return
+
+        vecs = data["vecs"]  # 取出向量矩阵
+        if "aliases" in data:
+            aliases = [str(a) for a in data["aliases"].tolist()]
+        else:
+            # 旧格式：keys 是 (app_index, alias) 的 object 数组，只保留 alias
+            aliases = [str(k[1]) for k in data["keys"].tolist()]
         # 重新组装成 dict
-        self.cache = {tuple(k): vecs[i] for i, k in enumerate(keys)}
+        self.cache = {alias: vecs[i] for i, alias in enumerate(aliases)}
+        if legacy and self.cache:
+            print("embedding cache converted to the non-pickle format")
+            self.save()
 
     def save(self):
-        """把当前缓存写回 npz 文件"""
+        """把当前缓存写回 npz 文件（先写临时文件再替换，写一半被打断也不会坏）"""
         if not self.cache:
             # 没有任何东西，直接删文件（如果有的话）
-            if os.path.exists(EMB_PATH):
-                os.remove(EMB_PATH)
+            if os.path.exists(self.path):
+                os.remove(self.path)
             return
 
-        # keys 是 (app_index, alias) 的元组列表
-        keys = np.array(list(self.cache.keys()), dtype=object)
+        aliases = np.array(list(self.cache.keys()), dtype=str)
         # vecs 是对应的向量堆叠起来
-        vecs = np.stack(list(self.cache.values()), axis=0)
+        vecs = np.stack(list(self.cache.values()), axis=0).astype(np.float32)
 
-        os.makedirs(os.path.dirname(EMB_PATH), exist_ok=True)
-        np.savez(EMB_PATH, keys=keys, vecs=vecs)  # 保存为 npz
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # np.savez 会自动补 .npz 后缀，临时文件名也要以 .npz 结尾
+        tmp_path = self.path[:-4] + ".tmp.npz" if self.path.endswith(".npz") else self.path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            aliases=aliases,
+            vecs=vecs,
+            fingerprint=np.array(self.fingerprint or self.file_fingerprint),
+        )
+        os.replace(tmp_path, self.path)
+        self.file_fingerprint = self.fingerprint or self.file_fingerprint
 
-    def get(self, app_index: int, alias: str):
+    def get(self, alias: str) -> Optional[np.ndarray]:
         """
-        取出某个 (app_index, alias) 的向量
+        取出某个别名的向量
         :return: np.ndarray 或 None
         """
-        return self.cache.get((app_index, alias))
+        return self.cache.get(alias)
 
-    def set(self, app_index: int, alias: str, vec: np.ndarray):
-        """
-        设置 / 更新 某个 (app_index, alias) 的向量
-        """
-        self.cache[(app_index, alias)] = vec
+    def set(self, alias: str, vec: np.ndarray):
+        """设置 / 更新 某个别名的向量"""
+        self.cache[alias] = vec
+
+    def missing(self, aliases: Iterable[str]):
+        """返回还没有向量的别名（去重，保持顺序）"""
+        seen = set()
+        result = []
+        for alias in aliases:
+            if alias in self.cache or alias in seen:
+                continue
+            seen.add(alias)
+            result.append(alias)
+        return result
+
+    def prune(self, keep: Iterable[str]) -> int:
+        """只保留 keep 里的别名，返回删掉的条数"""
+        keep = set(keep)
+        stale = [alias for alias in self.cache if alias not in keep]
+        for alias in stale:
+            del self.cache[alias]
+        return len(stale)
+
+    def discard(self, aliases: Iterable[str]) -> int:
+        """删掉这些别名的向量（没有的跳过），返回删掉的条数"""
+        removed = 0
+        for alias in aliases:
+            if self.cache.pop(alias, None) is not None:
+                removed += 1
+        return removed
+
+    def clear(self):
+        """清空内存里的缓存（调用方自己决定要不要 save）"""
+        self.cache.clear()
@@ -0,0 +1,146 @@
+# app_launcher/core/ignore_rules.py
+# -*- coding: utf-8 -*-
+
+"""
+gitignore 风格的排除规则（桌面扫描用），支持的写法：
+
+    node_modules/      名字匹配的目录（任意层级），整个目录都不进去
+    *.tmp              名字匹配的文件 / 目录（任意层级）
+    /build             只匹配扫描根目录下的 build
+    docs/*.md          含 / 的模式相对于扫描根目录匹配
+    **/cache           ** 匹配任意多层目录
+    !keep.tmp          取反：前面的规则排除了，这里重新包含
+    # 注释             空行和 # 开头的行忽略
+
+和 git 一样：后面的规则优先；目录被排除后，里面的内容不会再被检查（取反也救不回来）。
+大小写按系统习惯：Windows 上不区分大小写。
+"""
+
+import os
+import re
+from typing import Iterable, List, NamedTuple, Pattern
+
+
+# 桌面扫描默认排除的内容：代码仓库 / 依赖目录动不动几万个文件，系统隐藏文件也打不开
+DEFAULT_SCAN_EXCLUDES = [
+    ".git/",
+    ".svn/",
+    ".hg/",
+    "node_modules/",
+    "__pycache__/",
+    ".venv/",
+    "venv/",
+    ".idea/",
+    ".vs/",
+    "$RECYCLE.BIN/",
+    "desktop.ini",
+    "Thumbs.db",
+    "~$*",
+    "*.tmp",
+]
+
+
+class _Rule(NamedTuple):
+    regex: Pattern
+    negate: bool
+    dir_only: bool
+    on_name: bool  # 不含 / 的模式：只和最后一段名字比较（任意层级）
+
+
+def _translate(pattern: str) -> str:
+    """把一段 glob 翻译成正则（* 不跨目录，** 跨任意层目录）"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern[i:i + 2] == "**":
+                # "**/" 匹配零层或多层目录；末尾的 "**" 匹配剩下的所有内容
+                if pattern[i:i + 3] == "**/":
+                    out.append("(?:.*/)?")
+                    i += 3
+                else:
+                    out.append(".*")
+                    i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j = pattern.find("]", i + 1)
+            if j == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append("[" + body.replace("\\", "\\\\") + "]")
+                i = j
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    def __init__(self, patterns: Iterable[str] = ()):
+        self.patterns: List[str] = []
+        self._rules: List[_Rule] = []
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        bodies = []
+        for raw in patterns:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            self.patterns.append(line)
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            on_name = "/" not in line  # 含 / 的（包括开头的 /）相对于根目录
+            line = line.lstrip("/")
+            if not line:
+                continue
+            body = _translate(line)
+            bodies.append((body, dir_only, on_name))
+            self._rules.append(_Rule(re.compile(f"^(?:{body})$", flags), negate, dir_only, on_name))
+
+        # 没有取反规则时（常见情况）顺序无关，按“比名字 / 比路径”“只匹配目录 / 都匹配”合并成最多 4 个正则，
+        # 每一项最多匹配 4 次，而不是每条规则一次
+        self._merged = None
+        if not any(rule.negate for rule in self._rules):
+            def merge(dir_only: bool, on_name: bool):
+                parts = [b for b, d, n in bodies if d == dir_only and n == on_name]
+                return re.compile("^(?:" + "|".join(parts) + ")$", flags) if parts else None
+            self._merged = (merge(False, True), merge(False, False), merge(True, True), merge(True, False))
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def is_ignored(self, rel_path: str, is_dir: bool) -> bool:
+        """
+        :param rel_path: 相对于扫描根目录的路径，用 / 分隔（比如 "tools/node_modules"）
+        :param is_dir:   是不是目录（以 / 结尾的规则只匹配目录）
+        """
+        name = rel_path.rsplit("/", 1)[-1]
+        if self._merged is not None:
+            any_name, any_path, dir_name, dir_path = self._merged
+            if any_name is not None and any_name.match(name):
+                return True
+            if any_path is not None and any_path.match(rel_path):
+                return True
+            if is_dir:
+                if dir_name is not None and dir_name.match(name):
+                    return True
+                if dir_path is not None and dir_path.match(rel_path):
+                    return True
+            return False
+
+        ignored = False
+        for rule in self._rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.negate == ignored and rule.regex.match(name if rule.on_name else rel_path):
+                ignored = not rule.negate
+        return ignored
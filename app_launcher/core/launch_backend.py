@@ -0,0 +1,156 @@
+# app_launcher/core/launch_backend.py
+# -*- coding: utf-8 -*-
+"""
+启动应用 / 文件 / 文件夹。悬浮窗、单实例命令转发、headless 服务共用这一份逻辑。
+
+- Windows：os.startfile（ShellExecute，和双击图标一样）
+- Linux：只启动应用列表里的 .desktop（不能借它运行随便下载来的 .desktop），交给 gio launch
+  （Terminal= / Path= 都按规范处理），没有 gio 时自己按 Exec 启动；ELF / #! 脚本直接运行；
+  其它（包括 NTFS / U 盘上权限全是 777 的文档）交给 xdg-open（macOS 是 open）。
+  子进程脱离本进程（新会话、标准输入输出接 /dev/null），启动器退出不会带走它
+- 启动前检查路径是否存在，但最多等 exists_timeout 秒：网络路径断开时 stat 能卡几十秒
+- 每次启动计时（从开始检查到系统接手），交给 UsageStore 记到对应应用上
+
+launch() 是同步的，会阻塞调用线程；GUI 里用 gui/launch_worker.LaunchWorker 放到后台线程。
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+# 检查路径是否存在最多等几秒
+EXISTS_TIMEOUT = 2.0
+
+
+class LaunchResult(NamedTuple):
+    ok: bool
+    error: str        # 失败时的错误说明
+    exe_path: str
+    elapsed_ms: float  # 检查 + 启动耗时（到 startfile / Popen 返回为止，不含应用自己的加载）
+
+
+def path_exists(path: str, timeout: Optional[float] = EXISTS_TIMEOUT) -> Optional[bool]:
+    """
+    os.path.exists，但最多等 timeout 秒；超时返回 None。
+    stat 卡住时没法取消，检查线程是守护线程，自己卡着不影响退出。
+    """
+    if not timeout or timeout <= 0:
+        return os.path.exists(path)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(os.path.exists(path)),
+                              name="LaunchPathCheck", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    return result[0] if result else None
+
+
+# 能直接 exec 的文件开头：ELF、#! 脚本、Mach-O
+_EXEC_MAGIC = (b"\x7fELF", b"#!", b"\xcf\xfa\xed\xfe", b"\xce\xfa\xed\xfe", b"\xca\xfe\xba\xbe")
+
+
+def _is_native_executable(path: str) -> bool:
+    """有执行权限并且真的是程序 / 脚本；只有 x 位的文档（FAT / NTFS 挂载、下载的文件常见）不算"""
+    if not (os.path.isfile(path) and os.access(path, os.X_OK)):
+        return False
+    try:
+        with open(path, "rb") as f:
+            head = f.read(4)
+    except OSError:
+        return False
+    return head.startswith(_EXEC_MAGIC)
+
+
+class LaunchBackend:
+    """打开一个已确认存在的路径；失败抛异常"""
+
+    name = ""
+
+    def open(self, path: str, trusted: bool = False):
+        """:param trusted: 路径在应用列表里（可以按 .desktop 的 Exec 直接运行）"""
+        raise NotImplementedError
+
+
+class WindowsLaunchBackend(LaunchBackend):
+    name = "startfile"
+
+    def open(self, path: str, trusted: bool = False):
+        os.startfile(path)
+
+
+class PosixLaunchBackend(LaunchBackend):
+    def __init__(self, opener: str = None):
+        """:param opener: 打开文件 / 文件夹用的命令，默认 Linux 用 xdg-open，macOS 用 open"""
+        self.name = opener or ("open" if sys.platform == "darwin" else "xdg-open")
+
+    def argv(self, path: str, trusted: bool = False) -> List[str]:
+        """路径 -> 要执行的命令行"""
+        if path.endswith(".desktop") and os.path.isfile(path):
+            # 扫描时带参数的 Exec 记成 .desktop 本身（见 app_sources.desktop_entry_target）
+            if not trusted:
+                raise OSError("不在应用列表里的 .desktop 文件不直接运行")
+            gio = shutil.which("gio")
+            if gio is not None:
+                return [gio, "launch", path]
+            from app_launcher.core.app_sources import exec_argv, parse_desktop_file
+
+            argv = exec_argv(parse_desktop_file(path).exec)
+            if argv:
+                return argv
+        if _is_native_executable(path):
+            return [path]
+        opener = shutil.which(self.name)
+        if opener is None:
+            raise OSError(f"找不到 {self.name}，无法打开文件 / 文件夹")
+        return [opener, path]
+
+    def open(self, path: str, trusted: bool = False):
+        # 不等子进程结束；Popen 对象被回收后，下次 Popen 时 subprocess 会顺带回收已退出的子进程
+        subprocess.Popen(
+            self.argv(path, trusted),
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            close_fds=True,
+            start_new_session=True,
+            cwd=os.path.expanduser("~"),
+        )
+
+
+_default_backend: Optional[LaunchBackend] = None
+
+
+def default_backend() -> LaunchBackend:
+    """当前系统的启动方式"""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = WindowsLaunchBackend() if os.name == "nt" else PosixLaunchBackend()
+    return _default_backend
+
+
+def launch(exe_path: str, backend: LaunchBackend = None,
+           exists_timeout: Optional[float] = EXISTS_TIMEOUT, trusted: bool = False) -> LaunchResult:
+    """
+    打开一个路径（程序 / 文件 / 文件夹），并计时。
+    :param trusted: 路径在应用列表里（调用方用 store.has_exe_path 判断），见 LaunchBackend.open
+    """
+    start = time.perf_counter()
+
+    def result(ok: bool, error: str = "") -> LaunchResult:
+        return LaunchResult(ok, error, exe_path or "", (time.perf_counter() - start) * 1000.0)
+
+    if not exe_path:
+        return result(False, "路径为空")
+    exists = path_exists(exe_path, exists_timeout)
+    if exists is None:
+        return result(False, f"检查路径超时（{exists_timeout:g} 秒），网络路径可能无法访问：\n{exe_path}")
+    if not exists:
+        return result(False, f"路径不存在：\n{exe_path}")
+    try:
+        (backend or default_backend()).open(exe_path, trusted)
+    except Exception as e:
+        return result(False, f"无法打开：\n{exe_path}\n\n错误信息：{e}")
+    return result(True)
@@ -0,0 +1,296 @@
+# app_launcher/core/lnk_parser.py
+# -*- coding: utf-8 -*-
+
+"""
+Windows 快捷方式（.lnk，Shell Link 二进制格式 [MS-SHLLINK]）的纯 Python 解析。
+
+以前每个 .lnk 都要创建一次 WScript.Shell COM 对象去解析，几百个快捷方式要好几秒，
+而且没装 pywin32 时根本解析不了。这里直接读文件里需要的几段：
+
+    ShellLinkHeader   76 字节，LinkFlags 决定后面有哪些段
+    LinkTargetIDList  跳过（只读长度）
+    LinkInfo          本地路径（LocalBasePath + CommonPathSuffix）或网络路径（\\\\server\\share + 后缀）
+    StringData        相对路径（RELATIVE_PATH，相对 .lnk 所在目录）
+    ExtraData         EnvironmentVariableDataBlock：带 %环境变量% 的目标路径
+
+只用标准库，在 Linux 上也能跑（测试 / 在别的机器上整理目录时用）。
+解析结果按 (mtime, 文件大小) 缓存，快捷方式没改过就不再读文件。
+"""
+
+import os
+import re
+import struct
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# 只读文件开头这么多字节：正常的 .lnk 只有几百字节到几 KB，超过的部分（很大的 ExtraData）用不到
+MAX_LNK_BYTES = 64 * 1024
+
+_HEADER_SIZE = 0x4C
+_LINK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+# LinkFlags
+_HAS_ID_LIST = 0x00000001
+_HAS_LINK_INFO = 0x00000002
+_HAS_NAME = 0x00000004
+_HAS_RELATIVE_PATH = 0x00000008
+_HAS_WORKING_DIR = 0x00000010
+_HAS_ARGUMENTS = 0x00000020
+_HAS_ICON_LOCATION = 0x00000040
+_IS_UNICODE = 0x00000080
+_FORCE_NO_LINK_INFO = 0x00000100
+_HAS_EXP_STRING = 0x00000200
+
+# LinkInfoFlags
+_VOLUME_ID_AND_LOCAL_BASE_PATH = 0x1
+_COMMON_NETWORK_RELATIVE_LINK = 0x2
+
+_ENV_BLOCK_SIGNATURE = 0xA0000001
+
+# 非 Unicode 字符串用系统 ANSI 代码页；在 Linux 上解析中文系统生成的 .lnk 时按 GBK 试
+_ANSI_ENCODINGS = ("mbcs", "gbk", "cp1252") if os.name == "nt" else ("gbk", "cp1252")
+
+
+class LnkError(ValueError):
+    """不是合法的 .lnk 文件"""
+
+
+class LnkInfo(NamedTuple):
+    local_path: str      # LinkInfo 里的本地路径（可能为空）
+    network_path: str    # LinkInfo 里的网络路径（可能为空）
+    relative_path: str   # 相对 .lnk 所在目录的路径（可能为空）
+    env_target: str      # 带环境变量的目标（未展开，可能为空）
+    working_dir: str
+    arguments: str
+
+
+def _decode_ansi(raw: bytes) -> str:
+    for encoding in _ANSI_ENCODINGS:
+        try:
+            return raw.decode(encoding)
+        except (LookupError, UnicodeDecodeError):
+            continue
+    return raw.decode("latin-1")
+
+
+def _c_string(data: bytes, offset: int) -> str:
+    """offset 处的以 \\0 结尾的 ANSI 字符串"""
+    end = data.find(b"\0", offset)
+    if end == -1:
+        raise LnkError("字符串没有结尾")
+    return _decode_ansi(data[offset:end])
+
+
+def _c_wstring(data: bytes, offset: int) -> str:
+    """offset 处的以 \\0\\0 结尾的 UTF-16LE 字符串"""
+    end = offset
+    while end + 1 < len(data):
+        if data[end] == 0 and data[end + 1] == 0:
+            return data[offset:end].decode("utf-16-le", errors="replace")
+        end += 2
+    raise LnkError("字符串没有结尾")
+
+
+def _u32(data: bytes, offset: int) -> int:
+    if offset + 4 > len(data):
+        raise LnkError("文件被截断")
+    return struct.unpack_from("<I", data, offset)[0]
+
+
+def _u16(data: bytes, offset: int) -> int:
+    if offset + 2 > len(data):
+        raise LnkError("文件被截断")
+    return struct.unpack_from("<H", data, offset)[0]
+
+
+def _parse_link_info(data: bytes, start: int) -> Tuple[str, str, int]:
+    """:return: (本地路径, 网络路径, LinkInfo 结束的位置)"""
+    size = _u32(data, start)
+    header_size = _u32(data, start + 4)
+    flags = _u32(data, start + 8)
+    local_base_offset = _u32(data, start + 16)
+    network_offset = _u32(data, start + 20)
+    suffix_offset = _u32(data, start + 24)
+    end = start + size
+    if size < 28 or end > len(data):
+        raise LnkError("LinkInfo 长度不对")
+    block = data[start:end]
+
+    # 头部 >= 0x24 时还有 Unicode 版本的偏移（+28 本地路径，+32 后缀），优先用
+    unicode_header = header_size >= 0x24
+    suffix = ""
+    if unicode_header and _u32(block, 32):
+        suffix = _c_wstring(block, _u32(block, 32))
+    elif suffix_offset:
+        suffix = _c_string(block, suffix_offset)
+
+    local_path = ""
+    if flags & _VOLUME_ID_AND_LOCAL_BASE_PATH:
+        if unicode_header and _u32(block, 28):
+            base = _c_wstring(block, _u32(block, 28))
+        else:
+            base = _c_string(block, local_base_offset)
+        local_path = base + suffix if base else ""
+
+    network_path = ""
+    if flags & _COMMON_NETWORK_RELATIVE_LINK and network_offset:
+        net = network_offset
+        net_name_offset = _u32(block, net + 8)
+        if net_name_offset > 0x14:
+            net_name = _c_wstring(block, net + _u32(block, net + 20))
+        else:
+            net_name = _c_string(block, net + net_name_offset)
+        if net_name:
+            network_path = net_name.rstrip("\\") + ("\\" + suffix if suffix else "")
+    return local_path, network_path, end
+
+
+def _read_string_data(data: bytes, offset: int, unicode: bool) -> Tuple[str, int]:
+    count = _u16(data, offset)
+    offset += 2
+    length = count * 2 if unicode else count
+    if offset + length > len(data):
+        raise LnkError("StringData 被截断")
+    raw = data[offset:offset + length]
+    text = raw.decode("utf-16-le", errors="replace") if unicode else _decode_ansi(raw)
+    return text, offset + length
+
+
+def parse_lnk_bytes(data: bytes) -> LnkInfo:
+    """解析 .lnk 文件内容；格式不对抛 LnkError"""
+    if len(data) < _HEADER_SIZE or _u32(data, 0) != _HEADER_SIZE or data[4:20] != _LINK_CLSID:
+        raise LnkError("不是 Shell Link 文件")
+    flags = _u32(data, 20)
+    offset = _HEADER_SIZE
+
+    if flags & _HAS_ID_LIST:
+        offset += 2 + _u16(data, offset)
+
+    local_path = network_path = ""
+    if flags & _HAS_LINK_INFO:
+        link_info_end = offset + _u32(data, offset)
+        if not flags & _FORCE_NO_LINK_INFO:
+            local_path, network_path, link_info_end = _parse_link_info(data, offset)
+        offset = link_info_end
+
+    unicode = bool(flags & _IS_UNICODE)
+    strings: Dict[int, str] = {}
+    for flag in (_HAS_NAME, _HAS_RELATIVE_PATH, _HAS_WORKING_DIR, _HAS_ARGUMENTS, _HAS_ICON_LOCATION):
+        if flags & flag:
+            strings[flag], offset = _read_string_data(data, offset, unicode)
+
+    env_target = ""
+    if flags & _HAS_EXP_STRING:
+        # ExtraData：一串 (BlockSize, BlockSignature, ...)，BlockSize < 4 表示结束
+        while offset + 8 <= len(data):
+            block_size = _u32(data, offset)
+            if block_size < 8 or offset + block_size > len(data):
+                break
+            if _u32(data, offset + 4) == _ENV_BLOCK_SIGNATURE and block_size >= 0x314:
+                target_unicode = data[offset + 268:offset + 788]
+                env_target = target_unicode.decode("utf-16-le", errors="replace").split("\0", 1)[0]
+                if not env_target:
+                    env_target = _decode_ansi(data[offset + 8:offset + 268].split(b"\0", 1)[0])
+                break
+            offset += block_size
+
+    return LnkInfo(
+        local_path=local_path,
+        network_path=network_path,
+        relative_path=strings.get(_HAS_RELATIVE_PATH, ""),
+        env_target=env_target,
+        working_dir=strings.get(_HAS_WORKING_DIR, ""),
+        arguments=strings.get(_HAS_ARGUMENTS, ""),
+    )
+
+
+def parse_lnk(path: str) -> LnkInfo:
+    with open(path, "rb") as f:
+        return parse_lnk_bytes(f.read(MAX_LNK_BYTES))
+
+
+_ENV_VAR = re.compile(r"%([^%]+)%")
+
+
+def expand_windows_vars(text: str) -> str:
+    """展开 %VAR% 形式的环境变量（不存在的保持原样，和 cmd 一样）；os.path.expandvars 在 Linux 上不认这种写法"""
+    def repl(m):
+        name = m.group(1)
+        value = os.environ.get(name)
+        if value is None:
+            value = os.environ.get(name.upper())
+        return m.group(0) if value is None else value
+    return _ENV_VAR.sub(repl, text)
+
+
+def _native(path: str) -> str:
+    """.lnk 里总是 \\ 分隔；在非 Windows 上转成 /，方便测试和跨机器整理"""
+    return path if os.sep == "\\" else path.replace("\\", os.sep)
+
+
+def lnk_target_candidates(lnk_path: str, info: LnkInfo) -> List[str]:
+    """按优先级列出可能的目标路径：环境变量路径、本地路径、网络路径、相对路径"""
+    candidates = []
+    if info.env_target:
+        candidates.append(_native(expand_windows_vars(info.env_target)))
+    if info.local_path:
+        candidates.append(_native(info.local_path))
+    if info.network_path:
+        candidates.append(_native(info.network_path))
+    if info.relative_path:
+        base = os.path.dirname(os.path.abspath(lnk_path))
+        candidates.append(os.path.normpath(os.path.join(base, _native(info.relative_path))))
+    return candidates
+
+
+def resolve_lnk_target(lnk_path: str) -> Optional[str]:
+    """
+    解析 .lnk 的目标：返回第一个存在的候选；都不存在就返回第一个候选（调用方自己判断）；
+    解析不了（格式不对 / 只有 IDList，比如一些“此电脑”、商店应用的快捷方式）返回 None。
+    """
+    try:
+        info = parse_lnk(lnk_path)
+    except (OSError, LnkError, struct.error):
+        return None
+    candidates = lnk_target_candidates(lnk_path, info)
+    for candidate in candidates:
+        if os.path.exists(candidate):
+            return candidate
+    return candidates[0] if candidates else None
+
+
+class LnkTargetCache:
+    """
+    按 (mtime, 大小) 缓存 resolve_lnk_target 的结果：快捷方式没改过就不再打开文件。
+    多个扫描线程可以同时用。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[int, int, Optional[str]]] = {}
+
+    def resolve(self, lnk_path: str) -> Optional[str]:
+        try:
+            st = os.stat(lnk_path)
+        except OSError:
+            return None
+        key = os.path.normcase(lnk_path)
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2]
+        target = resolve_lnk_target(lnk_path)
+        with self._lock:
+            self._entries[key] = (st.st_mtime_ns, st.st_size, target)
+        return target
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# 进程内共用一份
+default_lnk_cache = LnkTargetCache()
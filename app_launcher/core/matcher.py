@@ -4,61 +4,132 @@
 """
 AppMatcher 负责两件事：
 
-1. rebuild():
+1. rebuild() = build_snapshot() + install():
    - 遍历所有 app 的所有别名
-   - 先从 EmbeddingCache 里取向量，取不到才用 encoder 计算
+   - 先从 EmbeddingCache 里取向量，取不到的按批用 encoder 计算
    - 一次性把所有别名向量堆在 alias_vectors 里
    - 同时记录 alias_meta（每个向量对应哪个 app / 哪个别名）
+   - build_snapshot 可以放到后台线程里跑（带进度 / 取消），算完再 install 替换
 
 2. find_top_k(query_alias, k):
    - 对 query_alias 算一个向量
    - 和 alias_vectors 做相似度（点积）
    - 按分数排序，每个 app 只保留得分最高的一个别名，返回 top-k
+
+3. find_lexical(text, k):
+   - 不用模型，纯文本匹配（模型被空闲卸载、正在重新加载时的兜底）
+
+4. 给了 UsageStore 时：
+   - rank 在相似度最高的一批 app 里按启动频率加一点分再排（常用的排前面）
+   - find_cached(text, k)：同一句指令确认过选哪个 app，直接给出，不调模型
+
+线程安全：向量矩阵和 meta 一起放在不可变的 MatcherSnapshot 里（带版本号）。
+读的一方先取一次 matcher.snapshot，之后只用这一份，不需要加锁；
+写的一方构造好新的快照后通过 publish() 一次赋值替换，读到的永远是长度一致的一对。
 """
 
-from typing import List, Dict  # 类型注解
+import threading  # 后台重建的取消标记 / 发布快照的锁
+from difflib import SequenceMatcher  # 文本相似度（兜底用）
+from types import MappingProxyType  # 只读 dict
+from typing import Callable, List, Dict, Mapping, NamedTuple, Optional, Tuple  # 类型注解
 
 import numpy as np  # 处理向量
 
-from app_launcher.core.sentence_encoder import QwenSentenceEncoder  # 句向量编码器接口
+from app_launcher.core.sentence_encoder import QwenSentenceEncoder, MAX_ENCODE_BATCH  # 句向量编码器接口
 from app_launcher.core.config_store import AppConfigStore          # 配置存储
 from app_launcher.core.embedding_cache import EmbeddingCache       # 嵌入缓存
+from app_launcher.core.usage_store import UsageStore               # 启动记录（频率加分 / 指令缓存）
+
+
+class RebuildCancelled(Exception):
+    """build_snapshot 被 cancel_event 取消"""
+
+
+class MatcherSnapshot(NamedTuple):
+    """
+    某一时刻的全部匹配数据，创建后不再修改：
+    - vectors: [num_aliases, hidden_dim]，只读 ndarray
+    - meta:    长度 = num_aliases，每个元素是只读 dict（app_index / app_id / base_name / alias / exe_path）
+    - version: 每发布一次 +1
+    """
+    vectors: np.ndarray
+    meta: Tuple[Mapping, ...]
+    version: int
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, meta: List[Dict], version: int) -> "MatcherSnapshot":
+        if len(meta) != vectors.shape[0]:
+            raise ValueError(f"vectors ({vectors.shape[0]}) 和 meta ({len(meta)}) 数量不一致")
+        # build_snapshot 每次都新堆一个矩阵，这里不再复制，直接设成只读
+        vectors = np.asarray(vectors, dtype=np.float32)
+        vectors.setflags(write=False)
+        return cls(vectors, tuple(MappingProxyType(dict(m)) for m in meta), version)
+
+    @property
+    def size(self) -> int:
+        return len(self.meta)
+
+
+def _normalize_text(text: str) -> str:
+    """文本匹配用：去空白 + 小写"""
+    return "".join((text or "").split()).lower()
 
 
 class AppMatcher:
     """基于所有别名的句向量，为 query_alias 找最相近的 app"""
 
-    def __init__(self, encoder: QwenSentenceEncoder, store: AppConfigStore):
+    # 按启动频率重排时，先按相似度取多少个 app（再多也不会被加分翻上来）
+    RERANK_POOL = 10
+
+    def __init__(self, encoder: QwenSentenceEncoder, store: AppConfigStore, usage: UsageStore = None):
         """
         :param encoder: 句向量编码器，要求 encode(text 或 [text]) -> np.ndarray
         :param store:   AppConfigStore 实例，提供 apps 列表
+        :param usage:   启动记录；None 时纯按相似度排序
         """
         self.encoder = encoder          # 保存编码器
         self.store = store              # 保存配置存储
-        self.cache = EmbeddingCache()   # 嵌入磁盘缓存
+        self.usage = usage              # 启动记录
+        # 嵌入磁盘缓存（按别名文本缓存，编码器指纹变了自动作废）
+        self.cache = EmbeddingCache(getattr(encoder, "fingerprint", ""))
+        self._build_lock = threading.Lock()    # build_snapshot 互斥（它会改 cache）
+        self._publish_lock = threading.Lock()  # 只管版本号递增；读快照不需要锁
 
-        # alias_vectors: [num_aliases, hidden_dim]
-        self.alias_vectors = np.zeros((0, 1), dtype=np.float32)
-        # alias_meta: 长度 = num_aliases，每个元素是一个 dict，记录这个向量对应的 app / alias / 路径等信息
-        self.alias_meta: List[Dict] = []
+        # 当前正在用的快照；只通过 publish() 整体替换
+        self._snapshot = MatcherSnapshot.build(np.zeros((0, 1), dtype=np.float32), [], 0)
 
         # 启动时先重建一遍（如果缓存存在，会大量复用）
         self.rebuild()
 
+    @property
+    def snapshot(self) -> MatcherSnapshot:
+        """当前快照（一次属性读取，其它线程随时可能发布新的，所以读一次后一直用这一份）"""
+        return self._snapshot
+
+    @property
+    def alias_vectors(self) -> np.ndarray:
+        """兼容旧代码：当前快照的向量矩阵（只读）"""
+        return self._snapshot.vectors
+
+    @property
+    def alias_meta(self) -> Tuple[Mapping, ...]:
+        """兼容旧代码：当前快照的 meta（只读）"""
+        return self._snapshot.meta
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
     def rebuild(self):
+        """配置变化时调用：同步重建并立即替换（启动、命令行工具用；界面里用后台线程，见 build_snapshot）"""
+        self.publish(*self.build_snapshot())
+
+    def collect_meta(self) -> List[Dict]:
         """
-        配置变化时调用：
-        - 遍历所有 app 的所有别名
-        - 对每个 (app_index, alias):
-            * 尝试从 cache 取向量
-            * 没有就用 encoder.encode(alias) 算一次，并写回 cache
-        - 全部别名的向量堆到 alias_vectors
-        - alias_meta 记录每个向量的元信息
-        - 最后把 cache.save() 写回本地 npz
+        遍历所有 app 的所有别名，生成 alias_meta（每个向量对应哪个 app / 哪个别名）。
+        在调用线程上读 store.apps，后台重建前先在 GUI 线程里调这个，拿到一份独立的列表。
         """
-        all_vecs = []         # 用来存所有别名的向量
-        self.alias_meta = []  # 清空 meta 列表
-
+        meta: List[Dict] = []
         for idx, app in enumerate(self.store.apps):
             app_id = app.get("id")
             base_name = app.get("base_name", app_id)
@@ -66,34 +137,144 @@ class AppMatcher:
             aliases = app.get("aliases", []) or []
 
             for alias in aliases:
-                # 1) 先试着从缓存里拿
-                vec = self.cache.get(idx, alias)
-                if vec is None:
-                    # 2) 缓存没有，再用 encoder 算一次
-                    # encoder.encode 支持单个字符串或字符串列表，这里直接传字符串
-                    vec = self.encoder.encode(alias)[0]
-                    self.cache.set(idx, alias, vec)
-
-                all_vecs.append(vec)
-
                 # 记录这个向量的元信息
-                self.alias_meta.append({
+                meta.append({
                     "app_index": idx,      # 属于 store.apps 的哪一行
                     "app_id": app_id,      # app 的 id
                     "base_name": base_name,# app 的原始名称（用于显示）
                     "alias": alias,        # 这个向量对应的别名
                     "exe_path": exe_path,  # 对应的路径
                 })
+        return meta
+
+    def build_snapshot(
+        self,
+        meta: List[Dict] = None,
+        progress_cb: Callable[[int, int], None] = None,
+        cancel_event: threading.Event = None,
+    ) -> Tuple[np.ndarray, List[Dict]]:
+        """
+        计算一份新的 (alias_vectors, alias_meta)，不改动当前正在用的那份：
+        - cache 里没有向量的别名，按批用 encoder.encode 算出来并写回 cache
+        - 返回的 (vectors, meta) 交给 publish() 生效
+        - 每算完一批调用 progress_cb(已有向量的别名数, 别名总数)
+        - cancel_event 被 set 时抛 RebuildCancelled（已经算好的向量会存进缓存，下次不用重算）
+        - 有变化时把 cache.save() 写回本地 npz（已不在配置里的别名顺手清掉）
+        可以在后台线程里调用；多个 build_snapshot 同时调用时排队执行。
+        """
+        if meta is None:
+            meta = self.collect_meta()
+        # 缓存同一时间只允许一个线程改（上一轮被取消后会很快退出）
+        with self._build_lock:
+            all_aliases = [m["alias"] for m in meta]
+
+            # 缓存没有的别名，分批交给 encoder 算
+            missing = self.cache.missing(all_aliases)
+            total = len(set(all_aliases))
+            done = total - len(missing)
+            if progress_cb is not None:
+                progress_cb(done, total)
+            for start in range(0, len(missing), MAX_ENCODE_BATCH):
+                if cancel_event is not None and cancel_event.is_set():
+                    if start:
+                        self.cache.save()
+                    raise RebuildCancelled()
+                chunk = missing[start:start + MAX_ENCODE_BATCH]
+                for alias, vec in zip(chunk, self.encoder.encode(chunk)):
+                    self.cache.set(alias, vec)
+                done += len(chunk)
+                if progress_cb is not None:
+                    progress_cb(done, total)
+            pruned = self.cache.prune(all_aliases)
+
+            if all_aliases:
+                # 把所有向量堆成 [num_aliases, hidden_dim]
+                vectors = np.stack([self.cache.get(a) for a in all_aliases], axis=0)
+            else:
+                # 没有任何 app 时，保持一个空矩阵
+                vectors = np.zeros((0, 1), dtype=np.float32)
+
+            # 把更新后的缓存写回本地文件
+            if missing or pruned or self.cache.file_fingerprint != self.cache.fingerprint:
+                self.cache.save()
+            return vectors, meta
+
+    def publish(self, vectors: np.ndarray, meta: List[Dict]) -> MatcherSnapshot:
+        """把 build_snapshot 的结果做成新快照并替换当前快照（任何线程都可以调用）"""
+        with self._publish_lock:
+            snapshot = MatcherSnapshot.build(vectors, meta, self._snapshot.version + 1)
+            self._snapshot = snapshot
+        return snapshot
+
+    def build_from_changes(
+        self,
+        changes,
+        meta: List[Dict] = None,
+        progress_cb: Callable[[int, int], None] = None,
+        cancel_event: threading.Event = None,
+    ) -> Tuple[np.ndarray, List[Dict]]:
+        """
+        按 ChangeSet 增量计算新的 (vectors, meta)，不做全量重建：
+        - 当前快照里已有的别名直接复用那一行向量，不查缓存、不重新编码
+        - 只有快照和缓存里都没有的别名（一般就是 changes.added_aliases）才交给 encoder
+        - 缓存里只删掉 changes.removed_aliases 中已经没人用的别名，其余不动；没变化不写文件
+        changes.reset（整个列表被替换）时退回 build_snapshot。
+        """
+        if getattr(changes, "reset", False):
+            return self.build_snapshot(meta, progress_cb, cancel_event)
+        if meta is None:
+            meta = self.collect_meta()
+        with self._build_lock:
+            snapshot = self._snapshot
+            rows = {m["alias"]: i for i, m in enumerate(snapshot.meta)}
+            all_aliases = [m["alias"] for m in meta]
+
+            need = [a for a in self.cache.missing(all_aliases) if a not in rows]
+            if progress_cb is not None:
+                progress_cb(0, len(need))
+            for start in range(0, len(need), MAX_ENCODE_BATCH):
+                if cancel_event is not None and cancel_event.is_set():
+                    if start:
+                        self.cache.save()
+                    raise RebuildCancelled()
+                chunk = need[start:start + MAX_ENCODE_BATCH]
+                for alias, vec in zip(chunk, self.encoder.encode(chunk)):
+                    self.cache.set(alias, vec)
+                if progress_cb is not None:
+                    progress_cb(min(start + len(chunk), len(need)), len(need))
+
+            still_used = set(all_aliases)
+            dropped = self.cache.discard(
+                a for a in getattr(changes, "removed_aliases", ()) if a not in still_used
+            )
 
-        if all_vecs:
-            # 把所有向量堆成 [num_aliases, hidden_dim]
-            self.alias_vectors = np.stack(all_vecs, axis=0)
-        else:
-            # 没有任何 app 时，保持一个空矩阵
-            self.alias_vectors = np.zeros((0, 1), dtype=np.float32)
+            if all_aliases:
+                vectors = np.stack([
+                    snapshot.vectors[rows[a]] if a in rows else self.cache.get(a)
+                    for a in all_aliases
+                ], axis=0)
+            else:
+                vectors = np.zeros((0, 1), dtype=np.float32)
 
-        # 把更新后的缓存写回本地文件
-        self.cache.save()
+            if need or dropped:
+                self.cache.save()
+            return vectors, meta
+
+    def apply_changes(self, changes) -> Optional[MatcherSnapshot]:
+        """
+        AppConfigStore 保存 / 热加载后的 ChangeSet（store.add_listener(matcher.apply_changes)）：
+        没有改动就什么都不做；否则同步增量更新（见 build_from_changes）。
+        """
+        if not changes:
+            return None
+        return self.publish(*self.build_from_changes(changes))
+
+    def clear(self) -> MatcherSnapshot:
+        """清空所有向量和磁盘缓存（“初始化(清空)”用）"""
+        with self._build_lock:
+            self.cache.clear()
+            self.cache.save()
+        return self.publish(np.zeros((0, 1), dtype=np.float32), [])
 
     def find_top_k(self, query_alias: str, k: int = 3) -> List[Dict]:
         """
@@ -105,35 +286,53 @@ class AppMatcher:
         - base_name: app 的原始名称（显示用）
         - match_alias: 实际匹配到的别名
         - exe_path:  路径
-        - score:     相似度分数（float）
+        - score:     相似度分数（float）；有启动记录时是相似度 + usage_boost
+        - similarity / usage_boost: 有启动记录时才有
         """
         query_alias = query_alias.strip()
         if not query_alias:
             return []
-        if self.alias_vectors.shape[0] == 0:
+        snapshot = self._snapshot
+        if snapshot.size == 0:
             return []
 
         # 1) 对 query_alias 算一个向量
         q_vec = self.encoder.encode(query_alias)[0]  # [hidden_dim]
+        return self.rank(q_vec, k, snapshot)
+
+    def rank(self, q_vec: np.ndarray, k: int = 3, snapshot: MatcherSnapshot = None) -> List[Dict]:
+        """
+        已经有 query 向量时直接排序（不调 encoder），返回格式同 find_top_k。
+        异步服务里先 await 编码结果，再调这个方法。
+        :param snapshot: 在哪份快照上排序，默认当前快照
+        """
+        if snapshot is None:
+            snapshot = self._snapshot
+        if snapshot.size == 0:
+            return []
 
         # 如果 encoder 没做归一化，这里可以手动归一化一下（可选）
         # q_norm = np.linalg.norm(q_vec) + 1e-12
         # q_vec = q_vec / q_norm
-        # v_norms = np.linalg.norm(self.alias_vectors, axis=1, keepdims=True) + 1e-12
-        # vecs = self.alias_vectors / v_norms
+        # v_norms = np.linalg.norm(snapshot.vectors, axis=1, keepdims=True) + 1e-12
+        # vecs = snapshot.vectors / v_norms
         # sims = vecs @ q_vec
 
         # 简单起见：假设 encoder 已经输出归一化向量，直接点积就是余弦相似度
-        sims = self.alias_vectors @ q_vec  # [num_aliases]
+        sims = snapshot.vectors @ q_vec  # [num_aliases]
 
         # 2) 从大到小排序的索引
         idxs = np.argsort(-sims)
 
+        # 有启动记录时多取一些，加分后再截到 k 个
+        usage = self.usage if self.usage is not None and self.usage.boost_weight > 0 else None
+        limit = k + self.RERANK_POOL if usage is not None else k
+
         results: List[Dict] = []
         used_app_indices = set()  # 已经选过的 app_index（保证每个 app 只出现一次）
 
         for idx in idxs:
-            meta = self.alias_meta[idx]
+            meta = snapshot.meta[idx]
             app_index = meta["app_index"]
             if app_index in used_app_indices:
                 # 这个 app 已经通过另一个别名选过了，跳过
@@ -149,7 +348,92 @@ class AppMatcher:
                 "score": float(sims[idx]),
             })
 
+            if len(results) >= limit:
+                break
+
+        if usage is not None:
+            boosts = usage.boosts([r["exe_path"] for r in results])
+            for r in results:
+                r["similarity"] = r["score"]
+                r["usage_boost"] = boosts[r["exe_path"]]
+                r["score"] = r["similarity"] + r["usage_boost"]
+            results.sort(key=lambda r: r["score"], reverse=True)  # 稳定排序：同分保持相似度顺序
+            del results[k:]
+        return results
+
+    def find_cached(self, text: str, k: int = 3) -> Optional[List[Dict]]:
+        """
+        这句指令之前连续几次都选了同一个 app（UsageStore.cached_choice）：
+        不调别名模型和编码器，直接把它放第一个，后面补上文本匹配的结果（万一这次想要别的）。
+        没有确认过 / 那个 app 已经删了返回 None。
+        """
+        if self.usage is None:
+            return None
+        path = self.usage.cached_choice(text)
+        if path is None:
+            return None
+        apps = self.store.find_by_exe_path(path)
+        if not apps:
+            return None
+        app = apps[0]
+        app_index = self.store.index_of(app)
+        if app_index < 0:
+            return None
+        base_name = app.get("base_name", app.get("id"))
+        results = [{
+            "app_index": app_index,
+            "app_id": app.get("id"),
+            "base_name": base_name,
+            "match_alias": base_name,
+            "exe_path": app.get("exe_path", ""),
+            "score": 1.0,
+            "cached": True,
+        }]
+        for r in self.find_lexical(text, k):
             if len(results) >= k:
                 break
+            if r["app_index"] != app_index:
+                results.append(r)
+        return results
 
+    def find_lexical(self, text: str, k: int = 3) -> List[Dict]:
+        """
+        不调用模型的文本匹配，返回格式和 find_top_k 一样（多一个 lexical=True）：
+        - 别名完整出现在指令里：0.5 ~ 1.0 分，别名占指令越长分越高
+        - 否则按 SequenceMatcher 相似度给 0 ~ 0.5 分
+        """
+        norm_text = _normalize_text(text)
+        if not norm_text:
+            return []
+
+        scored = []
+        for meta in self._snapshot.meta:
+            alias = _normalize_text(meta["alias"])
+            if not alias:
+                continue
+            if alias in norm_text:
+                score = 0.5 + 0.5 * len(alias) / len(norm_text)
+            else:
+                score = 0.5 * SequenceMatcher(None, alias, norm_text).ratio()
+            scored.append((score, meta))
+
+        scored.sort(key=lambda x: x[0], reverse=True)
+
+        results: List[Dict] = []
+        used_app_indices = set()
+        for score, meta in scored:
+            if meta["app_index"] in used_app_indices:
+                continue
+            used_app_indices.add(meta["app_index"])
+            results.append({
+                "app_index": meta["app_index"],
+                "app_id": meta["app_id"],
+                "base_name": meta["base_name"],
+                "match_alias": meta["alias"],
+                "exe_path": meta["exe_path"],
+                "score": float(score),
+                "lexical": True,
+            })
+            if len(results) >= k:
+                break
         return results
@@ -0,0 +1,167 @@
+# app_launcher/core/model_scheduler.py
+# -*- coding: utf-8 -*-
+"""
+ModelScheduler：进程里唯一直接使用模型的线程。
+
+- 各处（搜索、后台重建、预热……）调用 submit_encode / submit_extract，拿到 Future
+- 调度线程在一个很短的时间窗口（默认 5ms）里把同时到达的请求收集起来，
+  encode 请求合并成一次前向，extract 请求合并成一次 generate，然后逐个 set_result
+- 模型只在这一个线程里跑，再加上 AliasModelManager 的锁，多线程调用是安全的
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app_launcher.core.alias_model import AliasModelManager
+from app_launcher.core.alias_extractor import extract_aliases
+from app_launcher.core.sentence_encoder import encode_texts, MAX_ENCODE_BATCH
+
+# 单次 generate 最多合并多少条指令
+MAX_EXTRACT_BATCH = 16
+
+
+class _Request:
+    """队列里的一条请求"""
+
+    __slots__ = ("kind", "texts", "future")
+
+    def __init__(self, kind: str, texts: List[str]):
+        self.kind = kind          # "encode" / "extract"
+        self.texts = texts
+        self.future = Future()
+
+
+class ModelScheduler:
+    """把并发的 encode / extract 请求合并成微批次，在单独的线程上执行"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, mgr: AliasModelManager = None, window_ms: float = 5.0):
+        """
+        :param mgr:       模型管理器，默认用全局单例
+        :param window_ms: 收集请求的时间窗口（毫秒），窗口越大批越大、单条延迟越高
+        """
+        self.mgr = mgr or AliasModelManager.instance()
+        self.window = window_ms / 1000.0
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="ModelScheduler", daemon=True)
+        self._thread.start()
+
+        # 统计信息（调试 / 诊断用）
+        self.stats = {"batches": 0, "requests": 0, "encode_texts": 0, "extract_texts": 0}
+
+    @classmethod
+    def instance(cls) -> "ModelScheduler":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    # ---------------- 对外接口 ----------------
+
+    def submit_encode(self, texts: List[str]) -> Future:
+        """异步编码一批文本，Future 的结果是 [len(texts), hidden] 的归一化向量"""
+        req = _Request("encode", list(texts))
+        if not req.texts:
+            req.future.set_result(np.zeros((0, 1), dtype=np.float32))
+            return req.future
+        self._queue.put(req)
+        return req.future
+
+    def submit_extract(self, text: str) -> Future:
+        """异步抽取一条指令的别名，Future 的结果是别名字符串"""
+        req = _Request("extract", [text])
+        self._queue.put(req)
+        return req.future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """同步版本：提交后等待结果"""
+        return self.submit_encode(texts).result()
+
+    def extract(self, text: str) -> str:
+        """同步版本：提交后等待结果"""
+        return self.submit_extract(text).result()
+
+    def shutdown(self):
+        """停止调度线程（队列里剩下的请求会先处理完）"""
+        self._queue.put(None)
+        self._thread.join()
+
+    # ---------------- 调度线程 ----------------
+
+    def _collect(self, first: _Request) -> Tuple[List[_Request], bool]:
+        """从 first 开始，在时间窗口内尽量多收集请求；返回 (请求列表, 是否收到停止信号)"""
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                req = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if req is None:
+                return batch, True
+            batch.append(req)
+        return batch, False
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+
+            # 已经被调用方取消的请求直接丢掉
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            self.stats["batches"] += 1
+            self.stats["requests"] += len(batch)
+
+            self._run_encode([r for r in batch if r.kind == "encode"])
+            self._run_extract([r for r in batch if r.kind == "extract"])
+            if stop:
+                return
+
+    def _run_encode(self, requests: List[_Request]):
+        """所有 encode 请求的文本拼在一起，按 MAX_ENCODE_BATCH 分块前向，再按请求切回去"""
+        if not requests:
+            return
+        texts = [t for r in requests for t in r.texts]
+        self.stats["encode_texts"] += len(texts)
+        try:
+            chunks = [
+                encode_texts(self.mgr, texts[i:i + MAX_ENCODE_BATCH])
+                for i in range(0, len(texts), MAX_ENCODE_BATCH)
+            ]
+            vecs = np.concatenate(chunks, axis=0)
+        except Exception as e:
+            for r in requests:
+                r.future.set_exception(e)
+            return
+
+        offset = 0
+        for r in requests:
+            n = len(r.texts)
+            r.future.set_result(vecs[offset:offset + n])
+            offset += n
+
+    def _run_extract(self, requests: List[_Request]):
+        """extract 请求按 MAX_EXTRACT_BATCH 合并成一次 generate"""
+        for i in range(0, len(requests), MAX_EXTRACT_BATCH):
+            group = requests[i:i + MAX_EXTRACT_BATCH]
+            self.stats["extract_texts"] += len(group)
+            try:
+                aliases = extract_aliases(self.mgr, [r.texts[0] for r in group])
+            except Exception as e:
+                for r in group:
+                    r.future.set_exception(e)
+                continue
+            for r, alias in zip(group, aliases):
+                r.future.set_result(alias)
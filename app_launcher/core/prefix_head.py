@@ -0,0 +1,183 @@
+# app_launcher/core/prefix_head.py
+# -*- coding: utf-8 -*-
+"""
+AliasAttPT 小头的推理版本（加载时准备一次，之后每次查询直接用）：
+
+- dtype / device 在加载时就和基座 embedding 对齐，查询时不再 .to(...)
+- prompt 向量是常量，所以注意力里 Q 的投影（prompt @ W_q + b_q）可以提前算好
+- K / V 两个投影合成一次 F.linear，注意力用 scaled_dot_product_attention
+- 可选 torch.compile / TorchScript：按几个固定的序列长度桶（bucket）编译，
+  输入 padding 到桶长度，padding 部分用 mask 屏蔽
+
+数学上和 AliasAttPTModel 里 attn -> 残差 -> ffn -> LayerNorm 这一段完全等价。
+"""
+
+from typing import Dict, Optional, Sequence
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from app_launcher.core.alias_att_pt_model import AliasAttPTModel
+
+
+# 编译方式：none（eager）/ compile（torch.compile）/ script（TorchScript trace）
+COMPILE_MODES = ["none", "compile", "script"]
+
+# 静态序列长度桶：指令一般很短，prompt 模板 + 指令基本落在 16~64 之间
+DEFAULT_BUCKETS = (16, 32, 64, 128)
+
+
+def _attention(q, k, v, key_mask):
+    """scaled dot-product attention；老版本 torch 没有 F.scaled_dot_product_attention 时手写一遍"""
+    if hasattr(F, "scaled_dot_product_attention"):
+        return F.scaled_dot_product_attention(q, k, v, attn_mask=key_mask)
+    scores = (q @ k.transpose(-2, -1)) / (q.shape[-1] ** 0.5)
+    scores = scores.masked_fill(~key_mask, float("-inf"))
+    return torch.softmax(scores, dim=-1) @ v
+
+
+class AliasPrefixHead(nn.Module):
+    """只负责算 prompt_context（[batch, num_virtual_tokens, hidden]）的融合小头"""
+
+    def __init__(self, model: AliasAttPTModel, dtype: torch.dtype, device):
+        super().__init__()
+
+        attn = model.attn
+        hidden = attn.embed_dim
+        num_heads = attn.num_heads
+
+        # 原地把小头的子模块 cast 到目标 dtype，下面的 buffer 直接引用同一份存储，不额外占内存
+        model.attn.to(device=device, dtype=dtype)
+        model.ffn.to(device=device, dtype=dtype)
+        model.prompt_layer_norm.to(device=device, dtype=dtype)
+
+        self.hidden = hidden
+        self.num_heads = num_heads
+        self.head_dim = hidden // num_heads
+        self.num_virtual_tokens = model.num_virtual_tokens
+        self.ln_eps = model.prompt_layer_norm.eps
+
+        with torch.no_grad():
+            prompt = model.prompt_embeddings.detach().to(device=device, dtype=dtype)
+            in_w = attn.in_proj_weight.detach()
+            in_b = attn.in_proj_bias.detach()
+
+            # Q 只和 prompt 有关：提前投影好，形状 [num_heads, num_virtual_tokens, head_dim]
+            q = F.linear(prompt, in_w[:hidden], in_b[:hidden])
+            q = q.view(self.num_virtual_tokens, num_heads, self.head_dim).transpose(0, 1)
+
+            self.register_buffer("prompt", prompt, persistent=False)
+            self.register_buffer("q", q.contiguous(), persistent=False)
+            # K / V 合成一个 [2*hidden, hidden] 的投影
+            self.register_buffer("kv_weight", in_w[hidden:], persistent=False)
+            self.register_buffer("kv_bias", in_b[hidden:], persistent=False)
+            self.register_buffer("out_weight", attn.out_proj.weight.detach(), persistent=False)
+            self.register_buffer("out_bias", attn.out_proj.bias.detach(), persistent=False)
+            self.register_buffer("ffn1_weight", model.ffn[0].weight.detach(), persistent=False)
+            self.register_buffer("ffn1_bias", model.ffn[0].bias.detach(), persistent=False)
+            self.register_buffer("ffn2_weight", model.ffn[2].weight.detach(), persistent=False)
+            self.register_buffer("ffn2_bias", model.ffn[2].bias.detach(), persistent=False)
+            self.register_buffer("ln_weight", model.prompt_layer_norm.weight.detach(), persistent=False)
+            self.register_buffer("ln_bias", model.prompt_layer_norm.bias.detach(), persistent=False)
+
+        self.dtype = dtype
+        self.buckets: Sequence[int] = ()
+        self.compile_mode = "none"
+        self._compiled = None                  # torch.compile 的结果
+        self._traced: Dict[int, torch.jit.ScriptModule] = {}  # TorchScript：桶长度 -> 模块
+        self.eval()
+
+    def forward(self, inputs_embeds: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """
+        :param inputs_embeds:  [batch, seq_len, hidden]，dtype 必须和小头一致
+        :param attention_mask: [batch, seq_len]，1 表示有效 token，0 表示 padding
+        :return: prompt_context [batch, num_virtual_tokens, hidden]
+        """
+        batch, seq_len = inputs_embeds.shape[0], inputs_embeds.shape[1]
+
+        kv = F.linear(inputs_embeds, self.kv_weight, self.kv_bias)  # [batch, seq_len, 2*hidden]
+        k, v = kv.split(self.hidden, dim=-1)
+        k = k.reshape(batch, seq_len, self.num_heads, self.head_dim).transpose(1, 2)
+        v = v.reshape(batch, seq_len, self.num_heads, self.head_dim).transpose(1, 2)
+        q = self.q.unsqueeze(0).expand(batch, -1, -1, -1)
+
+        # padding 位置不参与注意力（bool mask：True 表示参与）
+        key_mask = attention_mask.to(torch.bool)[:, None, None, :]
+        attn_out = _attention(q, k, v, key_mask)
+        attn_out = attn_out.transpose(1, 2).reshape(batch, self.num_virtual_tokens, self.hidden)
+        attn_out = F.linear(attn_out, self.out_weight, self.out_bias)
+
+        # 残差 -> FFN -> LayerNorm，和训练时的结构一致
+        ctx = self.prompt.unsqueeze(0) + attn_out
+        ctx = F.linear(F.relu(F.linear(ctx, self.ffn1_weight, self.ffn1_bias)),
+                       self.ffn2_weight, self.ffn2_bias)
+        return F.layer_norm(ctx, (self.hidden,), self.ln_weight, self.ln_bias, self.ln_eps)
+
+    # ---------------- 编译 / 分桶 ----------------
+
+    def prepare(self, mode: str = "none", buckets: Sequence[int] = DEFAULT_BUCKETS):
+        """
+        按固定序列长度桶准备编译版本（加载时调用一次）：
+        - compile：torch.compile(dynamic=False)，每个桶预热一遍，之后不会再触发重编译
+        - script：每个桶 torch.jit.trace 一份
+        失败时打印原因并退回 eager，不影响使用。
+        """
+        mode = (mode or "none").lower()
+        if mode not in COMPILE_MODES:
+            print(f"unknown prefix head compile mode {mode!r}, use none")
+            mode = "none"
+        self.buckets = tuple(sorted(buckets))
+        self.compile_mode = mode
+        if mode == "none":
+            return self
+
+        device = self.q.device
+        try:
+            with torch.no_grad():
+                if mode == "compile":
+                    self._compiled = torch.compile(self.forward, dynamic=False)
+                for length in self.buckets:
+                    embeds = torch.zeros(1, length, self.hidden, dtype=self.dtype, device=device)
+                    mask = torch.ones(1, length, dtype=torch.long, device=device)
+                    if mode == "compile":
+                        self._compiled(embeds, mask)  # 预热，触发编译
+                    else:
+                        self._traced[length] = torch.jit.trace(self, (embeds, mask))
+        except Exception as e:
+            print(f"prefix head {mode} failed, fallback to eager:", e)
+            self.compile_mode = "none"
+            self._compiled = None
+            self._traced = {}
+        return self
+
+    def _bucket_for(self, seq_len: int) -> Optional[int]:
+        """找到能装下 seq_len 的最小桶；超过最大桶返回 None（直接走 eager）"""
+        for length in self.buckets:
+            if seq_len <= length:
+                return length
+        return None
+
+    @torch.no_grad()
+    def prompt_context(self, inputs_embeds: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """对外接口：需要的话 padding 到桶长度，再调用编译好的版本"""
+        if self.compile_mode == "none":
+            return self.forward(inputs_embeds, attention_mask)
+
+        seq_len = inputs_embeds.shape[1]
+        bucket = self._bucket_for(seq_len)
+        if bucket is None:
+            return self.forward(inputs_embeds, attention_mask)
+
+        pad = bucket - seq_len
+        if pad:
+            # 右侧补 0，mask 为 0 的位置在注意力里被屏蔽，不影响结果
+            inputs_embeds = F.pad(inputs_embeds, (0, 0, 0, pad))
+            attention_mask = F.pad(attention_mask, (0, pad))
+
+        if self.compile_mode == "compile":
+            return self._compiled(inputs_embeds, attention_mask)
+        traced = self._traced.get(bucket)
+        if traced is None:
+            return self.forward(inputs_embeds, attention_mask)
+        return traced(inputs_embeds, attention_mask)
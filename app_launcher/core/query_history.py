@@ -0,0 +1,247 @@
+# app_launcher/core/query_history.py
+# -*- coding: utf-8 -*-
+
+"""
+查询历史前缀树：输入框里每敲一个字就给出补全（“打开微” -> “打开微信 → 微信”），不调模型。
+
+- 记的是启动成功过的指令原文，以及别名模型从里面抽出来的别名，各自带上当时选中的应用
+- 前缀树每个节点预先存好子树里排名最高的几条（TOP_PER_NODE），
+  补全 = 沿着前缀走到节点 + 读它的列表，和历史条数无关，几微秒
+- 排名：用过的次数多的在前，次数相同最近用的在前
+- 最多 max_entries 条，超出按最后使用时间淘汰（LRU），淘汰后只重算这条路径上的节点
+- 保存在 config/query_history.json，防抖写入，退出前 flush()
+
+匹配不区分大小写、连续空白算一个空格（“Open  WeChat” 和 “open wechat” 是同一条）。
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+QUERY_HISTORY_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "config", "query_history.json"
+)
+QUERY_HISTORY_FORMAT = 1
+
+# 每个节点预存几条最佳补全（complete 的 n 不超过它时不用遍历子树）
+TOP_PER_NODE = 8
+
+
+def normalize_history_text(text: str) -> str:
+    """小写 + 连续空白合并成一个空格"""
+    return " ".join((text or "").split()).lower()
+
+
+class Completion(NamedTuple):
+    text: str        # 当时输入的原文（补全时填回输入框）
+    kind: str        # "command"（整句指令）/ "alias"（抽取出的别名）
+    exe_path: str    # 当时选中的应用
+    base_name: str
+    hits: int
+    last_used: float
+
+
+class _Node:
+    __slots__ = ("children", "key", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.key: Optional[str] = None  # 到这里正好是一条历史（规范化后的文本）
+        self.top: List[str] = []        # 子树里排名最高的几条历史的 key，排好序
+
+
+class QueryHistory:
+    def __init__(self, path: str = None, max_entries: int = 2000, write_behind_delay: float = 2.0):
+        self.path = os.path.abspath(path or QUERY_HISTORY_PATH)
+        self.max_entries = max(int(max_entries), 1)
+        self.write_behind_delay = write_behind_delay
+
+        self._lock = threading.RLock()
+        self._root = _Node()
+        self._entries: Dict[str, Completion] = {}  # 规范化文本 -> 记录；dict 顺序 = 最近使用顺序（旧的在前）
+        self._save_timer: Optional[threading.Timer] = None
+        self.load()
+
+    @classmethod
+    def from_settings(cls, settings, path: str = None) -> "QueryHistory":
+        return cls(path, max_entries=int(settings.get("query_history_max") or 2000))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ---------------- 前缀树 ----------------
+
+    def _rank(self, key: str):
+        entry = self._entries[key]
+        return entry.hits, entry.last_used
+
+    def _merge_top(self, node: _Node):
+        """用自己这条 + 各个子节点的列表重算 node.top（子节点的列表已经是对的）"""
+        keys = [node.key] if node.key is not None else []
+        for child in node.children.values():
+            keys.extend(child.top)
+        keys.sort(key=self._rank, reverse=True)
+        node.top = keys[:TOP_PER_NODE]
+
+    def _path(self, key: str) -> List[_Node]:
+        """根到 key 的节点列表（不存在的节点会创建）"""
+        node = self._root
+        path = [node]
+        for ch in key:
+            child = node.children.get(ch)
+            if child is None:
+                child = node.children[ch] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    def _insert(self, key: str):
+        """key 的记录刚加入或排名变高了：沿路径把它插进各节点的列表"""
+        path = self._path(key)
+        path[-1].key = key
+        rank = self._rank(key)
+        for node in path:
+            top = node.top
+            if key in top:
+                top.remove(key)
+            i = 0
+            while i < len(top) and self._rank(top[i]) >= rank:
+                i += 1
+            if i < TOP_PER_NODE:
+                top.insert(i, key)
+                del top[TOP_PER_NODE:]
+
+    def _remove(self, key: str):
+        """删掉一条：去掉终点标记、剪掉空的分支，再从下往上重算这条路径上的列表"""
+        path = self._path(key)
+        path[-1].key = None
+        for depth in range(len(path) - 1, 0, -1):
+            node = path[depth]
+            if node.key is None and not node.children:
+                del path[depth - 1].children[key[depth - 1]]
+        for node in reversed(path):
+            if key in node.top:
+                self._merge_top(node)
+
+    # ---------------- 记录 / 补全 ----------------
+
+    def record(self, text: str, exe_path: str, base_name: str = "", alias: str = None, now: float = None):
+        """
+        启动成功后调用：记下指令原文（以及抽取出的别名）-> 应用。
+        已经有的同一条：次数 +1，应用换成这次选的。
+        """
+        if not exe_path:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            seen = set()
+            for item, kind in ((text, "command"), (alias, "alias")):
+                key = normalize_history_text(item)
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                old = self._entries.pop(key, None)
+                hits = old.hits + 1 if old is not None else 1
+                self._entries[key] = Completion(" ".join(item.split()), kind, exe_path, base_name or "", hits, now)
+                self._insert(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                del self._entries[oldest]
+        self.schedule_save()
+
+    def complete(self, prefix: str, n: int = 5) -> List[Completion]:
+        """以 prefix 开头的历史，排名最高的 n 条（n <= TOP_PER_NODE）；prefix 为空返回空列表"""
+        key = normalize_history_text(prefix)
+        if not key:
+            return []
+        # 输入末尾的空格也算（“打开 ” 只补全 “打开 xx”）
+        if prefix[-1:].isspace():
+            key += " "
+        with self._lock:
+            node = self._root
+            for ch in key:
+                node = node.children.get(ch)
+                if node is None:
+                    return []
+            return [self._entries[k] for k in node.top[:n]]
+
+    def forget(self, text: str):
+        with self._lock:
+            key = normalize_history_text(text)
+            if key in self._entries:
+                self._remove(key)
+                del self._entries[key]
+                self.schedule_save()
+
+    def clear(self):
+        with self._lock:
+            self._root = _Node()
+            self._entries = {}
+        self.save()
+
+    # ---------------- 读写文件 ----------------
+
+    def load(self):
+        """读取历史并重建前缀树；文件不存在 / 损坏就从空开始"""
+        with self._lock:
+            self._root, self._entries = _Node(), {}
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("format") != QUERY_HISTORY_FORMAT:
+                    return
+                rows = data.get("entries", [])[-self.max_entries:]
+                for text, kind, exe_path, base_name, hits, last_used in rows:
+                    key = normalize_history_text(text)
+                    if key:
+                        self._entries.pop(key, None)
+                        self._entries[key] = Completion(text, kind, exe_path, base_name, int(hits), float(last_used))
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                print("query history ignored:", e)
+                self._entries = {}
+            for key in self._entries:
+                self._insert(key)
+
+    def save(self):
+        """按最近使用顺序写（旧的在前），在锁里写临时文件再替换（临时文件命名同 UsageStore.save）"""
+        with self._lock:
+            self._cancel_timer()
+            data = {"format": QUERY_HISTORY_FORMAT, "entries": [list(e) for e in self._entries.values()]}
+            text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self.path)
+
+    def schedule_save(self):
+        """防抖写入，和 UsageStore.schedule_save 一样"""
+        with self._lock:
+            self._cancel_timer()
+            timer = threading.Timer(self.write_behind_delay, self._timer_save)
+            timer.daemon = True
+            self._save_timer = timer
+            timer.start()
+
+    def _timer_save(self):
+        with self._lock:
+            if self._save_timer is None or threading.current_thread() is not self._save_timer:
+                return
+            self._save_timer = None
+            self.save()
+
+    def _cancel_timer(self):
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+    def flush(self):
+        with self._lock:
+            if self._save_timer is None:
+                return
+            self.save()
@@ -1,40 +1,98 @@
 # app_launcher/core/sentence_encoder.py
+import hashlib
+import os
+from typing import List
+
 import torch
 import numpy as np
 from app_launcher.core.alias_model import AliasModelManager
+from app_launcher.models.paths import BASE_MODEL_PATH
 
-class QwenSentenceEncoder:
-    def __init__(self):
-        mgr = AliasModelManager.instance()
-        self.base_model = mgr.base_model
-        self.tokenizer = mgr.tokenizer
-        self.device = mgr.device
+# 单次前向最多编码多少条文本（显存 / 内存上限）
+MAX_ENCODE_BATCH = 64
 
-    @torch.no_grad()
-    def encode(self, texts):
-        if isinstance(texts, str):
-            texts = [texts]
+# 分词截断长度
+MAX_ENCODE_LENGTH = 64
+
+# 句向量的计算方式有变化（pooling、归一化等）时改这个版本号，让旧向量缓存作废
+ENCODER_VERSION = "mean-l2-v1"
+
+
+def encoder_fingerprint(precision: str) -> str:
+    """
+    句向量编码器的指纹：基座 config.json 内容 + 各权重文件大小 + 推理精度 + 计算方式版本。
+    不用 mtime，这样同一套模型拷到别的机器上指纹不变，预计算的向量可以直接复用。
+    不需要加载模型。
+    """
+    h = hashlib.sha1()
+    h.update(f"{ENCODER_VERSION}:{precision}:{MAX_ENCODE_LENGTH}".encode("utf-8"))
+    if os.path.isdir(BASE_MODEL_PATH):
+        for name in sorted(os.listdir(BASE_MODEL_PATH)):
+            path = os.path.join(BASE_MODEL_PATH, name)
+            if not os.path.isfile(path):
+                continue
+            if name == "config.json":
+                with open(path, "rb") as f:
+                    h.update(f.read())
+            else:
+                h.update(f"{name}:{os.path.getsize(path)}".encode("utf-8"))
+    return h.hexdigest()[:16]
 
-        inputs = self.tokenizer(
+
+@torch.no_grad()
+def encode_texts(mgr: AliasModelManager, texts: List[str]) -> np.ndarray:
+    """
+    真正跑模型的地方：对一批文本做 mean pooling + L2 归一化。
+    调用方负责分批；这里会拿 mgr 的模型锁。
+    """
+    with mgr.acquire():
+        inputs = mgr.tokenizer(
             texts,
             return_tensors="pt",
             padding=True,
             truncation=True,
-            max_length=64,
-        ).to(self.device)
+            max_length=MAX_ENCODE_LENGTH,
+        ).to(mgr.device)
 
-        outputs = self.base_model(
+        outputs = mgr.base_model(
             **inputs,
             output_hidden_states=True,
         )
-        hidden = outputs.hidden_states[-1]  # [batch, seq_len, hidden]
+    hidden = outputs.hidden_states[-1]  # [batch, seq_len, hidden]
+
+    mask = inputs["attention_mask"].unsqueeze(-1)
+    summed = (hidden * mask).sum(dim=1)
+    counts = mask.sum(dim=1).clamp(min=1)
+    mean_pooled = summed / counts
+
+    # bf16 / fp16 不能直接转 numpy，统一转成 float32
+    vecs = mean_pooled.float().cpu().numpy()
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vecs / norms
 
-        mask = inputs["attention_mask"].unsqueeze(-1)
-        summed = (hidden * mask).sum(dim=1)
-        counts = mask.sum(dim=1).clamp(min=1)
-        mean_pooled = summed / counts
 
-        vecs = mean_pooled.cpu().numpy()
-        norms = np.linalg.norm(vecs, axis=1, keepdims=True)
-        norms[norms == 0] = 1.0
-        return vecs / norms
+class QwenSentenceEncoder:
+    def __init__(self, mgr: AliasModelManager = None):
+        """
+        :param mgr: 默认 None -> 走全局 ModelScheduler（多个调用方的请求会合并成一批）；
+                    传入单独的 AliasModelManager 时直接在当前线程上跑（精度对比等场景）
+        """
+        if mgr is None:
+            # 放在这里 import，避免 model_scheduler <-> sentence_encoder 循环导入
+            from app_launcher.core.model_scheduler import ModelScheduler
+            self.scheduler = ModelScheduler.instance()
+            mgr = self.scheduler.mgr
+        else:
+            self.scheduler = None
+        # 不直接持有 base_model：模型可能因为空闲被卸载，每次通过 mgr.acquire() 拿
+        self.mgr = mgr
+        self.device = mgr.device
+        self.fingerprint = encoder_fingerprint(mgr.precision)
+
+    def encode(self, texts):
+        if isinstance(texts, str):
+            texts = [texts]
+        if self.scheduler is not None:
+            return self.scheduler.encode(texts)
+        return encode_texts(self.mgr, list(texts))
@@ -0,0 +1,237 @@
+# app_launcher/core/usage_store.py
+# -*- coding: utf-8 -*-
+
+"""
+启动记录：哪个应用最近常用、哪句指令上次选了哪个应用。
+
+- 每个应用一个指数衰减计数：每启动一次 +1，每过 half_life_days 天减半。
+  一天开五十次的应用分数高，半年前用过几次的慢慢归零
+- AppMatcher.rank 用它给相似度加一点分（见 usage_boost），只在候选本来就接近时改变顺序
+- 同一句指令（去空白、小写后）连续 CONFIRM_COUNT 次都选了同一个应用，就记成“确认过”，
+  下次直接给出这个应用，不用调别名模型和编码器（AppMatcher.find_cached）
+- 每个应用还记一个启动耗时的滑动平均（launch_backend.launch 量的，检查路径 + 交给系统），
+  网络路径 / 慢盘上的应用能在诊断里看出来（slowest_apps）
+
+按路径（规范化后）记，不按行号 / id：删掉前面的应用、改名都不影响。
+保存在 config/usage_stats.json，防抖写入（和 AppConfigStore.schedule_save 一样），退出前 flush()。
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app_launcher.core.config_store import normalize_path
+
+USAGE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "config", "usage_stats.json"
+)
+USAGE_FORMAT = 1
+
+# 同一指令连续选同一个应用几次算“确认”
+CONFIRM_COUNT = 2
+
+# 启动耗时滑动平均里新一次的权重
+LAUNCH_MS_ALPHA = 0.3
+
+
+def normalize_query(text: str) -> str:
+    """指令缓存的 key：去空白 + 小写（和 matcher 的文本匹配一致）"""
+    return "".join((text or "").split()).lower()
+
+
+class UsageStore:
+    """
+    文件格式（紧凑，一个应用 / 一条指令一个短数组）：
+    {
+      "format": 1,
+      "apps":    {"c:/xx/wechat.exe": [衰减分数, 最后启动时间, 总启动次数, 启动耗时平均 ms], ...},
+      "queries": {"打开微信": ["c:/xx/wechat.exe", 连续选中次数, 最后使用时间], ...}
+    }
+    分数存的是“最后启动那一刻”的值，读的时候再按经过的时间衰减。
+    启动耗时没量过（旧文件只有前三项）就是 null。
+    """
+
+    def __init__(self, path: str = None, half_life_days: float = 14.0, boost_weight: float = 0.1,
+                 max_queries: int = 5000, write_behind_delay: float = 2.0):
+        """
+        :param half_life_days: 启动计数的半衰期（天）
+        :param boost_weight:   排序时最多加多少分（相似度是 0~1 的余弦）
+        :param max_queries:    最多记多少条指令，超出按最后使用时间淘汰
+        """
+        self.path = os.path.abspath(path or USAGE_PATH)
+        self.half_life = max(half_life_days, 0.01) * 86400.0
+        self.boost_weight = boost_weight
+        self.max_queries = max_queries
+        self.write_behind_delay = write_behind_delay
+
+        self._lock = threading.RLock()
+        self._apps: Dict[str, List] = {}
+        self._queries: Dict[str, List] = {}
+        self._save_timer: Optional[threading.Timer] = None
+        self.load()
+
+    @classmethod
+    def from_settings(cls, settings, path: str = None) -> "UsageStore":
+        return cls(
+            path,
+            half_life_days=float(settings.get("usage_half_life_days") or 14.0),
+            boost_weight=float(settings.get("usage_boost_weight") or 0.0),
+        )
+
+    # ---------------- 读写文件 ----------------
+
+    def load(self):
+        """读取记录；文件不存在 / 损坏就从空开始"""
+        with self._lock:
+            self._apps, self._queries = {}, {}
+            if not os.path.exists(self.path):
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("format") != USAGE_FORMAT:
+                    return
+                self._apps = {k: list(v) for k, v in data.get("apps", {}).items()}
+                self._queries = {k: list(v) for k, v in data.get("queries", {}).items()}
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                print("usage stats ignored:", e)
+                self._apps, self._queries = {}, {}
+
+    def save(self):
+        """
+        先写临时文件再替换。整个过程都在锁里，flush 和防抖定时器不会同时写；
+        临时文件名带进程号 / 线程号，守护进程和悬浮窗共用 usage_stats.json 也不会写到同一个临时文件
+        """
+        with self._lock:
+            self._cancel_timer()
+            data = {"format": USAGE_FORMAT, "apps": self._apps, "queries": self._queries}
+            text = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self.path)
+
+    def schedule_save(self):
+        """防抖写入：连续启动时只在停下来 write_behind_delay 秒后写一次"""
+        with self._lock:
+            self._cancel_timer()
+            timer = threading.Timer(self.write_behind_delay, self._timer_save)
+            timer.daemon = True
+            self._save_timer = timer
+            timer.start()
+
+    def _timer_save(self):
+        with self._lock:
+            if self._save_timer is None or threading.current_thread() is not self._save_timer:
+                return
+            self._save_timer = None
+            self.save()
+
+    def _cancel_timer(self):
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+            self._save_timer = None
+
+    def flush(self):
+        """有待写入的防抖保存就立即写（退出前调用）"""
+        with self._lock:
+            if self._save_timer is None:
+                return
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self._apps, self._queries = {}, {}
+        self.save()
+
+    # ---------------- 记录 ----------------
+
+    def _decayed(self, entry: List, now: float) -> float:
+        score, last = entry[0], entry[1]
+        return score * math.pow(0.5, max(now - last, 0.0) / self.half_life)
+
+    def record_launch(self, exe_path: str, query: str = None, now: float = None, launch_ms: float = None):
+        """
+        启动了一个应用（成功之后调用）：
+        :param query:     用户输入的原始指令；给了就更新指令缓存
+        :param launch_ms: 这次启动的耗时（LaunchResult.elapsed_ms）；给了就更新滑动平均
+        """
+        if not exe_path:
+            return
+        now = time.time() if now is None else now
+        key = normalize_path(exe_path)
+        with self._lock:
+            entry = self._apps.get(key)
+            if entry is None:
+                self._apps[key] = [1.0, now, 1, launch_ms]
+            else:
+                avg_ms = entry[3] if len(entry) > 3 else None
+                if launch_ms is not None:
+                    avg_ms = launch_ms if avg_ms is None else avg_ms + LAUNCH_MS_ALPHA * (launch_ms - avg_ms)
+                self._apps[key] = [self._decayed(entry, now) + 1.0, now, int(entry[2]) + 1, avg_ms]
+
+            q = normalize_query(query)
+            if q:
+                prev = self._queries.pop(q, None)  # pop 再插入：dict 顺序就是最近使用顺序
+                count = int(prev[1]) + 1 if prev is not None and prev[0] == key else 1
+                self._queries[q] = [key, count, now]
+                while len(self._queries) > self.max_queries:
+                    del self._queries[next(iter(self._queries))]
+        self.schedule_save()
+
+    # ---------------- 查询 ----------------
+
+    def frequency(self, exe_path: str, now: float = None) -> float:
+        """衰减后的启动计数"""
+        entry = self._apps.get(normalize_path(exe_path))
+        if entry is None:
+            return 0.0
+        return self._decayed(entry, time.time() if now is None else now)
+
+    def usage_boost(self, exe_path: str, now: float = None) -> float:
+        """
+        排序加分：boost_weight * f / (f + 5)，f 是衰减计数。
+        用过一次约 0.17 * weight，每天几十次接近 weight，不会无限增长压过相似度。
+        """
+        if self.boost_weight <= 0:
+            return 0.0
+        f = self.frequency(exe_path, now)
+        return self.boost_weight * f / (f + 5.0) if f > 0 else 0.0
+
+    def boosts(self, exe_paths, now: float = None) -> Dict[str, float]:
+        """一次算一批（rank 里用，只取一次时间）"""
+        now = time.time() if now is None else now
+        return {p: self.usage_boost(p, now) for p in exe_paths}
+
+    def cached_choice(self, query: str) -> Optional[str]:
+        """这句指令确认过的应用路径（规范化后的）；没有 / 还没确认返回 None"""
+        entry = self._queries.get(normalize_query(query))
+        if entry is None or int(entry[1]) < CONFIRM_COUNT:
+            return None
+        return entry[0]
+
+    def top_apps(self, n: int = 10, now: float = None) -> List[Tuple[str, float]]:
+        """衰减计数最高的 n 个应用 [(规范化路径, 分数), ...]（诊断用）"""
+        now = time.time() if now is None else now
+        with self._lock:
+            scored = [(k, self._decayed(v, now)) for k, v in self._apps.items()]
+        scored.sort(key=lambda x: x[1], reverse=True)
+        return scored[:n]
+
+    def launch_time(self, exe_path: str) -> Optional[float]:
+        """这个应用启动耗时的滑动平均（ms）；没量过返回 None"""
+        entry = self._apps.get(normalize_path(exe_path))
+        if entry is None or len(entry) < 4:
+            return None
+        return entry[3]
+
+    def slowest_apps(self, n: int = 10) -> List[Tuple[str, float]]:
+        """启动耗时平均最长的 n 个应用 [(规范化路径, ms), ...]（诊断用）"""
+        with self._lock:
+            timed = [(k, v[3]) for k, v in self._apps.items() if len(v) > 3 and v[3] is not None]
+        timed.sort(key=lambda x: x[1], reverse=True)
+        return timed[:n]
@@ -1,13 +1,12 @@
 # app_launcher/gui/app_config_dialog.py
 # -*- coding: utf-8 -*-
 
+import contextlib
 from typing import List  # 类型注解（可选）
-import numpy as np  # 用来构造空向量
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtWidgets import QHeaderView
 import os
 from app_launcher.core.config_store import AppConfigStore
-from app_launcher.core.desktop_scanner import scan_desktop_executables
 from app_launcher.core.matcher import AppMatcher
 
 class AliasManagerDialog(QtWidgets.QDialog):
@@ -174,13 +173,16 @@ class AliasManagerDialog(QtWidgets.QDialog):
 # app_launcher/gui/app_config_dialog.py
 # -*- coding: utf-8 -*-
 
-import numpy as np  # 用来构造空向量
 from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtWidgets import QHeaderView
 
+from app_launcher.core.app_settings import AppSettings
 from app_launcher.core.config_store import AppConfigStore
-from app_launcher.core.desktop_scanner import scan_desktop_executables
+from app_launcher.core.app_sources import AppIndexer
 from app_launcher.core.matcher import AppMatcher
+from app_launcher.gui.app_table_model import AppTableModel
+from app_launcher.gui.rebuild_worker import CatalogRebuildWorker
+from app_launcher.gui.scan_worker import DesktopScanWorker
 
 
 class AliasManagerDialog(QtWidgets.QDialog):
@@ -267,18 +269,29 @@ class AliasManagerDialog(QtWidgets.QDialog):
 class AppConfigDialog(QtWidgets.QDialog):
     """
     管理启动 App 列表的对话框：
-    - 顶部：添加 + 扫描桌面 + 删除选中软件 + 初始化(清空)
-    - 中间：表格（名称 + 路径），双击可修改
+    - 顶部：添加 + 扫描应用 + 删除选中软件 + 初始化(清空)
+    - 中间：过滤框 + 表格（名称 + 路径，AppTableModel，只画看得见的行），双击可修改
     - 右键名称列：管理别名... / 删除此软件
     - 底部：保存 / 取消
+
+    每次 store.save() 都会带出一份 ChangeSet，有改动才在后台重建嵌入；
+    批量操作（扫描、多选删除）放在 store.batch() 里，只写一次文件、只重建一次；
+    表格里直接编辑名称 / 路径走防抖写入（停下来 1 秒后自动保存）。
     """
 
+    # store 保存后发出（可能来自防抖定时器线程，经信号转回 GUI 线程）
+    store_saved = QtCore.pyqtSignal(object)
+
     def __init__(self, store: AppConfigStore, matcher: AppMatcher, parent=None):
         super().__init__(parent)
 
         self.store = store           # 配置存储对象
         self.matcher = matcher       # 匹配器对象（里面有嵌入和缓存）
-        self._updating_table = False # 标记：是否正在批量更新表格
+        self._rebuild_worker = None  # 后台重建嵌入的线程
+        self._scan_worker = None     # 后台扫描应用的线程
+        self._scan_auto_save = False # 这一轮扫描结束后是否保存
+        self._scan_changed = False   # 这一轮扫描是否改过 store
+        self._scan_reconcile = False # 这一轮扫描结束时是否按完整候选列表补回缺的应用
 
         self.setWindowTitle("设置启动 App")
         self.resize(800, 500)
@@ -293,6 +306,10 @@ class AppConfigDialog(QtWidgets.QDialog):
 
         self._init_ui()           # 初始化界面
         self._load_from_store()   # 先把现有配置加载到表格
+
+        self.store_saved.connect(self._on_store_saved)
+        self._store_listener = self.store_saved.emit  # 留一份引用，关闭时才能取消注册
+        self.store.add_listener(self._store_listener)
         #self._scan_desktop_auto() # 对话框打开时自动扫描一次桌面（追加新应用）
 
     def _init_ui(self):
@@ -303,7 +320,7 @@ class AppConfigDialog(QtWidgets.QDialog):
         top_layout = QtWidgets.QHBoxLayout()
 
         self.btn_add = QtWidgets.QPushButton("添加")              # 手动添加
-        self.btn_scan = QtWidgets.QPushButton("扫描桌面")        # 扫描桌面
+        self.btn_scan = QtWidgets.QPushButton("扫描应用")        # 扫描桌面 / 开始菜单 / ...
         self.btn_delete = QtWidgets.QPushButton("删除选中软件")   # ★ 新增：删除软件
         self.btn_reset = QtWidgets.QPushButton("初始化(清空)")    # 清空所有
 
@@ -313,13 +330,19 @@ class AppConfigDialog(QtWidgets.QDialog):
         top_layout.addWidget(self.btn_reset)
         top_layout.addStretch()
 
+        # ---------- 过滤框 ----------
+        self.filter_edit = QtWidgets.QLineEdit()
+        self.filter_edit.setPlaceholderText("输入名称或路径关键字进行过滤")
+        self.filter_edit.setClearButtonEnabled(True)
+
         # ---------- 中间表格 ----------
-        self.table = QtWidgets.QTableWidget()
-        self.table.setColumnCount(2)
-        self.table.setHorizontalHeaderLabels(["应用名称", "可执行路径"])
+        self.model = AppTableModel(self.store, editable=True, parent=self)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.model)
 
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setResizeContentsPrecision(0)  # 只按看得见的行算宽度，不遍历所有行
         header.setSectionResizeMode(1, QHeaderView.Stretch)
 
         self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
@@ -332,13 +355,27 @@ class AppConfigDialog(QtWidgets.QDialog):
         self.table.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self.on_table_context_menu)
 
+        # ---------- 重建嵌入进度（后台进行，平时隐藏） ----------
+        self.rebuild_bar = QtWidgets.QWidget()
+        rebuild_layout = QtWidgets.QHBoxLayout(self.rebuild_bar)
+        rebuild_layout.setContentsMargins(0, 0, 0, 0)
+        self.rebuild_label = QtWidgets.QLabel("正在更新别名向量...")
+        self.rebuild_progress = QtWidgets.QProgressBar()
+        self.btn_cancel_rebuild = QtWidgets.QPushButton("取消")
+        rebuild_layout.addWidget(self.rebuild_label)
+        rebuild_layout.addWidget(self.rebuild_progress, 1)
+        rebuild_layout.addWidget(self.btn_cancel_rebuild)
+        self.rebuild_bar.hide()
+
         # ---------- 底部按钮 ----------
         btn_box = QtWidgets.QDialogButtonBox(
             QtWidgets.QDialogButtonBox.Save | QtWidgets.QDialogButtonBox.Cancel
         )
 
         main_layout.addLayout(top_layout)
+        main_layout.addWidget(self.filter_edit)
         main_layout.addWidget(self.table)
+        main_layout.addWidget(self.rebuild_bar)
         main_layout.addWidget(btn_box)
 
         # ---------- 信号 ----------
@@ -346,8 +383,9 @@ class AppConfigDialog(QtWidgets.QDialog):
         self.btn_scan.clicked.connect(self.on_scan_clicked)
         self.btn_delete.clicked.connect(self.on_delete_clicked)  # 删除软件
         self.btn_reset.clicked.connect(self.on_reset_clicked)    # 初始化清空
+        self.btn_cancel_rebuild.clicked.connect(self.on_cancel_rebuild_clicked)
 
-        self.table.itemChanged.connect(self.on_item_changed)
+        self.filter_edit.textChanged.connect(self.model.set_filter)  # 边输入边过滤
         btn_box.accepted.connect(self.on_save)
         btn_box.rejected.connect(self.reject)
 
@@ -369,17 +407,20 @@ class AppConfigDialog(QtWidgets.QDialog):
         if reply != QtWidgets.QMessageBox.Yes:
             return
 
-        # 1) 清空内存中的 app 列表
-        self.store.apps = []
-        # 2) 保存到配置文件
+        # 正在后台扫描 / 重建的结果已经没用了
+        self._scan_auto_save = False
+        self._stop_scan()
+        self._cancel_rebuild()
+
+        # 1) 清空 matcher 中的向量和缓存（发布一个空快照）
+        self.matcher.clear()
+
+        # 2) 清空 app 列表并保存到配置文件
+        self.store.clear_apps()
         self.store.save()
 
-        # 3) 清空 matcher 中的向量和缓存
-        self.matcher.alias_vectors = np.zeros((0, 1), dtype=np.float32)
-        self.matcher.alias_meta = []
-        if hasattr(self.matcher, "cache"):
-            self.matcher.cache.cache.clear()
-            self.matcher.cache.save()
+        # 3) 丢掉各来源的快照，下次“扫描应用”把找到的所有东西都当成新增
+        AppIndexer.from_settings(AppSettings()).clear_snapshots()
 
         # 4) 刷新表格
         self._load_from_store()
@@ -387,7 +428,7 @@ class AppConfigDialog(QtWidgets.QDialog):
         QtWidgets.QMessageBox.information(
             self,
             "完成",
-            "已清空所有应用配置。\n你可以点击“扫描桌面”重新获取应用列表。",
+            "已清空所有应用配置。\n你可以点击“扫描应用”重新获取应用列表。",
         )
 
     def on_delete_clicked(self):
@@ -411,25 +452,14 @@ class AppConfigDialog(QtWidgets.QDialog):
         if reply != QtWidgets.QMessageBox.Yes:
             return
 
-        # 行号从大到小删，避免索引错乱
-        rows = sorted([idx.row() for idx in selected], reverse=True)
-
-        for row in rows:
-            if hasattr(self.store, "delete_app"):
-                self.store.delete_app(row)
-            else:
-                # 兼容：没有 delete_app 方法就直接 pop
-                if 0 <= row < len(self.store.apps):
-                    self.store.apps.pop(row)
+        # 表格行号（过滤后）换成 store 里的下标，从大到小删，避免索引错乱
+        indexes = sorted((self.model.store_index(idx.row()) for idx in selected), reverse=True)
 
-        # 删除软件会改变 app_index，所以缓存里的 (index, alias) 都不可靠了
-        if hasattr(self.matcher, "cache"):
-            self.matcher.cache.cache.clear()
-            self.matcher.cache.save()
-
-        # 保存配置 & 重建嵌入
-        self.store.save()
-        self.matcher.rebuild()
+        # 一个事务里删完，只写一次配置、只重建一次嵌入
+        with self.store.batch():
+            for store_index in indexes:
+                if store_index >= 0:
+                    self.store.delete_app(store_index)
 
         # 刷新表格
         self._load_from_store()
@@ -446,9 +476,9 @@ class AppConfigDialog(QtWidgets.QDialog):
         if not index.isValid():
             return
 
-        row = index.row()
+        row = self.model.store_index(index.row())  # 过滤后表格行号和 store 下标不一样
         col = index.column()
-        if col != 0:
+        if col != 0 or row < 0:
             return  # 只在第一列（名称列）弹菜单
 
         menu = QtWidgets.QMenu(self)
@@ -459,9 +489,8 @@ class AppConfigDialog(QtWidgets.QDialog):
         if action == act_alias:
             dlg = AliasManagerDialog(self.store, row, self)
             if dlg.exec_() == QtWidgets.QDialog.Accepted:
-                # 别名有变化，保存并重建嵌入
+                # 别名有变化，保存（有改动时会自动重建嵌入）
                 self.store.save()
-                self.matcher.rebuild()
                 self._load_from_store()
         elif action == act_delete:
             # 复用上面删除逻辑，但只删一行
@@ -475,77 +504,95 @@ class AppConfigDialog(QtWidgets.QDialog):
             if reply != QtWidgets.QMessageBox.Yes:
                 return
 
-            if hasattr(self.store, "delete_app"):
-                self.store.delete_app(row)
-            else:
-                if 0 <= row < len(self.store.apps):
-                    self.store.apps.pop(row)
-
-            if hasattr(self.matcher, "cache"):
-                self.matcher.cache.cache.clear()
-                self.matcher.cache.save()
-
+            self.store.delete_app(row)
             self.store.save()
-            self.matcher.rebuild()
             self._load_from_store()
 
     # ====== 加载 / 扫描 / 表格基础逻辑 ======
 
     def _load_from_store(self):
-        """从 store.apps 加载数据到表格"""
-        self._updating_table = True
-
-        apps = self.store.apps
-        self.table.setRowCount(len(apps))
-
-        for row, app in enumerate(apps):
-            aliases = app.get("aliases", [])
-            display_name = aliases[0] if aliases else app.get("base_name", app.get("id", ""))
-            exe_path = app.get("exe_path", "")
-
-            item_name = QtWidgets.QTableWidgetItem(display_name)
-            item_path = QtWidgets.QTableWidgetItem(exe_path)
-
-            self.table.setItem(row, 0, item_name)
-            self.table.setItem(row, 1, item_path)
-
-        self._updating_table = False
+        """store 改过之后刷新表格（只在末尾加了行时只插入新行，见 AppTableModel.refresh）"""
+        self.model.refresh()
 
     def _scan_desktop_auto(self):
         """对话框初始化时自动扫描一次桌面（追加新应用）"""
         self._add_desktop_candidates(auto_save=True)
 
-    def _add_desktop_candidates(self, auto_save: bool):
+    def _add_desktop_candidates(self, auto_save: bool, reconcile: bool = False):
         """
-        扫描桌面，把新路径追加到 store.apps：
-        - 不动原来已经存在的软件和别名
-        - 只根据 exe_path 去重
-        - auto_save=True 时：立即保存配置并重建嵌入（你要的“点完就生效”）
+        在后台增量扫描桌面、开始菜单、额外目录、XDG 应用目录（设置里的 index_sources，各来源同时扫，
+        只重新列 mtime 变了的目录），边扫边把新路径追加到表格：
+        - 已存在的软件和别名不动（只根据 exe_path 去重，规范化后比较，大小写 / 分隔符不同也算同一个）
+        - 扫描范围（最多几层 / 多少项 / 多少秒 / 排除规则）来自设置里的 scan_*，
+          代码仓库、node_modules 之类默认不进去；扫描中再点一次按钮可以提前停止，已找到的保留
+        - 完整扫完时：从所有来源消失、并且路径本身也已经不存在的软件删掉（打不开了）；
+          只是快捷方式被挪走、目标还在的保留
+        - auto_save=True 时：结束后保存一次配置，matcher 只为新增的别名计算向量（你要的“点完就生效”）
+        - reconcile=True（用户点“扫描应用”）：结束时按这次的完整候选列表补回 store 里没有的应用，
+          而不只是和上次快照比新增的那些；手动删掉的、热加载 / 删了 apps_config.json 丢掉的都能找回来
         """
-        existing_paths = {app.get("exe_path") for app in self.store.apps}
-
-        candidates = scan_desktop_executables()
-        if not candidates:
+        if self._scan_worker is not None:
             return
+        # 桌面监视触发的后台扫描正在跑：停掉它（它会在这一轮结束后重新排队），快照同一时间只由一轮扫描更新
+        DesktopScanWorker.cancel_all()
+        worker = DesktopScanWorker(AppIndexer.from_settings(AppSettings()))
+        worker.found.connect(self._on_scan_found)
+        worker.finished_scan.connect(self._on_scan_finished)
+        self._scan_worker = worker
+        self._scan_auto_save = auto_save
+        self._scan_reconcile = reconcile
+        self._scan_changed = False
+        self.btn_scan.setText("停止扫描")
+        worker.start()
+
+    def _on_scan_found(self, items):
+        """扫描中途送来的一批新候选：马上加进 store 和表格（结束时才保存）"""
+        if self.sender() is not self._scan_worker:
+            return  # 已经停止的旧一轮
+        # 已存在的不动，别名也不改（store 按规范化路径建了索引）
+        if self.store.add_scanned_apps(items):
+            self._scan_changed = True
+        self._load_from_store()
+        self.btn_scan.setText(f"停止扫描（已扫 {self._scan_worker.scan.entries_seen} 项）")
 
-        self._updating_table = True
+    def _on_scan_finished(self, delta, stop_reason: str):
+        if self.sender() is not self._scan_worker:
+            return
+        self._scan_worker = None
+        self.btn_scan.setText("扫描应用")
+        print(f"app scan: {delta.rescanned_dirs}/{delta.total_dirs} dirs rescanned, "
+              f"+{len(delta.added)} -{len(delta.removed)} {stop_reason}")
+
+        # auto_save=False 时不开事务（事务结束会自动写文件）
+        with self.store.batch() if self._scan_auto_save else contextlib.nullcontext():
+            if self._scan_reconcile and self.store.add_scanned_apps(delta.candidates):
+                self._scan_changed = True
+            if self.store.remove_vanished_apps(delta.removed):  # 没扫完时 removed 为空
+                self._scan_changed = True
+            if self._scan_changed and self._scan_auto_save:
+                # 立刻保存配置并更新嵌入 → 不用再手动点“保存”
+                self.store.save()
+        self._load_from_store()
 
-        added = False
-        for name, path in candidates:
-            if path in existing_paths:
-                continue  # 已存在的不动，别名也不改
-            app_id = name.replace(" ", "_")
-            self.store.add_app(app_id, path, name)
-            existing_paths.add(path)
-            added = True
+        reasons = {"max_entries": "检查的文件数达到了上限", "timeout": "扫描时间达到了上限"}
+        if stop_reason in reasons:
+            QtWidgets.QMessageBox.information(
+                self,
+                "扫描未完成",
+                f"{reasons[stop_reason]}，已添加找到的部分。\n"
+                "可以在 settings.json 里调整 scan_max_depth / scan_max_entries / "
+                "scan_timeout_seconds / scan_excludes。",
+            )
 
-        if added and auto_save:
-            # 立刻保存配置并重建嵌入 → 不用再手动点“保存”
+    def _stop_scan(self):
+        """停止后台扫描：已经加进 store 的保留，需要保存的现在就保存"""
+        if self._scan_worker is None:
+            return
+        self._scan_worker.cancel()
+        self._scan_worker = None
+        self.btn_scan.setText("扫描应用")
+        if self._scan_changed and self._scan_auto_save:
             self.store.save()
-            self.matcher.rebuild()
-
-        self._load_from_store()
-        self._updating_table = False
 
     def on_add_clicked(self):
         """
@@ -611,40 +658,85 @@ class AppConfigDialog(QtWidgets.QDialog):
 
         self.store.add_app(app_id, exe_path, display_name)
         self.store.save()
-        self.matcher.rebuild()
         self._load_from_store()
 
 
 
 
     def on_scan_clicked(self):
-        """点击“扫描桌面”按钮：再次扫描桌面并追加新应用"""
-        # 这里 auto_save=True：扫描到新软件就立即写配置 + 重建嵌入
-        self._add_desktop_candidates(auto_save=True)
-
-    def on_item_changed(self, item: QtWidgets.QTableWidgetItem):
-        """用户修改了表格中的名称或路径"""
-        if self._updating_table:
+        """点击“扫描应用”按钮：再次扫描各来源并追加新应用；扫描中点击则停止"""
+        if self._scan_worker is not None:
+            self._stop_scan()
             return
-
-        row = item.row()
-        name_item = self.table.item(row, 0)
-        path_item = self.table.item(row, 1)
-        if name_item is None or path_item is None:
-            return
-
-        display_name = name_item.text().strip()
-        exe_path = path_item.text().strip()
-        self.store.update_app(row, display_name, exe_path)
+        # 这里 auto_save=True：扫描结束就立即写配置 + 更新嵌入
+        self._add_desktop_candidates(auto_save=True, reconcile=True)
 
     def on_save(self):
         """
         点击“保存”按钮：
         - 把当前 store.apps 写回 apps_config.json
-        - 调 matcher.rebuild() 重建所有别名的嵌入
+        - 有改动时后台重建别名的嵌入（对话框关掉后继续跑，跑完自动替换，期间搜索照常可用）
         （手动添加 / 扫描已经自动保存了，这里主要是双击编辑名称/路径这种情况）
         """
         self.store.save()
-        self.matcher.rebuild()
         self.accept()
 
+    def done(self, result: int):
+        """关闭对话框（保存 / 取消 / 关窗口）：停止扫描，还没写的防抖保存立即写掉，再取消监听"""
+        self._stop_scan()
+        self.store.flush()
+        self.store.remove_listener(self._store_listener)
+        super().done(result)
+
+    def _on_store_saved(self, changes):
+        """store 保存了：有改动才更新嵌入（按改动增量更新）"""
+        if changes:
+            self._start_rebuild(changes)
+
+    # ====== 后台重建嵌入 ======
+
+    def _start_rebuild(self, changes=None):
+        """
+        在后台线程里重建嵌入，进度显示在表格下方：
+        - 给了 ChangeSet 只编码新增的别名，其余复用当前向量
+        - 上一轮还没跑完就取消它，用最新的配置重新开始
+        - 跑完后 matcher 一次性切换到新结果，之前的搜索继续用旧结果
+        """
+        self._cancel_rebuild()
+
+        worker = CatalogRebuildWorker(self.matcher, changes)
+        worker.progress.connect(self._on_rebuild_progress)
+        worker.done.connect(self._on_rebuild_done)
+        self._rebuild_worker = worker
+
+        self.rebuild_progress.setRange(0, 0)  # 先显示忙碌状态，收到进度后再换成百分比
+        self.rebuild_label.setText("正在更新别名向量...")
+        self.btn_cancel_rebuild.setEnabled(True)
+        self.rebuild_bar.show()
+        worker.start()
+
+    def _cancel_rebuild(self):
+        if self._rebuild_worker is not None:
+            self._rebuild_worker.cancel()
+            self._rebuild_worker = None
+
+    def on_cancel_rebuild_clicked(self):
+        """取消后台重建：搜索继续使用重建前的结果，下次保存 / 修改时会重新计算"""
+        self._cancel_rebuild()
+        self.rebuild_bar.hide()
+
+    def _on_rebuild_progress(self, done: int, total: int):
+        if self.sender() is not self._rebuild_worker:
+            return  # 已经取消的旧一轮
+        self.rebuild_progress.setRange(0, max(total, 1))
+        self.rebuild_progress.setValue(done)
+        self.rebuild_label.setText(f"正在更新别名向量 {done}/{total}")
+
+    def _on_rebuild_done(self, installed: bool, message: str):
+        if self.sender() is not self._rebuild_worker:
+            return
+        self._rebuild_worker = None
+        self.rebuild_bar.hide()
+        if not installed and message != "已取消":
+            QtWidgets.QMessageBox.warning(self, "更新别名向量失败", message)
+
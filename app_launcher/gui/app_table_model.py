@@ -0,0 +1,123 @@
+# app_launcher/gui/app_table_model.py
+# -*- coding: utf-8 -*-
+
+"""
+应用列表的表格模型（查询对话框、设置启动 App 对话框共用）。
+
+以前每次刷新 / 每输入一个字都给每个单元格 new 一个 QTableWidgetItem，几千个应用要好几秒。
+现在 QTableView 只对屏幕上看得见的行调用 data()，模型里只存一份 app 引用列表：
+- 过滤走 store.search（预先小写好的文本，关键字变长时只在上次结果里筛），不用 QSortFilterProxyModel
+  逐行回调 Python
+- refresh() 时如果只是在末尾多了几行（扫描中途一批批加进来），只插入新行，选中和滚动位置不变
+"""
+
+from typing import Dict, List
+
+from PyQt5 import QtCore
+
+from app_launcher.core.config_store import AppConfigStore
+
+
+def display_name(app: Dict) -> str:
+    """表格里显示的名称：第一个别名，没有就是原始名称 / id"""
+    aliases = app.get("aliases") or []
+    return aliases[0] if aliases else app.get("base_name") or app.get("id", "")
+
+
+class AppTableModel(QtCore.QAbstractTableModel):
+    HEADERS = ["应用名称", "可执行路径"]
+    NAME_COLUMN, PATH_COLUMN = 0, 1
+
+    def __init__(self, store: AppConfigStore, editable: bool = False, parent=None):
+        """
+        :param store:    AppConfigStore
+        :param editable: 是否允许双击编辑名称 / 路径（编辑后走 store.update_app + 防抖保存）
+        """
+        super().__init__(parent)
+        self.store = store
+        self.editable = editable
+        self.keyword = ""
+        self._rows: List[Dict] = list(store.apps)
+
+    # ---------------- Qt 接口 ----------------
+
+    def rowCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QtCore.QModelIndex, role=QtCore.Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole, QtCore.Qt.ToolTipRole):
+            app = self._rows[index.row()]
+            if index.column() == self.NAME_COLUMN:
+                return display_name(app) if role != QtCore.Qt.ToolTipRole else None
+            return app.get("exe_path", "")
+        return None
+
+    def headerData(self, section: int, orientation, role=QtCore.Qt.DisplayRole):
+        if role == QtCore.Qt.DisplayRole and orientation == QtCore.Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index: QtCore.QModelIndex):
+        flags = super().flags(index)
+        if self.editable and index.isValid():
+            flags |= QtCore.Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index: QtCore.QModelIndex, value, role=QtCore.Qt.EditRole) -> bool:
+        """编辑了名称或路径：写进 store，连续编辑时停下来一会儿才保存"""
+        if role != QtCore.Qt.EditRole or not index.isValid():
+            return False
+        app = self._rows[index.row()]
+        store_index = self.store.index_of(app)
+        if store_index < 0:
+            return False
+        name = display_name(app)
+        path = app.get("exe_path", "")
+        text = str(value).strip()
+        if index.column() == self.NAME_COLUMN:
+            name = text
+        else:
+            path = text
+        self.store.update_app(store_index, name, path)
+        self.store.schedule_save()
+        self.dataChanged.emit(self.index(index.row(), 0), self.index(index.row(), len(self.HEADERS) - 1))
+        return True
+
+    # ---------------- 过滤 / 刷新 ----------------
+
+    def set_filter(self, keyword: str):
+        """只显示名称 / 路径包含关键字的应用（不区分大小写；空关键字显示全部）"""
+        self.keyword = keyword or ""
+        self.refresh()
+
+    def refresh(self):
+        """store 改过之后重新取一遍行：只是末尾多了行就插入，否则整体重置"""
+        rows = self.store.search(self.keyword)
+        old = self._rows
+        if len(rows) >= len(old) and all(a is b for a, b in zip(old, rows)):
+            if len(rows) > len(old):
+                self.beginInsertRows(QtCore.QModelIndex(), len(old), len(rows) - 1)
+                self._rows = rows
+                self.endInsertRows()
+            elif old:
+                # 行没变，内容可能改了（比如管理别名后名称变了）
+                self._rows = rows
+                self.dataChanged.emit(self.index(0, 0), self.index(len(rows) - 1, len(self.HEADERS) - 1))
+            return
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def app_at(self, row: int) -> Dict:
+        return self._rows[row]
+
+    def store_index(self, row: int) -> int:
+        """表格第 row 行在 store.apps 里的下标（过滤后两者不一样）"""
+        if 0 <= row < len(self._rows):
+            return self.store.index_of(self._rows[row])
+        return -1
@@ -6,37 +6,64 @@
 - 无边框、可拖动、置顶
 - 右键菜单：设置、设置启动App、查询、最小化到托盘、退出
 - 支持托盘图标：右键托盘菜单 & 左键双击显示/隐藏
+- 输入框边输入边从历史里补全（QueryHistory），Tab 直接启动第一条补全对应的应用
 """
 
-import os  # 启动应用 / 文件
 import sys  # 程序入口参数
 
 from PyQt5 import QtWidgets, QtCore, QtGui
 
+from app_launcher.core.app_settings import AppSettings
 from app_launcher.core.config_store import AppConfigStore
+from app_launcher.core.config_watcher import ConfigFileWatcher
+from app_launcher.core.app_sources import AppIndexer
+from app_launcher.core.desktop_scanner import ScanOptions
+from app_launcher.core.desktop_watcher import DesktopWatcher
 from app_launcher.core.sentence_encoder import QwenSentenceEncoder
 from app_launcher.core.matcher import AppMatcher
 from app_launcher.core.alias_extractor import generate_alias
+from app_launcher.core.alias_model import AliasModelManager
+from app_launcher.core.query_history import QueryHistory
+from app_launcher.core.usage_store import UsageStore
+from app_launcher.utils.memory import current_rss_bytes, format_mb
 
 from app_launcher.gui.tray import AppTrayIcon
 from app_launcher.gui.settings_dialog import SettingsDialog
 from app_launcher.gui.app_config_dialog import AppConfigDialog
 from app_launcher.gui.query_dialog import QueryDialog
+from app_launcher.gui.launch_worker import LaunchWorker
+from app_launcher.gui.rebuild_worker import CatalogRebuildWorker
+from app_launcher.gui.scan_worker import DesktopScanWorker
+from app_launcher.gui.search_worker import SearchWorker
 
 
 class FloatingLauncher(QtWidgets.QWidget):
     """悬浮窗主窗口"""
 
     MAX_RESULTS = 3  # 搜索时最多输出几个候选
+    MAX_COMPLETIONS = 5  # 输入框下面最多显示几条历史补全
+    DESKTOP_RESCAN_RETRY_MS = 2000  # 桌面有变化但别的扫描在跑：多久后再试
+
+    # 监视线程发现 apps_config.json 被外部修改，转到 GUI 线程处理
+    config_file_changed = QtCore.pyqtSignal()
+    # 桌面监视线程发现桌面有新建 / 删除 / 改名（参数是变化的目录集合）
+    desktop_changed = QtCore.pyqtSignal(object)
 
     def __init__(self, parent=None):
         """构造函数"""
         super().__init__(parent)
 
         # --- 核心数据对象 ---
+        self.settings = AppSettings()              # 程序设置（推理精度等）
         self.store = AppConfigStore()              # 配置存储
+        self.model_manager = AliasModelManager.instance()  # 模型（空闲会自动卸载）
         self.encoder = QwenSentenceEncoder()       # 句向量编码器（此处建议先用轻量版本）
-        self.matcher = AppMatcher(self.encoder, self.store)  # 匹配器
+        self.usage = UsageStore.from_settings(self.settings)  # 启动记录（常用加分 / 指令缓存）
+        self.matcher = AppMatcher(self.encoder, self.store, self.usage)  # 匹配器
+        self.history = QueryHistory.from_settings(self.settings)  # 历史指令前缀树（输入补全）
+        self._last_query = ""                      # 最近一次搜索的原始指令（记启动记录用）
+        self._last_alias = ""                      # 最近一次别名模型抽出来的别名
+        self._completions = []                     # 当前输入对应的历史补全
 
         # 悬浮窗是否逻辑上的“显示”状态
         self._show_floating = True
@@ -48,6 +75,27 @@ class FloatingLauncher(QtWidgets.QWidget):
         self._init_ui()
         # 创建托盘图标
         self._init_tray()
+
+        # 外部修改 apps_config.json 时热加载，只更新改动的别名
+        self.config_file_changed.connect(self.on_config_file_changed)
+        self.config_watcher = ConfigFileWatcher(self.store.config_path, self.config_file_changed.emit)
+        self.config_watcher.start()
+        QtWidgets.qApp.aboutToQuit.connect(self.config_watcher.stop)
+        QtWidgets.qApp.aboutToQuit.connect(self.usage.flush)
+        QtWidgets.qApp.aboutToQuit.connect(self.history.flush)
+
+        # 设置里打开了 watch_desktop：桌面有变化就自动增量扫描、更新应用列表
+        self._rebuild_worker = None  # 热加载 / 桌面变化触发的向量更新，新一轮开始时取消上一轮
+        self.desktop_watcher = None
+        self._desktop_scan_worker = None
+        self._desktop_rescan_pending = False
+        # 别的扫描（设置启动 App 对话框里的）在跑时，隔一会儿再看能不能开始
+        self._desktop_rescan_timer = QtCore.QTimer(self)
+        self._desktop_rescan_timer.setSingleShot(True)
+        self._desktop_rescan_timer.setInterval(self.DESKTOP_RESCAN_RETRY_MS)
+        self._desktop_rescan_timer.timeout.connect(self._retry_desktop_rescan)
+        if self.settings.get("watch_desktop"):
+            self._start_desktop_watcher()
     """
     def _init_ui(self):
         #初始化悬浮窗界面
@@ -182,6 +230,12 @@ class FloatingLauncher(QtWidgets.QWidget):
         self.input_edit.setFixedHeight(32)
         self.input_edit.setMinimumWidth(300)
 
+        # 历史补全：每次输入都从前缀树里取（不让 QCompleter 自己过滤），弹出列表
+        self.completion_model = QtGui.QStandardItemModel(self)
+        self.completer = QtWidgets.QCompleter(self.completion_model, self)
+        self.completer.setCompletionMode(QtWidgets.QCompleter.UnfilteredPopupCompletion)
+        self.completer.setWidget(self.input_edit)
+
         self.btn_search = QtWidgets.QPushButton("搜索")
         self.btn_search.setFixedHeight(32)
         self.btn_search.setCursor(QtGui.QCursor(QtCore.Qt.PointingHandCursor))
@@ -222,6 +276,12 @@ class FloatingLauncher(QtWidgets.QWidget):
         # 信号连接
         self.btn_search.clicked.connect(self.on_search_clicked)
         self.input_edit.returnPressed.connect(self.on_search_clicked)
+        self.input_edit.textEdited.connect(self.on_input_edited)
+        self.completer.activated[str].connect(self.input_edit.setText)
+        # Tab 启动第一条补全：输入框和补全弹窗上都要拦（弹窗显示时按键先到弹窗）；
+        # 后装的过滤器先执行，所以能赶在 QCompleter 自己处理 Tab 之前
+        self.input_edit.installEventFilter(self)
+        self.completer.popup().installEventFilter(self)
         self.result_list.itemDoubleClicked.connect(self.on_result_double_clicked)
         self.btn_close_results.clicked.connect(self.on_close_results)
 
@@ -328,14 +388,43 @@ class FloatingLauncher(QtWidgets.QWidget):
     # ---------------- 右键菜单中的各个动作 ----------------
     def open_settings_dialog(self):
         """打开“设置”对话框"""
-        dlg = SettingsDialog(self, show_floating=self._show_floating)
+        dlg = SettingsDialog(
+            self,
+            show_floating=self._show_floating,
+            precision=self.settings.get("inference_precision"),
+            idle_unload_minutes=self.settings.get("idle_unload_minutes"),
+            footprint_text=self._memory_footprint_text(),
+        )
         if dlg.exec_() == QtWidgets.QDialog.Accepted:
+            idle_minutes = dlg.get_idle_unload_minutes()
+            if idle_minutes != self.settings.get("idle_unload_minutes"):
+                self.settings.set("idle_unload_minutes", idle_minutes)
+                self.settings.save()
+                self.model_manager.set_idle_unload_minutes(idle_minutes)
+            precision = dlg.get_precision()
+            if precision != self.settings.get("inference_precision"):
+                self.settings.set("inference_precision", precision)
+                self.settings.save()
+                QtWidgets.QMessageBox.information(
+                    self, "提示", "推理精度已保存，重启 RocketDesk 后生效。"
+                )
             should_show = dlg.get_result()
             if should_show:
                 self.show_floating()
             else:
                 self.hide_floating()
 
+    def _memory_footprint_text(self) -> str:
+        """设置对话框里显示的内存占用说明"""
+        mgr = self.model_manager
+        if mgr.is_loaded:
+            model_text = f"已加载（{mgr.precision}），模型权重 {format_mb(mgr.resident_bytes())}"
+        elif mgr.is_loading:
+            model_text = "加载中..."
+        else:
+            model_text = "已释放（下次搜索时自动加载）"
+        return f"模型：{model_text}\n进程常驻内存：{format_mb(current_rss_bytes())}"
+
     def open_app_config_dialog(self):
         """打开“设置启动 App”对话框"""
         dlg = AppConfigDialog(self.store, self.matcher, self)
@@ -352,6 +441,22 @@ class FloatingLauncher(QtWidgets.QWidget):
         if not text:
             QtWidgets.QMessageBox.information(self, "提示", "请输入指令，例如：打开微信 / kakao 켜봐")
             return
+        self._last_query = text
+        self._last_alias = ""
+        self.completer.popup().hide()
+
+        # 0. 同一句指令之前确认过选哪个应用：直接给出，不调模型
+        cached = self.matcher.find_cached(text, k=self.MAX_RESULTS)
+        if cached:
+            self._show_candidates(cached)
+            return
+
+        # 模型因为空闲被卸载了：后台重新加载，这次先给文本匹配结果
+        if not self.model_manager.is_loaded:
+            self.model_manager.load_async()
+            candidates = self.matcher.find_lexical(text, k=self.MAX_RESULTS)
+            self._show_candidates(candidates, hint="（模型加载中，先显示文本匹配结果，稍后再搜索可获得语义匹配）")
+            return
 
         # 1. 用别名模型抽取 App 名
         try:
@@ -368,17 +473,26 @@ class FloatingLauncher(QtWidgets.QWidget):
             )
             return
 
+        self._last_alias = alias
+
         # 2. 调 matcher 做相似度搜索
         try:
-            candidates = self.matcher.find_top_k(alias, k=3)
+            candidates = self.matcher.find_top_k(alias, k=self.MAX_RESULTS)
         except Exception as e:
             print("matcher.find_top_k error:", e)
             QtWidgets.QMessageBox.warning(self, "错误", f"应用匹配失败：{e}")
             return
 
+        self._show_candidates(candidates)
+
+    def _show_candidates(self, candidates, hint: str = None):
+        """把候选列表渲染到结果区域；hint 不为空时在最上面加一行提示"""
         # 3. 渲染到列表
         self.result_list.clear()
 
+        if hint:
+            self.result_list.addItem(hint)
+
         if not candidates:
             self.result_list.addItem("（没有匹配到已配置的应用，请先到“设置启动 App”中添加）")
         else:
@@ -387,7 +501,9 @@ class FloatingLauncher(QtWidgets.QWidget):
                 match_alias = c.get("match_alias") or c.get("alias") or base_name
                 exe_path = c.get("exe_path") or c.get("path") or ""
                 score = c.get("score")
-                if score is None:
+                if c.get("cached"):
+                    score_text = "  (上次选择)"
+                elif score is None:
                     score_text = ""
                 else:
                     score_text = f" (score={float(score):.2f})"
@@ -410,9 +526,6 @@ class FloatingLauncher(QtWidgets.QWidget):
         # 5. 让窗口高度按内容更新
         self._update_size()
 
-
-
-
     def on_result_double_clicked(self, item: QtWidgets.QListWidgetItem):
         """双击列表某一项，打开对应路径"""
         data = item.data(QtCore.Qt.UserRole)
@@ -421,15 +534,240 @@ class FloatingLauncher(QtWidgets.QWidget):
         exe_path = data.get("exe_path")
         if not exe_path:
             return
-        if not os.path.exists(exe_path):
-            QtWidgets.QMessageBox.warning(self, "错误", f"路径不存在：\n{exe_path}")
+        self._launch_async(exe_path, data.get("base_name") or "", self._last_query, self._last_alias)
+
+    def _launch_async(self, exe_path: str, base_name: str, query: str, alias: str = ""):
+        """在后台线程里打开路径（网络路径检查 / ShellExecute 可能要好几秒），完成后回到 _on_launched"""
+        worker = LaunchWorker(exe_path, (base_name, query, alias), trusted=self.store.has_exe_path(exe_path))
+        worker.launched.connect(self._on_launched)
+        worker.start()
+
+    def _on_launched(self, result, context):
+        """LaunchWorker 启动完（GUI 线程）：失败弹窗，成功记录"""
+        base_name, query, alias = context
+        if not result.ok:
+            QtWidgets.QMessageBox.critical(self, "启动失败", result.error)
+            return
+        self._record_launch(result.exe_path, base_name, query, alias, result.elapsed_ms)
+
+    def _record_launch(self, exe_path: str, base_name: str, query: str, alias: str = "",
+                       launch_ms: float = None):
+        """
+        启动成功后记下来：
+        - UsageStore：常用的以后排前面；同一句指令连续选同一个应用后直接给出；启动耗时
+        - QueryHistory：以后输入这句指令 / 这个别名的开头就能补全
+        """
+        self.usage.record_launch(exe_path, query=query, launch_ms=launch_ms)
+        if query:
+            self.history.record(query, exe_path, base_name, alias=alias)
+
+    # ---------------- 历史补全 ----------------
+
+    def on_input_edited(self, text: str):
+        """每输入一个字：从前缀树取补全（微秒级），有就弹出列表"""
+        self._completions = self.history.complete(text, n=self.MAX_COMPLETIONS)
+        self.completion_model.clear()
+        for c in self._completions:
+            item = QtGui.QStandardItem(c.text)
+            item.setToolTip(f"→ {c.base_name}  {c.exe_path}（Tab 直接打开）")
+            self.completion_model.appendRow(item)
+        if self._completions:
+            self.completer.complete()
+        else:
+            self.completer.popup().hide()
+
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.KeyPress and event.key() == QtCore.Qt.Key_Tab \
+                and obj in (self.input_edit, self.completer.popup()) and self._completions:
+            self.launch_completion()
+            return True
+        return super().eventFilter(obj, event)
+
+    def launch_completion(self):
+        """
+        Tab：直接打开补全对应的应用（弹窗里选中了哪条就用哪条，否则第一条），不调模型。
+        """
+        popup = self.completer.popup()
+        row = 0
+        if popup.isVisible() and popup.currentIndex().isValid():
+            row = popup.currentIndex().row()
+        popup.hide()
+        if not 0 <= row < len(self._completions):
+            return
+        c = self._completions[row]
+        self.input_edit.setText(c.text)
+        self._completions = []
+        self._launch_async(c.exe_path, c.base_name, c.text)
+
+    # ---------------- 其他进程转发过来的命令 ----------------
+    def handle_remote_command(self, request: dict, reply) -> None:
+        """
+        处理第二个进程（例如快捷键脚本执行 rocketdesk "打开微信"）转发来的命令：
+        - {"cmd": "show"}：显示悬浮窗
+        - {"cmd": "run", "text": ..., "launch": true}：抽取别名 + 匹配，launch 时启动第一名
+        模型已经在本进程里热着，所以命令行调用只需要毫秒级。
+        抽取别名 + 匹配放在 SearchWorker、启动放在 LaunchWorker，都不占 GUI 线程；
+        处理完（可能是之后的某个时候）调用 reply(response: dict) 把结果回给调用方，只调用一次。
+        """
+        cmd = request.get("cmd")
+        if cmd == "show":
+            self.show_floating()
+            reply({"ok": True})
+            return
+        if cmd != "run":
+            reply({"ok": False, "error": f"未知命令：{cmd}"})
+            return
+
+        text = (request.get("text") or "").strip()
+        if not text:
+            reply({"ok": False, "error": "指令为空"})
+            return
+
+        candidates = self.matcher.find_cached(text, k=self.MAX_RESULTS)
+        if not candidates and not self.model_manager.is_loaded:
+            # 模型因为空闲被卸载了：和 on_search_clicked 一样后台重新加载，这次先用文本匹配，不卡住界面
+            self.model_manager.load_async()
+            candidates = self.matcher.find_lexical(text, k=self.MAX_RESULTS)
+            if not candidates:
+                reply({"ok": False, "error": "模型加载中，文本匹配没有结果，请稍后再试", "alias": ""})
+                return
+        if candidates:
+            self._finish_remote_command(request, text, "", candidates, reply)
+            return
+
+        worker = SearchWorker(self.matcher, text, k=self.MAX_RESULTS, context=(request, text, reply))
+        worker.searched.connect(self._on_remote_searched)
+        worker.start()
+
+    def _on_remote_searched(self, alias, candidates, error, context):
+        """SearchWorker 匹配完（GUI 线程）"""
+        request, text, reply = context
+        if error:
+            reply({"ok": False, "error": error, "alias": alias})
+        elif not alias:
+            reply({"ok": False, "error": "未能从输入中抽取有效的 App 名称", "alias": ""})
+        elif not candidates:
+            reply({"ok": False, "error": "没有匹配到已配置的应用", "alias": alias})
+        else:
+            self._finish_remote_command(request, text, alias, candidates, reply)
+
+    def _finish_remote_command(self, request: dict, text: str, alias: str, candidates, reply):
+        """有候选了：不启动就直接回复，否则后台启动第一名，启动完在 _on_remote_launched 里回复"""
+        top = candidates[0]
+        response = {
+            "ok": True,
+            "alias": alias,
+            "app": top.get("base_name"),
+            "exe_path": top.get("exe_path"),
+            "score": top.get("score"),
+            "launched": False,
+            "candidates": candidates,
+        }
+        if not request.get("launch", True):
+            reply(response)
             return
+        if top.get("lexical") and float(top.get("score") or 0) < 0.5:
+            # 模型还没加载好，文本匹配里别名都没完整出现在指令里：只返回候选，不冒险启动
+            response["ok"] = False
+            response["error"] = "模型加载中，没有可靠的匹配，请稍后再试"
+            reply(response)
+            return
+        exe_path = top.get("exe_path") or ""
+        worker = LaunchWorker(exe_path, (response, top.get("base_name") or "", text, alias, reply),
+                              trusted=self.store.has_exe_path(exe_path))
+        worker.launched.connect(self._on_remote_launched)
+        worker.start()
+
+    def _on_remote_launched(self, result, context):
+        """LaunchWorker 启动完（GUI 线程）：成功记录，把结果回给调用方"""
+        response, base_name, text, alias, reply = context
+        response["ok"] = result.ok
+        response["launched"] = result.ok
+        response["launch_ms"] = round(result.elapsed_ms, 1)
+        if result.ok:
+            self._record_launch(result.exe_path, base_name, text, alias, result.elapsed_ms)
+        else:
+            response["error"] = result.error
+        reply(response)
+
+    def on_config_file_changed(self):
+        """
+        apps_config.json 被外部修改：重新读取，和内存里的目录做 diff，
+        后台只编码新增的别名（程序自己保存写出的文件 reload_from_disk 会忽略）。
+        """
         try:
-            os.startfile(exe_path)
+            changes = self.store.reload_from_disk()
         except Exception as e:
-            QtWidgets.QMessageBox.critical(
-                self, "启动失败", f"无法打开：\n{exe_path}\n\n错误信息：{e}"
-            )
+            print("reload apps_config.json failed:", e)
+            return
+        if not changes:
+            return
+        print("apps_config.json changed:", changes.summary())
+        self._start_rebuild(changes)
+
+    def _start_rebuild(self, changes):
+        """
+        后台只为新增的别名计算向量；上一轮还没跑完就取消它（和 AppConfigDialog._start_rebuild 一样），
+        新一轮按最新的别名列表算，上一轮没编码完的别名也会包含在里面。
+        """
+        if self._rebuild_worker is not None:
+            self._rebuild_worker.cancel()
+        worker = CatalogRebuildWorker(self.matcher, changes)
+        worker.finished.connect(lambda w=worker: self._forget_rebuild(w))
+        self._rebuild_worker = worker
+        worker.start()
+
+    def _forget_rebuild(self, worker):
+        if self._rebuild_worker is worker:
+            self._rebuild_worker = None
+
+    def _start_desktop_watcher(self):
+        options = ScanOptions.from_settings(self.settings)
+        self.desktop_changed.connect(self.on_desktop_changed)
+        self.desktop_watcher = DesktopWatcher(
+            AppIndexer.from_settings(self.settings).roots(), self.desktop_changed.emit,
+            max_depth=options.max_depth, excludes=options.excludes,
+        )
+        self.desktop_watcher.start()
+        QtWidgets.qApp.aboutToQuit.connect(self.desktop_watcher.stop)
+
+    def on_desktop_changed(self, _dirs=None):
+        """
+        桌面 / 开始菜单等有变化：后台增量扫描各来源（快照里 mtime 没变的目录不会重新列），
+        扫完回到 GUI 线程把新增 / 消失的应用写进 store，matcher 在后台只为新别名计算向量。
+        上一轮还没扫完就记一下，扫完再来一轮；“设置启动 App”对话框正在扫描时也排队（快照文件是共用的）。
+        """
+        if self._desktop_scan_worker is not None:
+            self._desktop_rescan_pending = True
+            return
+        if DesktopScanWorker.busy():
+            self._desktop_rescan_pending = True
+            self._desktop_rescan_timer.start()
+            return
+        worker = DesktopScanWorker(AppIndexer.from_settings(self.settings))
+        worker.finished_scan.connect(self._on_desktop_scan_finished)
+        self._desktop_scan_worker = worker
+        worker.start()
+
+    def _retry_desktop_rescan(self):
+        if self._desktop_rescan_pending and self._desktop_scan_worker is None:
+            self._desktop_rescan_pending = False
+            self.on_desktop_changed()
+
+    def _on_desktop_scan_finished(self, delta, stop_reason: str):
+        self._desktop_scan_worker = None
+        if stop_reason == "cancelled":
+            # 被对话框的扫描顶掉了：找到的照样加上，等它扫完再补一轮
+            self._desktop_rescan_pending = True
+        changed = self.store.add_scanned_apps(delta.added) + self.store.remove_vanished_apps(delta.removed)
+        if changed:
+            changes = self.store.save()
+            print("desktop changed:", changes.summary() if changes else "", stop_reason)
+            if changes:
+                self._start_rebuild(changes)
+        if self._desktop_rescan_pending:
+            self._desktop_rescan_pending = False
+            self.on_desktop_changed()
 
     def on_close_results(self):
         """点击减号：收起搜索结果区域并缩回窗口高度"""
@@ -0,0 +1,44 @@
+# app_launcher/gui/launch_worker.py
+# -*- coding: utf-8 -*-
+
+"""
+在后台线程里启动应用（launch_backend.launch），不让网络路径的 stat / ShellExecute 卡住界面：
+- 启动完（成功或失败）发 launched(LaunchResult, context)，context 是调用方带的任意数据，原样带回
+- 悬浮窗关掉、结果列表清空了 worker 也会继续跑完（引用保存在 _running 里）
+"""
+
+from PyQt5 import QtCore
+
+from app_launcher.core.launch_backend import launch
+
+try:
+    import pythoncom  # ShellExecute 要求调用线程初始化过 COM
+except ImportError:
+    pythoncom = None
+
+
+class LaunchWorker(QtCore.QThread):
+    launched = QtCore.pyqtSignal(object, object)  # LaunchResult, context
+
+    # 正在跑的 worker，防止被回收
+    _running = set()
+
+    def __init__(self, exe_path: str, context=None, trusted: bool = False):
+        """:param trusted: exe_path 在应用列表里（见 launch_backend.launch）"""
+        super().__init__()
+        self.exe_path = exe_path
+        self.context = context
+        self.trusted = trusted
+        self.finished.connect(self._forget)
+
+    def start(self):
+        LaunchWorker._running.add(self)
+        super().start()
+
+    def run(self):
+        if pythoncom is not None:
+            pythoncom.CoInitialize()
+        self.launched.emit(launch(self.exe_path, trusted=self.trusted), self.context)
+
+    def _forget(self):
+        LaunchWorker._running.discard(self)
@@ -5,13 +5,14 @@ from PyQt5 import QtWidgets, QtCore
 from PyQt5.QtWidgets import QHeaderView
 
 from app_launcher.core.config_store import AppConfigStore
+from app_launcher.gui.app_table_model import AppTableModel
 
 
 class QueryDialog(QtWidgets.QDialog):
     """
     查询已配置应用：
     - 顶部：搜索框 + 查询按钮
-    - 下方：表格显示名称和路径
+    - 下方：表格显示名称和路径（AppTableModel，只画看得见的行）
     """
 
     def __init__(self, store: AppConfigStore, parent=None):
@@ -49,12 +50,14 @@ class QueryDialog(QtWidgets.QDialog):
         top_layout.addWidget(self.btn_search)
 
         # 表格显示结果
-        self.table = QtWidgets.QTableWidget()
-        self.table.setColumnCount(2)
-        self.table.setHorizontalHeaderLabels(["应用名称", "可执行路径"])
+        self.model = AppTableModel(self.store, editable=False, parent=self)
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
 
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # 名称列自适应
+        header.setResizeContentsPrecision(0)                          # 只按看得见的行算宽度，不遍历所有行
         header.setSectionResizeMode(1, QHeaderView.Stretch)          # 路径列拉伸
 
         # 把控件加到根布局
@@ -64,38 +67,9 @@ class QueryDialog(QtWidgets.QDialog):
         # 信号连接
         self.btn_search.clicked.connect(self.do_search)
         self.search_edit.returnPressed.connect(self.do_search)
-
-        # 初次加载全部
-        self._fill_table(self.store.apps)
-
-    def _fill_table(self, apps):
-        """用给定的 apps 列表填充表格"""
-        self.table.setRowCount(len(apps))  # 设置表格行数
-        for row, app in enumerate(apps):  # 遍历每条记录
-            aliases = app.get("aliases", [])
-            display_name = aliases[0] if aliases else app.get("id", "")
-            exe_path = app.get("exe_path", "")
-
-            item_name = QtWidgets.QTableWidgetItem(display_name)
-            item_path = QtWidgets.QTableWidgetItem(exe_path)
-
-            self.table.setItem(row, 0, item_name)
-            self.table.setItem(row, 1, item_path)
+        self.search_edit.textChanged.connect(self.do_search)  # 边输入边过滤
 
     def do_search(self):
-        """根据关键字过滤列表"""
-        key = self.search_edit.text().strip().lower()  # 取关键字并转小写
-        if not key:  # 关键字为空 -> 显示全部
-            self._fill_table(self.store.apps)
-            return
-
-        filtered = []  # 存放过滤结果
-        for app in self.store.apps:
-            aliases = app.get("aliases", [])
-            display_name = aliases[0] if aliases else app.get("id", "")
-            exe_path = app.get("exe_path", "")
-
-            if key in display_name.lower() or key in exe_path.lower():
-                filtered.append(app)
-
-        self._fill_table(filtered)  # 用过滤后的列表刷新表格
+        """根据关键字过滤列表（名称 / 路径包含关键字，不区分大小写；空关键字显示全部）"""
+        # store.search 用预先小写好的文本，逐字输入时只在上一次的结果里继续筛
+        self.model.set_filter(self.search_edit.text())
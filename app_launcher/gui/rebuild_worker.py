@@ -0,0 +1,80 @@
+# app_launcher/gui/rebuild_worker.py
+# -*- coding: utf-8 -*-
+
+"""
+在后台线程里重建 AppMatcher 的别名向量，GUI 不卡、搜索照常可用：
+- 别名列表在创建 worker 时（GUI 线程）就取好，之后 store 再改也不影响这一轮
+- 给了 ChangeSet 就走增量更新（只编码新别名，复用当前快照的向量），否则全量重建
+- 编码进度通过 progress(已完成, 总数) 信号报告
+- cancel() 之后这一轮结果丢弃，matcher 保持原样
+- 算完后回到 GUI 线程调用 matcher.publish() 发布新快照
+- 对话框关掉了 worker 也会继续跑完（引用保存在 _running 里）
+"""
+
+import threading
+
+from PyQt5 import QtCore
+
+from app_launcher.core.matcher import AppMatcher, RebuildCancelled
+
+
+class CatalogRebuildWorker(QtCore.QThread):
+    progress = QtCore.pyqtSignal(int, int)  # 已有向量的别名数, 别名总数
+    done = QtCore.pyqtSignal(bool, str)     # 是否已替换, 没替换时的原因
+
+    # 内部：后台线程算完后把结果送回 GUI 线程
+    _built = QtCore.pyqtSignal(object, object)
+
+    # 正在跑的 worker，防止对话框关闭后被回收
+    _running = set()
+
+    def __init__(self, matcher: AppMatcher, changes=None):
+        super().__init__()
+        self.matcher = matcher
+        self.changes = changes
+        self.meta = matcher.collect_meta()
+        self._cancel_event = threading.Event()
+
+        # QThread 对象本身属于 GUI 线程，所以 _publish 会在 GUI 线程里执行
+        self._built.connect(self._publish)
+        self.finished.connect(self._forget)
+
+    def start(self):
+        CatalogRebuildWorker._running.add(self)
+        super().start()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def run(self):
+        try:
+            if self.changes is not None:
+                vectors, meta = self.matcher.build_from_changes(
+                    self.changes, self.meta, self.progress.emit, self._cancel_event
+                )
+            else:
+                vectors, meta = self.matcher.build_snapshot(
+                    self.meta, self.progress.emit, self._cancel_event
+                )
+        except RebuildCancelled:
+            self.done.emit(False, "已取消")
+            return
+        except Exception as e:
+            print("rebuild alias embeddings failed:", e)
+            self.done.emit(False, str(e))
+            return
+        self._built.emit(vectors, meta)
+
+    def _publish(self, vectors, meta):
+        if self.is_cancelled():
+            # 算完的瞬间被取消了（比如已经有更新的一轮在跑）
+            self.done.emit(False, "已取消")
+            return
+        self.matcher.publish(vectors, meta)
+        self.done.emit(True, "")
+
+    def _forget(self):
+        CatalogRebuildWorker._running.discard(self)
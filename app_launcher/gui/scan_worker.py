@@ -0,0 +1,89 @@
+# app_launcher/gui/scan_worker.py
+# -*- coding: utf-8 -*-
+
+"""
+在后台线程里扫描桌面（DesktopScan）或所有来源（app_sources.AppIndexer，接口相同），
+边扫边把新找到的候选分批送回 GUI：
+- found(list) 每攒够一批（或隔一小段时间）发一次，对话框可以马上显示
+- cancel() 让扫描在下一个目录处停下，已经找到的照样保留
+- 扫完 / 停止后发 finished_scan(ScanDelta, stop_reason)
+- 对话框关掉了 worker 也会继续跑完（引用保存在 _running 里）
+- 各来源的快照文件是共用的，同一时间只应该有一轮扫描：_scanning 是判断“有没有扫描在跑”的地方，
+  桌面监视触发的扫描遇到 busy() 就排队，用户在对话框里扫描时 cancel_all() 让位
+"""
+
+import time
+from typing import Union
+
+from PyQt5 import QtCore
+
+from app_launcher.core.app_sources import AppIndexer
+from app_launcher.core.desktop_scanner import DesktopScan
+
+try:
+    import pythoncom  # .lnk 用 COM 解析，新线程里要先初始化
+except ImportError:
+    pythoncom = None
+
+
+class DesktopScanWorker(QtCore.QThread):
+    found = QtCore.pyqtSignal(list)                # [(显示名称, 真实路径), ...]
+    finished_scan = QtCore.pyqtSignal(object, str)  # ScanDelta, 停止原因（"" 表示扫完）
+
+    # 多少条 / 多少秒发一批
+    BATCH_SIZE = 50
+    BATCH_INTERVAL = 0.2
+
+    # 正在跑的 worker，防止对话框关闭后被回收
+    _running = set()
+    # 还没扫完的 worker（busy() 看这个）：发 finished_scan 之前就移出去，
+    # 收到 finished_scan 时马上开始下一轮不会被自己挡住（_running 要等线程真正结束才移除）
+    _scanning = set()
+
+    def __init__(self, scan: Union[DesktopScan, AppIndexer]):
+        super().__init__()
+        self.scan = scan
+        self.finished.connect(self._forget)
+
+    def start(self):
+        DesktopScanWorker._running.add(self)
+        DesktopScanWorker._scanning.add(self)
+        super().start()
+
+    def cancel(self):
+        self.scan.cancel()
+
+    @classmethod
+    def busy(cls) -> bool:
+        """有没有扫描在跑（对话框的、桌面监视触发的都算）"""
+        return bool(cls._scanning)
+
+    @classmethod
+    def cancel_all(cls):
+        """停掉正在跑的扫描（被停的一轮不保存快照，已经找到的照样送出来）"""
+        for worker in list(cls._scanning):
+            worker.cancel()
+
+    def run(self):
+        if pythoncom is not None:
+            pythoncom.CoInitialize()
+        batch = []
+        last_emit = time.monotonic()
+        try:
+            for item in self.scan:
+                batch.append(item)
+                now = time.monotonic()
+                if len(batch) >= self.BATCH_SIZE or now - last_emit >= self.BATCH_INTERVAL:
+                    self.found.emit(batch)
+                    batch, last_emit = [], now
+        except Exception as e:
+            print("desktop scan failed:", e)
+        if batch:
+            self.found.emit(batch)
+        delta = self.scan.delta()
+        DesktopScanWorker._scanning.discard(self)
+        self.finished_scan.emit(delta, self.scan.stop_reason)
+
+    def _forget(self):
+        DesktopScanWorker._scanning.discard(self)
+        DesktopScanWorker._running.discard(self)
@@ -0,0 +1,55 @@
+# app_launcher/gui/search_worker.py
+# -*- coding: utf-8 -*-
+
+"""
+在后台线程里抽取别名 + 匹配（generate_alias / matcher.find_top_k），生成和编码时界面照常响应：
+- 模型调用走 ModelScheduler，和其它线程的请求合并成批，多线程调用是安全的
+- 完成后发 searched(alias, candidates, error, context)：出错时 error 是错误说明，
+  没抽出别名时 alias 为空、candidates 为空列表；context 是调用方带的任意数据，原样带回
+- 调用方不再持有 worker 也会跑完（引用保存在 _running 里）
+"""
+
+from PyQt5 import QtCore
+
+from app_launcher.core.alias_extractor import generate_alias
+from app_launcher.core.matcher import AppMatcher
+
+
+class SearchWorker(QtCore.QThread):
+    searched = QtCore.pyqtSignal(str, object, str, object)  # alias, candidates, error, context
+
+    # 正在跑的 worker，防止被回收
+    _running = set()
+
+    def __init__(self, matcher: AppMatcher, text: str, k: int = 3, context=None):
+        super().__init__()
+        self.matcher = matcher
+        self.text = text
+        self.k = k
+        self.context = context
+        self.finished.connect(self._forget)
+
+    def start(self):
+        SearchWorker._running.add(self)
+        super().start()
+
+    def run(self):
+        try:
+            alias = (generate_alias(self.text) or "").strip()
+        except Exception as e:
+            print("generate_alias error:", e)
+            self.searched.emit("", [], f"别名模型调用失败：{e}", self.context)
+            return
+        if not alias:
+            self.searched.emit("", [], "", self.context)
+            return
+        try:
+            candidates = self.matcher.find_top_k(alias, k=self.k)
+        except Exception as e:
+            print("matcher.find_top_k error:", e)
+            self.searched.emit(alias, [], f"应用匹配失败：{e}", self.context)
+            return
+        self.searched.emit(alias, candidates, "", self.context)
+
+    def _forget(self):
+        SearchWorker._running.discard(self)
@@ -3,20 +3,32 @@
 
 from PyQt5 import QtWidgets, QtCore
 
+from app_launcher.core.app_settings import PRECISION_CHOICES
+
 
 class SettingsDialog(QtWidgets.QDialog):
-    """用于设置“是否显示悬浮窗”的对话框"""
+    """用于设置“是否显示悬浮窗”、推理精度和模型内存策略的对话框"""
 
-    def __init__(self, parent=None, show_floating: bool = True):
+    def __init__(
+        self,
+        parent=None,
+        show_floating: bool = True,
+        precision: str = "auto",
+        idle_unload_minutes: int = 30,
+        footprint_text: str = "",
+    ):
         """
         构造函数
         :param parent: 父窗口
         :param show_floating: 当前悬浮窗是否显示，用来初始化复选框
+        :param precision: 当前推理精度设置，用来初始化下拉框
+        :param idle_unload_minutes: 空闲多少分钟后卸载模型（0 表示不卸载）
+        :param footprint_text: 当前内存占用说明（只读显示）
         """
         super().__init__(parent)  # 调用父类构造函数
 
         self.setWindowTitle("设置")  # 设置窗口标题
-        self.resize(260, 140)  # 设置默认大小
+        self.resize(320, 200)  # 设置默认大小
 
         # 设置窗口标志：普通窗口，带最小化/最大化/关闭按钮
         self.setWindowFlags(
@@ -30,6 +42,32 @@ class SettingsDialog(QtWidgets.QDialog):
         self.checkbox = QtWidgets.QCheckBox("显示悬浮窗")  # 显示文字
         self.checkbox.setChecked(show_floating)  # 设置初始状态
 
+        # 推理精度下拉框（重启后生效）
+        precision_layout = QtWidgets.QHBoxLayout()
+        precision_layout.addWidget(QtWidgets.QLabel("推理精度："))
+        self.precision_combo = QtWidgets.QComboBox()
+        self.precision_combo.addItems(PRECISION_CHOICES)
+        if precision in PRECISION_CHOICES:
+            self.precision_combo.setCurrentText(precision)
+        self.precision_combo.setToolTip("auto：GPU 用 fp16，CPU 用 fp32；int8 仅 CPU 可用。重启后生效")
+        precision_layout.addWidget(self.precision_combo)
+        precision_layout.addStretch()
+
+        # 空闲卸载时间（分钟）
+        idle_layout = QtWidgets.QHBoxLayout()
+        idle_layout.addWidget(QtWidgets.QLabel("空闲后释放模型："))
+        self.idle_spin = QtWidgets.QSpinBox()
+        self.idle_spin.setRange(0, 24 * 60)
+        self.idle_spin.setSuffix(" 分钟")
+        self.idle_spin.setSpecialValueText("从不")  # 0 显示为“从不”
+        self.idle_spin.setValue(int(idle_unload_minutes or 0))
+        idle_layout.addWidget(self.idle_spin)
+        idle_layout.addStretch()
+
+        # 当前内存占用
+        self.footprint_label = QtWidgets.QLabel(footprint_text)
+        self.footprint_label.setStyleSheet("color: #666666;")
+
         # 创建一个按钮盒，包含“确定”和“取消”
         btn_box = QtWidgets.QDialogButtonBox(
             QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
@@ -38,6 +76,9 @@ class SettingsDialog(QtWidgets.QDialog):
         # 创建垂直布局，作为对话框的根布局
         layout = QtWidgets.QVBoxLayout(self)
         layout.addWidget(self.checkbox)  # 把复选框添加进布局
+        layout.addLayout(precision_layout)  # 推理精度
+        layout.addLayout(idle_layout)  # 空闲卸载
+        layout.addWidget(self.footprint_label)  # 内存占用
         layout.addStretch()  # 添加弹性空间
         layout.addWidget(btn_box)  # 把按钮盒添加进布局
 
@@ -48,3 +89,11 @@ class SettingsDialog(QtWidgets.QDialog):
     def get_result(self) -> bool:
         """返回复选框当前是否勾选"""
         return self.checkbox.isChecked()
+
+    def get_precision(self) -> str:
+        """返回下拉框里选中的推理精度"""
+        return self.precision_combo.currentText()
+
+    def get_idle_unload_minutes(self) -> int:
+        """返回空闲卸载时间（分钟，0 表示不卸载）"""
+        return self.idle_spin.value()
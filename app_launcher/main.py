@@ -1,17 +1,24 @@
 # app_launcher/main.py
 # -*- coding: utf-8 -*-
 
+import argparse  # 命令行参数
+import json  # 实例之间传命令用 JSON
 import sys  # 标准库：命令行参数、退出
 from PyQt5 import QtWidgets, QtGui       # Qt 应用 & 图标
 from PyQt5.QtNetwork import QLocalServer, QLocalSocket  # 单实例用本地服务器
 
-from app_launcher.gui.floating_window import FloatingLauncher  # 悬浮窗主界面
-from app_launcher.gui.tray import AppTrayIcon                  # 托盘图标
 from app_launcher.utils.resources import resource_path         # 资源路径工具
 
+# ★ 注意：FloatingLauncher / 托盘这些会间接 import torch + transformers，
+#   放到 main() 里确认自己是第一个实例之后再 import。
+#   第二个进程只负责把命令转发给已经在运行（模型已热）的实例，毫秒级退出。
+
 # 单实例标识字符串（只要全局唯一就行）
 SINGLE_INSTANCE_KEY = "RocketDesk_SingleInstance_Key_2025"
 
+# 转发命令时等待运行中实例回复的超时（毫秒）；首次搜索可能要加载模型，给宽一点
+COMMAND_TIMEOUT_MS = 60000
+
 
 def is_already_running() -> bool:
     """
@@ -33,10 +40,49 @@ def is_already_running() -> bool:
     return False
 
 
-def create_single_instance_server(app: QtWidgets.QApplication) -> None:
+def send_command(request: dict, timeout_ms: int = COMMAND_TIMEOUT_MS) -> dict:
+    """
+    把命令发给正在运行的实例，等它回复。
+
+    协议：一行 UTF-8 JSON 请求 -> 一行 UTF-8 JSON 回复，然后断开。
+      {"cmd": "show"}
+      {"cmd": "run", "text": "打开微信", "launch": true}
+    回复：
+      {"ok": true, "alias": "微信", "app": "微信", "exe_path": "...", "candidates": [...]}
+      {"ok": false, "error": "..."}
+    """
+    socket = QLocalSocket()
+    socket.connectToServer(SINGLE_INSTANCE_KEY)
+    if not socket.waitForConnected(1000):
+        socket.abort()
+        return {"ok": False, "error": "无法连接到正在运行的 RocketDesk"}
+
+    payload = json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n"
+    socket.write(payload)
+    socket.waitForBytesWritten(1000)
+
+    buf = b""
+    while b"\n" not in buf:
+        if not socket.waitForReadyRead(timeout_ms):
+            socket.abort()
+            return {"ok": False, "error": "等待 RocketDesk 回复超时"}
+        buf += bytes(socket.readAll())
+    socket.disconnectFromServer()
+
+    try:
+        return json.loads(buf.split(b"\n", 1)[0].decode("utf-8"))
+    except ValueError:
+        return {"ok": False, "error": "RocketDesk 回复格式错误"}
+
+
+def create_single_instance_server(app: QtWidgets.QApplication, handler=None) -> None:
     """
     创建一个本地服务器，占用 SINGLE_INSTANCE_KEY。
     只要这个 server 存在，后续进程就会被 is_already_running 检测到。
+
+    :param handler: handler(request: dict, reply)，处理第二个进程转发过来的命令，
+                    处理完（可以是之后在 GUI 线程里）调用 reply(response: dict) 回复；
+                    为 None 时只占位，不处理命令
     """
     # 防止上次异常退出残留
     QLocalServer.removeServer(SINGLE_INSTANCE_KEY)
@@ -45,13 +91,95 @@ def create_single_instance_server(app: QtWidgets.QApplication) -> None:
     # 开始监听（失败就算了，不影响当前实例继续跑）
     server.listen(SINGLE_INSTANCE_KEY)
 
+    def on_new_connection():
+        while server.hasPendingConnections():
+            conn = server.nextPendingConnection()
+            if conn is None:
+                break
+            _serve_connection(conn, handler)
+
+    server.newConnection.connect(on_new_connection)
+
     # ★ 把 server 挂在 app 上，防止被垃圾回收
     app._single_instance_server = server
 
 
+def _serve_connection(conn: QLocalSocket, handler) -> None:
+    """读一行 JSON 请求，交给 handler 处理；handler 调用 reply 时写回一行 JSON 回复"""
+    state = {"buf": b"", "done": False, "replied": False, "closed": False}
+
+    def reply(response: dict):
+        # 只回复一次；调用方等超时先断开了就不写了（conn 已经在 deleteLater）
+        if state["replied"] or state["closed"]:
+            return
+        state["replied"] = True
+        conn.write(json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\n")
+        conn.flush()
+        conn.disconnectFromServer()
+
+    def on_disconnected():
+        state["closed"] = True
+        conn.deleteLater()
+
+    def on_ready_read():
+        if state["done"]:
+            return
+        state["buf"] += bytes(conn.readAll())
+        if b"\n" not in state["buf"]:
+            return
+        state["done"] = True
+        line = state["buf"].split(b"\n", 1)[0]
+        try:
+            request = json.loads(line.decode("utf-8"))
+            if handler is None:
+                reply({"ok": False, "error": "当前实例不接受命令"})
+            else:
+                handler(request, reply)
+        except Exception as e:
+            reply({"ok": False, "error": str(e)})
+
+    conn.readyRead.connect(on_ready_read)
+    conn.disconnected.connect(on_disconnected)
+    # 连接建立时数据可能已经到了
+    if conn.bytesAvailable():
+        on_ready_read()
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="rocketdesk",
+        description="RocketDesk：桌面应用自然语言搜索与快速启动。"
+                    "带指令运行时会把指令交给正在运行的实例执行。",
+    )
+    parser.add_argument("text", nargs="*", help="要执行的指令，例如：打开微信")
+    parser.add_argument("--no-launch", action="store_true",
+                        help="只返回匹配结果，不启动应用")
+    return parser.parse_args(argv)
+
+
+def forward_to_running_instance(args) -> int:
+    """第二个进程：把命令转发给运行中的实例，打印结果，返回退出码"""
+    text = " ".join(args.text).strip()
+    if not text:
+        response = send_command({"cmd": "show"}, timeout_ms=3000)
+        if not response.get("ok"):
+            QtWidgets.QMessageBox.information(
+                None,
+                "RocketDesk",
+                "RocketDesk 已经在运行中，不需要重复启动。",
+            )
+        return 0
+
+    response = send_command({"cmd": "run", "text": text, "launch": not args.no_launch})
+    print(json.dumps(response, ensure_ascii=False))
+    return 0 if response.get("ok") else 1
+
+
 def main():
+    args = parse_args(sys.argv[1:])
+
     # 先创建 Qt 应用对象
-    app = QtWidgets.QApplication(sys.argv)
+    app = QtWidgets.QApplication(sys.argv[:1])
 
     # 全局应用图标
     icon_path = resource_path("img/app_icon.ico")
@@ -59,21 +187,46 @@ def main():
     if not app_icon.isNull():
         app.setWindowIcon(app_icon)
 
-    # ★ 这里先检查是否已有实例在运行
+    # ★ 这里先检查是否已有实例在运行：有的话把命令转过去，直接退出
     if is_already_running():
-        QtWidgets.QMessageBox.information(
-            None,
-            "RocketDesk",
-            "RocketDesk 已经在运行中，不需要重复启动。",
-        )
-        return  # 直接退出 main()，不要再创建窗口和模型
+        sys.exit(forward_to_running_instance(args))
+
+    # ★ 当前是第一个实例：先创建本地服务器，占住 SINGLE_INSTANCE_KEY
+    #   （模型加载要好几秒，这期间再启动的进程也要能检测到我们）
+    #   转发来的命令在事件循环跑起来之后才会被处理，那时窗口已经建好了
+    launcher = {}
+
+    def handle_command(request: dict, reply) -> None:
+        win = launcher.get("win")
+        if win is None:
+            reply({"ok": False, "error": "RocketDesk 正在启动，请稍后再试"})
+            return
+        win.handle_remote_command(request, reply)
+
+    create_single_instance_server(app, handle_command)
 
-    # ★ 当前是第一个实例：创建本地服务器，占住 SINGLE_INSTANCE_KEY
-    create_single_instance_server(app)
+    # 第一个实例才需要 GUI 和模型
+    from app_launcher.gui.floating_window import FloatingLauncher  # 悬浮窗主界面
 
     # 创建主悬浮窗
     win = FloatingLauncher()
     win.show()
+    launcher["win"] = win
+
+    # 第一个实例自己带了指令：直接执行一次
+    text = " ".join(args.text).strip()
+    if text:
+        # 和转发来的命令一样（见 _serve_connection）：出错只报告，不影响启动；
+        # 结果在后台匹配 / 启动完之后才回来
+        def report(response: dict):
+            print(json.dumps(response, ensure_ascii=False))
+            if not response.get("ok"):
+                QtWidgets.QMessageBox.warning(win, "RocketDesk", f"指令执行失败：{response.get('error')}")
+
+        try:
+            win.handle_remote_command({"cmd": "run", "text": text, "launch": not args.no_launch}, report)
+        except Exception as e:
+            report({"ok": False, "error": str(e)})
 
     # 创建托盘图标（AppTrayIcon 内部已经设置好图标和菜单）
     #tray = AppTrayIcon()
@@ -0,0 +1,148 @@
+# app_launcher/service/client.py
+# -*- coding: utf-8 -*-
+"""
+守护进程的本地客户端（只用标准库，不依赖 torch / Qt），给脚本和插件直接用：
+
+    from app_launcher.service.client import RocketDeskClient
+    client = RocketDeskClient()                       # http://127.0.0.1:8765
+    client = RocketDeskClient(unix_path="/tmp/rocketdesk.sock")
+    client.search("打开微信")
+
+命令行：
+    python -m app_launcher.service.client search 打开微信
+    python -m app_launcher.service.client ready
+"""
+
+import argparse
+import http.client
+import json
+import socket
+from typing import Dict, List
+
+from app_launcher.service.daemon import DEFAULT_HOST, DEFAULT_PORT
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """走 Unix socket 的 HTTPConnection"""
+
+    def __init__(self, unix_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = unix_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.unix_path)
+        self.sock = sock
+
+
+class DaemonError(Exception):
+    """守护进程返回了非 200"""
+
+    def __init__(self, status: int, payload: Dict):
+        super().__init__(f"{status}: {payload.get('error')}")
+        self.status = status
+        self.payload = payload
+
+
+class RocketDeskClient:
+    """一个客户端对象复用一条 keep-alive 连接；多线程请各自创建"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 unix_path: str = None, timeout: float = 60.0):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+        self.timeout = timeout
+        self._conn = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            if self.unix_path:
+                self._conn = _UnixHTTPConnection(self.unix_path, self.timeout)
+            else:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def request(self, method: str, path: str, body: Dict = None) -> Dict:
+        """发一个请求，返回 JSON；状态码不是 200 时抛 DaemonError"""
+        data = json.dumps(body or {}, ensure_ascii=False).encode("utf-8") if method == "POST" else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                resp = conn.getresponse()
+                payload = json.loads(resp.read().decode("utf-8") or "{}")
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # keep-alive 连接被服务端关掉了：重连一次
+                self.close()
+                if attempt:
+                    raise
+        if resp.status != 200:
+            raise DaemonError(resp.status, payload)
+        return payload
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---------------- 便捷方法 ----------------
+
+    def health(self) -> Dict:
+        return self.request("GET", "/health")
+
+    def ready(self) -> bool:
+        try:
+            return bool(self.request("GET", "/ready").get("ready"))
+        except DaemonError:
+            return False
+
+    def extract(self, text: str) -> str:
+        return self.request("POST", "/extract", {"text": text})["alias"]
+
+    def match(self, alias: str, k: int = 3) -> List[Dict]:
+        return self.request("POST", "/match", {"alias": alias, "k": k})["candidates"]
+
+    def search(self, text: str, k: int = 3) -> Dict:
+        return self.request("POST", "/search", {"text": text, "k": k})
+
+    def launch(self, text: str = None, exe_path: str = None) -> Dict:
+        body = {"exe_path": exe_path} if exe_path else {"text": text}
+        return self.request("POST", "/launch", body)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RocketDesk 守护进程客户端")
+    parser.add_argument("command", choices=["health", "ready", "extract", "match", "search", "launch"])
+    parser.add_argument("text", nargs="*")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None)
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    client = RocketDeskClient(args.host, args.port, args.unix)
+    text = " ".join(args.text)
+    try:
+        if args.command == "health":
+            result = client.health()
+        elif args.command == "ready":
+            result = {"ready": client.ready()}
+        elif args.command == "extract":
+            result = {"alias": client.extract(text)}
+        elif args.command == "match":
+            result = {"candidates": client.match(text, args.k)}
+        elif args.command == "search":
+            result = client.search(text, args.k)
+        else:
+            result = client.launch(text)
+    except DaemonError as e:
+        result = e.payload
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,387 @@
+# app_launcher/service/daemon.py
+# -*- coding: utf-8 -*-
+"""
+Headless 守护进程：不启动 Qt，只加载一次 AppConfigStore / AppMatcher / 别名模型，
+通过本地 HTTP（127.0.0.1）或 Unix socket 提供 JSON 接口，给 IDE 插件、语音前端等调用。
+
+启动：
+    python -m app_launcher.service.daemon                      # http://127.0.0.1:8765
+    python -m app_launcher.service.daemon --port 9000
+    python -m app_launcher.service.daemon --unix /tmp/rocketdesk.sock
+
+接口（请求 / 回复都是 JSON）：
+    GET  /health   存活检查，进程起来就返回 200
+    GET  /ready    模型和匹配器加载完成返回 200，否则 503
+    POST /extract  {"text": "打开微信"}                  -> {"alias": "微信"}
+    POST /match    {"alias": "微信", "k": 3}             -> {"candidates": [...]}
+    POST /search   {"text": "打开微信", "k": 3}          -> {"alias": ..., "candidates": [...]}
+    POST /launch   {"text": "打开微信"} 或 {"exe_path": "..."} -> {"launched": true, "launch_ms": 12.3, ...}
+
+/search 和 /launch 的指令之前确认过选哪个应用时（UsageStore），直接给出，不调模型（alias 为空、cached 为 true）；
+/launch 成功后记进启动记录，常用的应用以后排前面。
+
+只给本机程序用，不给网页用：带 Origin 头的请求（浏览器发的）一律 403，
+POST 必须是 Content-Type: application/json（网页不经预检发不出这种请求）；
+/launch 的 exe_path 必须是应用列表里已有的路径，不能借它打开任意文件。
+
+- asyncio 单线程处理连接，每个连接一个协程，互不影响（支持 keep-alive）
+- 模型调用都交给 ModelScheduler，多个客户端的请求会在调度线程里合并成批
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import os
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+from app_launcher.core.app_settings import AppSettings
+from app_launcher.core.config_store import AppConfigStore
+from app_launcher.core.config_watcher import ConfigFileWatcher
+from app_launcher.core.usage_store import UsageStore
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# 请求体大小上限，防止奇怪的客户端把内存撑爆
+MAX_BODY_BYTES = 1024 * 1024
+# /match、/search 一次最多返回多少个候选
+MAX_K = 50
+
+_STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    415: "Unsupported Media Type",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class HttpError(Exception):
+    """处理请求时的错误，带 HTTP 状态码"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class LauncherService:
+    """
+    持有 store / matcher / scheduler，负责真正的业务逻辑。
+    模型在后台线程里加载，加载完成前 /ready 返回 503，业务接口也返回 503。
+    """
+
+    def __init__(self, config_path: str = None):
+        self.store = AppConfigStore(config_path)
+        self.usage = UsageStore.from_settings(AppSettings())
+        self.scheduler = None
+        self.matcher = None
+        self.load_error: Optional[str] = None
+        self.started_at = time.time()
+        self.ready_at: Optional[float] = None
+        self.request_count = 0
+        self.config_watcher: Optional[ConfigFileWatcher] = None
+        self.desktop_watcher = None
+
+    @property
+    def ready(self) -> bool:
+        return self.matcher is not None
+
+    def load(self):
+        """加载模型 + 重建匹配器（耗时，在线程池里跑）"""
+        try:
+            # 这些模块会 import torch，放到这里按需加载
+            from app_launcher.core.model_scheduler import ModelScheduler
+            from app_launcher.core.sentence_encoder import QwenSentenceEncoder
+            from app_launcher.core.matcher import AppMatcher
+
+            self.scheduler = ModelScheduler.instance()
+            encoder = QwenSentenceEncoder()
+            self.matcher = AppMatcher(encoder, self.store, self.usage)
+            self.ready_at = time.time()
+            print(f"RocketDesk daemon ready in {self.ready_at - self.started_at:.2f}s, "
+                  f"{len(self.store.apps)} apps")
+            # 匹配器就绪后才开始监视，外部改配置时增量更新，不用重启守护进程
+            self.config_watcher = ConfigFileWatcher(self.store.config_path, self.reload_config)
+            self.config_watcher.start()
+            self._start_desktop_watcher()
+        except Exception as e:
+            self.load_error = str(e)
+            print("RocketDesk daemon load failed:", e)
+
+    def reload_config(self):
+        """apps_config.json 被外部修改（在监视线程里调用）：diff 后只编码新增的别名"""
+        changes = self.store.reload_from_disk()
+        if changes:
+            self.matcher.apply_changes(changes)
+            print("apps_config.json reloaded:", changes.summary())
+
+    def _start_desktop_watcher(self):
+        """设置里打开了 watch_desktop 才监视桌面"""
+        from app_launcher.core.app_sources import AppIndexer
+        from app_launcher.core.desktop_scanner import ScanOptions
+        from app_launcher.core.desktop_watcher import DesktopWatcher
+
+        settings = AppSettings()
+        if not settings.get("watch_desktop"):
+            return
+        self.scan_settings = settings
+        self.scan_options = ScanOptions.from_settings(settings)
+        self.desktop_watcher = DesktopWatcher(
+            AppIndexer.from_settings(settings).roots(), self.rescan_desktop,
+            max_depth=self.scan_options.max_depth, excludes=self.scan_options.excludes,
+        )
+        self.desktop_watcher.start()
+
+    def rescan_desktop(self, _dirs=None):
+        """桌面等有变化（在监视线程里调用）：各来源增量扫描，把新增 / 消失的应用写进 store，只编码新别名"""
+        from app_launcher.core.app_sources import index_apps_incremental
+
+        delta = index_apps_incremental(self.scan_settings)
+        if self.store.add_scanned_apps(delta.added) + self.store.remove_vanished_apps(delta.removed):
+            changes = self.store.save()
+            if changes:
+                self.matcher.apply_changes(changes)
+                print("desktop changed:", changes.summary())
+
+    def _require_ready(self):
+        if not self.ready:
+            raise HttpError(503, self.load_error or "模型加载中")
+
+    # ---------------- 各个接口 ----------------
+
+    async def extract(self, text: str) -> str:
+        self._require_ready()
+        text = (text or "").strip()
+        if not text:
+            raise HttpError(400, "text 不能为空")
+        return await asyncio.wrap_future(self.scheduler.submit_extract(text))
+
+    async def match(self, alias: str, k: int) -> list:
+        self._require_ready()
+        alias = (alias or "").strip()
+        if not alias:
+            return []
+        vecs = await asyncio.wrap_future(self.scheduler.submit_encode([alias]))
+        return self.matcher.rank(vecs[0], k)
+
+    async def search(self, text: str, k: int) -> Dict:
+        """指令 -> 候选：确认过的指令直接用缓存，否则抽取别名 + 匹配"""
+        self._require_ready()
+        cached = self.matcher.find_cached(text or "", k)
+        if cached:
+            return {"alias": "", "cached": True, "candidates": cached}
+        alias = await self.extract(text)
+        return {"alias": alias, "candidates": await self.match(alias, k)}
+
+    async def handle(self, method: str, path: str, body: Dict) -> Tuple[int, Dict]:
+        """按路径分发，返回 (状态码, 回复 JSON)"""
+        if path == "/health":
+            return 200, {
+                "status": "ok",
+                "uptime_s": round(time.time() - self.started_at, 3),
+                "requests": self.request_count,
+            }
+        if path == "/ready":
+            status = 200 if self.ready else 503
+            return status, {
+                "ready": self.ready,
+                "error": self.load_error,
+                "apps": len(self.store.apps),
+            }
+
+        if method != "POST":
+            raise HttpError(405 if path in ("/extract", "/match", "/search", "/launch") else 404,
+                            f"{method} {path} 不支持")
+
+        k = _parse_k(body.get("k", 3))
+        if path == "/extract":
+            return 200, {"alias": await self.extract(body.get("text"))}
+        if path == "/match":
+            return 200, {"candidates": await self.match(body.get("alias"), k)}
+        if path == "/search":
+            return 200, await self.search(body.get("text"), k)
+        if path == "/launch":
+            return 200, await self.launch(body)
+        raise HttpError(404, f"未知接口：{path}")
+
+    async def launch(self, body: Dict) -> Dict:
+        """给了 exe_path 就直接启动；否则按 text 搜索，启动第一名"""
+        from app_launcher.core.launch_backend import launch
+
+        result: Dict = {"launched": False}
+        exe_path = body.get("exe_path")
+        if exe_path and not self.store.has_exe_path(exe_path):
+            raise HttpError(403, "exe_path 不在应用列表里")
+        if not exe_path:
+            found = await self.search(body.get("text"), 1)
+            candidates = found["candidates"]
+            result["alias"] = found["alias"]
+            if not candidates:
+                result["error"] = "没有匹配到已配置的应用"
+                return result
+            exe_path = candidates[0]["exe_path"]
+            result["app"] = candidates[0]["base_name"]
+        result["exe_path"] = exe_path
+
+        loop = asyncio.get_running_loop()
+        # 走到这里的 exe_path 都在应用列表里（直接给的上面检查过，搜索出来的本来就是）
+        launched = await loop.run_in_executor(None, functools.partial(launch, exe_path, trusted=True))
+        result["launched"] = launched.ok
+        result["launch_ms"] = round(launched.elapsed_ms, 1)
+        if launched.ok:
+            self.usage.record_launch(exe_path, query=body.get("text"), launch_ms=launched.elapsed_ms)
+        else:
+            result["error"] = launched.error
+        return result
+
+
+# ---------------- 极简 HTTP/1.1 ----------------
+
+async def _read_request(reader: asyncio.StreamReader):
+    """读一个 HTTP 请求；连接关闭返回 None"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "请求行格式错误")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length") or 0)
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, "请求体太大")
+    raw = await reader.readexactly(length) if length else b""
+    return method.upper(), path.split("?", 1)[0], headers, raw
+
+
+def _write_response(writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    ).encode("latin-1")
+    writer.write(head + body)
+
+
+def _parse_k(value) -> int:
+    """候选个数：1 ~ MAX_K 的整数（JSON 里的 true / 3.5 / "3" 都不算）"""
+    if type(value) is not int or not 1 <= value <= MAX_K:
+        raise HttpError(400, f"k 必须是 1 ~ {MAX_K} 的正整数")
+    return value
+
+
+def _check_client(method: str, headers: Dict):
+    """挡掉网页发来的请求（见模块说明）"""
+    if "origin" in headers:
+        raise HttpError(403, "不接受浏览器发来的请求")
+    if method == "POST":
+        content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        if content_type != "application/json":
+            raise HttpError(415, "Content-Type 必须是 application/json")
+
+
+def make_connection_handler(service: LauncherService):
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """一个连接一个协程；同一连接上的请求按顺序处理（keep-alive）"""
+        try:
+            while True:
+                try:
+                    req = await _read_request(reader)
+                except HttpError as e:
+                    _write_response(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                except (asyncio.IncompleteReadError, ValueError):
+                    break
+                if req is None:
+                    break
+                method, path, headers, raw = req
+                keep_alive = headers.get("connection", "keep-alive").lower() != "close"
+
+                service.request_count += 1
+                t0 = time.perf_counter()
+                try:
+                    _check_client(method, headers)
+                    body = json.loads(raw.decode("utf-8")) if raw else {}
+                    if not isinstance(body, dict):
+                        raise HttpError(400, "请求体必须是 JSON 对象")
+                    status, payload = await service.handle(method, path, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": e.message}
+                except ValueError as e:
+                    status, payload = 400, {"error": f"JSON 解析失败：{e}"}
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                payload["elapsed_ms"] = round((time.perf_counter() - t0) * 1000.0, 3)
+
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return handle_connection
+
+
+async def serve(service: LauncherService, host: str, port: int, unix_path: str = None):
+    handler = make_connection_handler(service)
+    if unix_path:
+        if os.path.exists(unix_path):
+            os.remove(unix_path)
+        server = await asyncio.start_unix_server(handler, path=unix_path)
+        where = f"unix:{unix_path}"
+    else:
+        server = await asyncio.start_server(handler, host=host, port=port)
+        where = f"http://{host}:{port}"
+    print(f"RocketDesk daemon listening on {where}")
+
+    # 模型在线程池里加载，不挡住 /health
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, service.load)
+
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RocketDesk headless 守护进程（本地 JSON API）")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="监听地址（默认只监听本机）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="改为监听 Unix socket 路径")
+    parser.add_argument("--config", default=None, help="apps_config.json 路径")
+    args = parser.parse_args(argv)
+
+    if args.unix and sys.platform == "win32":
+        parser.error("Windows 上不支持 --unix，请使用 --port")
+
+    service = LauncherService(args.config)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.usage.flush()
+
+
+if __name__ == "__main__":
+    main()
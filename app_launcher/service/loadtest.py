@@ -0,0 +1,110 @@
+# app_launcher/service/loadtest.py
+# -*- coding: utf-8 -*-
+"""
+守护进程压测：N 个并发客户端，每个发 M 个请求，统计吞吐和延迟分位数。
+
+    python -m app_launcher.service.loadtest --clients 8 --requests 50
+    python -m app_launcher.service.loadtest --endpoint extract --texts queries.txt
+
+texts 文件每行一条指令；不给就用内置的几条。
+"""
+
+import argparse
+import threading
+import time
+from typing import List
+
+from app_launcher.service.client import RocketDeskClient, DaemonError
+from app_launcher.service.daemon import DEFAULT_HOST, DEFAULT_PORT
+
+DEFAULT_TEXTS = [
+    "打开微信",
+    "카카오 켜봐",
+    "执行 멜론",
+    "실행해줘 Melon",
+    "我要去学校，把카카오 맵打开",
+    "open chrome please",
+]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[idx]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RocketDesk 守护进程压测")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None)
+    parser.add_argument("--clients", type=int, default=8, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=50, help="每个客户端的请求数")
+    parser.add_argument("--endpoint", default="search", choices=["extract", "search", "match"])
+    parser.add_argument("--texts", default=None, help="指令文件，每行一条")
+    parser.add_argument("--wait-ready", type=float, default=120.0, help="最多等待服务就绪多少秒")
+    args = parser.parse_args(argv)
+
+    texts = DEFAULT_TEXTS
+    if args.texts:
+        with open(args.texts, "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()] or DEFAULT_TEXTS
+
+    # 先等服务就绪，避免把模型加载时间算进去
+    probe = RocketDeskClient(args.host, args.port, args.unix)
+    deadline = time.monotonic() + args.wait_ready
+    while not probe.ready():
+        if time.monotonic() > deadline:
+            print("服务一直没有就绪，退出")
+            return
+        time.sleep(0.5)
+    probe.close()
+
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker(worker_id: int):
+        client = RocketDeskClient(args.host, args.port, args.unix)
+        local = []
+        local_errors = 0
+        for i in range(args.requests):
+            text = texts[(worker_id + i) % len(texts)]
+            t = time.perf_counter()
+            try:
+                if args.endpoint == "extract":
+                    client.extract(text)
+                elif args.endpoint == "match":
+                    client.match(text)
+                else:
+                    client.search(text)
+            except (DaemonError, OSError):
+                local_errors += 1
+                continue
+            local.append((time.perf_counter() - t) * 1000.0)
+        client.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.clients)]
+    t0 = time.perf_counter()
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    elapsed = time.perf_counter() - t0
+
+    total = len(latencies)
+    print(f"endpoint={args.endpoint} clients={args.clients} requests={args.clients * args.requests}")
+    print(f"ok={total} errors={errors[0]} elapsed={elapsed:.2f}s throughput={total / elapsed:.1f} req/s")
+    print(
+        f"latency ms: p50={_percentile(latencies, 50):.1f} p95={_percentile(latencies, 95):.1f} "
+        f"p99={_percentile(latencies, 99):.1f} max={max(latencies) if latencies else 0:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# app_launcher/utils/memory.py
+# -*- coding: utf-8 -*-
+"""
+进程内存统计小工具（只用标准库，psutil 有就优先用）：
+- current_rss_bytes(): 当前常驻内存（RSS / Working Set）
+- peak_rss_bytes():    进程启动以来的峰值常驻内存
+- release_free_memory(): 把 allocator 里空闲的内存还给操作系统（卸载模型后用）
+- format_mb():         字节数 -> "123.4 MB" 这种显示文本
+
+拿不到数据时统一返回 0，调用方不需要做平台判断。
+"""
+
+import os
+import sys
+
+try:
+    import psutil  # 可选依赖
+except ImportError:
+    psutil = None
+
+
+def _windows_memory_counters():
+    """Windows 下用 GetProcessMemoryInfo 读 (WorkingSetSize, PeakWorkingSetSize)"""
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(PROCESS_MEMORY_COUNTERS)
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    ok = ctypes.windll.psapi.GetProcessMemoryInfo(
+        handle, ctypes.byref(counters), counters.cb
+    )
+    if not ok:
+        return 0, 0
+    return counters.WorkingSetSize, counters.PeakWorkingSetSize
+
+
+def current_rss_bytes() -> int:
+    """当前进程常驻内存（字节）"""
+    try:
+        if psutil is not None:
+            return int(psutil.Process(os.getpid()).memory_info().rss)
+        if sys.platform == "win32":
+            return int(_windows_memory_counters()[0])
+        # Linux：/proc/self/statm 第二列是常驻页数
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+def peak_rss_bytes() -> int:
+    """进程启动以来的峰值常驻内存（字节）"""
+    try:
+        if sys.platform == "win32":
+            return int(_windows_memory_counters()[1])
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 单位是 KB，macOS 单位是字节
+        if sys.platform == "darwin":
+            return int(peak)
+        return int(peak) * 1024
+    except Exception:
+        return 0
+
+
+def release_free_memory():
+    """
+    glibc 的 malloc 释放大块内存后不一定马上还给系统，RSS 看起来不降；
+    Linux 上调一次 malloc_trim(0)。其他平台什么都不做。
+    """
+    if not sys.platform.startswith("linux"):
+        return
+    try:
+        import ctypes
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except Exception:
+        pass
+
+
+def format_mb(num_bytes: int) -> str:
+    """字节数格式化成 MB 文本"""
+    return f"{num_bytes / (1024 * 1024):.1f} MB"
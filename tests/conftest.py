@@ -0,0 +1,9 @@
+# tests/conftest.py
+# -*- coding: utf-8 -*-
+
+"""让测试不用安装就能 import app_launcher（仓库根目录加进 sys.path）"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
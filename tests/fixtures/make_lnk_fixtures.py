@@ -0,0 +1,140 @@
+# tests/fixtures/make_lnk_fixtures.py
+# -*- coding: utf-8 -*-
+
+"""
+按 [MS-SHLLINK] 拼出测试用的 .lnk 文件，写到 tests/fixtures/lnk/。
+生成好的文件已经提交在仓库里，改了这里再运行一次：
+
+    python tests/fixtures/make_lnk_fixtures.py
+"""
+
+import os
+import struct
+
+OUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lnk")
+
+LINK_CLSID = bytes.fromhex("0114020000000000c000000000000046")
+
+HAS_ID_LIST = 0x00000001
+HAS_LINK_INFO = 0x00000002
+HAS_RELATIVE_PATH = 0x00000008
+HAS_WORKING_DIR = 0x00000010
+HAS_ARGUMENTS = 0x00000020
+IS_UNICODE = 0x00000080
+HAS_EXP_STRING = 0x00000200
+
+ENV_BLOCK_SIGNATURE = 0xA0000001
+
+
+def header(flags: int) -> bytes:
+    """ShellLinkHeader：76 字节，时间 / 属性都填 0"""
+    return struct.pack("<I16sII8s8s8sIiIHHII", 0x4C, LINK_CLSID, flags, 0,
+                       b"\0" * 8, b"\0" * 8, b"\0" * 8, 0, 0, 1, 0, 0, 0, 0)
+
+
+def id_list() -> bytes:
+    """一个随便的 ItemID + 结束标记（解析器只跳过它）"""
+    item = b"\x1f\x50" + bytes(range(16))
+    items = struct.pack("<H", len(item) + 2) + item + b"\0\0"
+    return struct.pack("<H", len(items)) + items
+
+
+def link_info(local_base: str = None, suffix: str = "", net_name: str = None,
+              ansi_encoding: str = "gbk", unicode_base: str = None) -> bytes:
+    """
+    LinkInfo：local_base 给了就带 VolumeID + LocalBasePath，net_name 给了就带 CommonNetworkRelativeLink；
+    unicode_base 给了就用 0x24 的头部，并写 Unicode 版本的本地路径 / 后缀
+    """
+    unicode = unicode_base is not None
+    header_size = 0x24 if unicode else 0x1C
+    flags = (0x1 if local_base is not None else 0) | (0x2 if net_name is not None else 0)
+    body = b""
+    offsets = {"volume": 0, "local": 0, "net": 0, "suffix": 0, "local_u": 0, "suffix_u": 0}
+
+    def add(name: str, data: bytes):
+        nonlocal body
+        offsets[name] = header_size + len(body)
+        body += data
+
+    if local_base is not None:
+        add("volume", struct.pack("<IIII", 0x11, 3, 0x12345678, 0x10) + b"\0")
+        add("local", local_base.encode(ansi_encoding, errors="replace") + b"\0")
+    if net_name is not None:
+        name = net_name.encode("ascii") + b"\0"
+        add("net", struct.pack("<IIIII", 0x14 + len(name), 0x2, 0x14, 0, 0x00020000) + name)
+    add("suffix", suffix.encode(ansi_encoding, errors="replace") + b"\0")
+    if unicode:
+        add("local_u", unicode_base.encode("utf-16-le") + b"\0\0")
+        add("suffix_u", suffix.encode("utf-16-le") + b"\0\0")
+
+    head = struct.pack("<IIIIIII", header_size + len(body), header_size, flags,
+                       offsets["volume"], offsets["local"], offsets["net"], offsets["suffix"])
+    if unicode:
+        head += struct.pack("<II", offsets["local_u"], offsets["suffix_u"])
+    return head + body
+
+
+def string_data(text: str, unicode: bool, ansi_encoding: str = "gbk") -> bytes:
+    if unicode:
+        return struct.pack("<H", len(text)) + text.encode("utf-16-le")
+    raw = text.encode(ansi_encoding)
+    return struct.pack("<H", len(raw)) + raw
+
+
+def env_block(target: str) -> bytes:
+    """EnvironmentVariableDataBlock（0x314 字节）+ 结束标记"""
+    ansi = target.encode("cp1252").ljust(260, b"\0")
+    wide = target.encode("utf-16-le").ljust(520, b"\0")
+    return struct.pack("<II", 0x314, ENV_BLOCK_SIGNATURE) + ansi + wide + b"\0\0\0\0"
+
+
+def fixtures():
+    ansi_local = (
+        header(HAS_ID_LIST | HAS_LINK_INFO | HAS_WORKING_DIR | HAS_ARGUMENTS)
+        + id_list()
+        + link_info("C:\\Program Files\\微信\\WeChat.exe")
+        + string_data("C:\\Program Files\\微信", unicode=False)
+        + string_data("--silent", unicode=False)
+    )
+    return {
+        # ANSI（GBK）LinkInfo + 工作目录 + 参数
+        "ansi_local.lnk": ansi_local,
+        # 0x24 头部：ANSI 字段是乱码，Unicode 字段才是对的
+        "unicode_local.lnk": (
+            header(HAS_LINK_INFO | IS_UNICODE)
+            + link_info("C:\\Program Files\\???\\KakaoTalk.exe", ansi_encoding="cp1252",
+                        unicode_base="C:\\Program Files\\카카오톡\\KakaoTalk.exe")
+        ),
+        # 只有相对路径（相对 .lnk 所在目录）
+        "relative_only.lnk": (
+            header(HAS_RELATIVE_PATH | IS_UNICODE)
+            + string_data("..\\bin\\tool.exe", unicode=True)
+        ),
+        # 本地路径不存在，EnvironmentVariableDataBlock 里是带 %变量% 的目标
+        "env_block.lnk": (
+            header(HAS_LINK_INFO | IS_UNICODE | HAS_EXP_STRING)
+            + link_info("C:\\Missing\\run.exe", unicode_base="C:\\Missing\\run.exe")
+            + env_block("%ROCKETDESK_TEST_ROOT%\\app\\run.exe")
+        ),
+        # 网络共享：\\server\share + 后缀
+        "unc.lnk": (
+            header(HAS_LINK_INFO)
+            + link_info(suffix="tools\\app.exe", net_name="\\\\fileserver\\share")
+        ),
+        # 只有 IDList（“此电脑”、商店应用之类），纯 Python 解析不出路径
+        "idlist_only.lnk": header(HAS_ID_LIST) + id_list(),
+        # 在 LinkInfo 中间被截断
+        "truncated.lnk": ansi_local[:len(header(0)) + len(id_list()) + 20],
+    }
+
+
+def main():
+    os.makedirs(OUT_DIR, exist_ok=True)
+    for name, data in fixtures().items():
+        with open(os.path.join(OUT_DIR, name), "wb") as f:
+            f.write(data)
+        print(f"{name}: {len(data)} bytes")
+
+
+if __name__ == "__main__":
+    main()
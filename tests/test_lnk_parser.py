@@ -0,0 +1,182 @@
+# tests/test_lnk_parser.py
+# -*- coding: utf-8 -*-
+
+"""lnk_parser 在 Linux 上对 tests/fixtures/lnk 里的 .lnk 的解析（fixture 由 make_lnk_fixtures.py 生成）"""
+
+import os
+import shutil
+
+import pytest
+
+from app_launcher.core import lnk_parser
+from app_launcher.core.lnk_parser import LnkError, LnkTargetCache, parse_lnk, parse_lnk_bytes, resolve_lnk_target
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "lnk")
+
+
+def fixture_path(name: str) -> str:
+    return os.path.join(FIXTURES, name)
+
+
+def read_fixture(name: str) -> bytes:
+    with open(fixture_path(name), "rb") as f:
+        return f.read()
+
+
+def copy_fixture(name: str, dest_dir, dest_name: str = None) -> str:
+    os.makedirs(str(dest_dir), exist_ok=True)
+    dest = os.path.join(str(dest_dir), dest_name or name)
+    shutil.copyfile(fixture_path(name), dest)
+    return dest
+
+
+def touch(path) -> str:
+    os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+    with open(str(path), "wb"):
+        pass
+    return str(path)
+
+
+# ---------------- parse_lnk_bytes ----------------
+
+def test_parse_ansi_link_info():
+    info = parse_lnk_bytes(read_fixture("ansi_local.lnk"))
+    assert info.local_path == "C:\\Program Files\\微信\\WeChat.exe"
+    assert info.network_path == ""
+    assert info.working_dir == "C:\\Program Files\\微信"
+    assert info.arguments == "--silent"
+
+
+def test_parse_unicode_link_info_prefers_unicode_fields():
+    info = parse_lnk_bytes(read_fixture("unicode_local.lnk"))
+    assert info.local_path == "C:\\Program Files\\카카오톡\\KakaoTalk.exe"
+
+
+def test_parse_relative_only():
+    info = parse_lnk_bytes(read_fixture("relative_only.lnk"))
+    assert info.relative_path == "..\\bin\\tool.exe"
+    assert info.local_path == info.network_path == info.env_target == ""
+
+
+def test_parse_environment_variable_block():
+    info = parse_lnk_bytes(read_fixture("env_block.lnk"))
+    assert info.env_target == "%ROCKETDESK_TEST_ROOT%\\app\\run.exe"
+    assert info.local_path == "C:\\Missing\\run.exe"
+
+
+def test_parse_unc_path():
+    info = parse_lnk_bytes(read_fixture("unc.lnk"))
+    assert info.network_path == "\\\\fileserver\\share\\tools\\app.exe"
+    assert info.local_path == ""
+
+
+def test_parse_idlist_only_has_no_paths():
+    info = parse_lnk_bytes(read_fixture("idlist_only.lnk"))
+    assert (info.local_path, info.network_path, info.relative_path, info.env_target) == ("", "", "", "")
+
+
+def test_parse_truncated_raises():
+    with pytest.raises(LnkError):
+        parse_lnk_bytes(read_fixture("truncated.lnk"))
+
+
+@pytest.mark.parametrize("data", [b"", b"not a shortcut" * 10, b"\x4c\0\0\0" + b"\0" * 100])
+def test_parse_rejects_non_lnk(data):
+    with pytest.raises(LnkError):
+        parse_lnk_bytes(data)
+
+
+def test_parse_lnk_reads_file():
+    assert parse_lnk(fixture_path("unc.lnk")) == parse_lnk_bytes(read_fixture("unc.lnk"))
+
+
+# ---------------- resolve_lnk_target ----------------
+
+def test_resolve_relative_to_lnk_directory(tmp_path):
+    lnk = copy_fixture("relative_only.lnk", tmp_path / "desktop")
+    target = touch(tmp_path / "bin" / "tool.exe")
+    assert resolve_lnk_target(lnk) == target
+
+
+def test_resolve_expands_environment_variables(tmp_path, monkeypatch):
+    monkeypatch.setenv("ROCKETDESK_TEST_ROOT", str(tmp_path))
+    target = touch(tmp_path / "app" / "run.exe")
+    assert resolve_lnk_target(fixture_path("env_block.lnk")) == target
+
+
+def test_resolve_falls_back_to_first_candidate_when_nothing_exists(monkeypatch):
+    monkeypatch.delenv("ROCKETDESK_TEST_ROOT", raising=False)
+    target = resolve_lnk_target(fixture_path("env_block.lnk"))
+    # 变量不存在时保持原样；非 Windows 上 \ 换成 /
+    assert target == os.path.join("%ROCKETDESK_TEST_ROOT%", "app", "run.exe")
+
+
+def test_resolve_local_and_unc_paths_use_native_separators():
+    assert resolve_lnk_target(fixture_path("ansi_local.lnk")) == \
+        os.path.join("C:", "Program Files", "微信", "WeChat.exe")
+    assert resolve_lnk_target(fixture_path("unc.lnk")).endswith(os.path.join("share", "tools", "app.exe"))
+
+
+@pytest.mark.parametrize("name", ["idlist_only.lnk", "truncated.lnk"])
+def test_resolve_unparseable_returns_none(name):
+    assert resolve_lnk_target(fixture_path(name)) is None
+
+
+def test_resolve_missing_file_returns_none(tmp_path):
+    assert resolve_lnk_target(str(tmp_path / "missing.lnk")) is None
+
+
+# ---------------- LnkTargetCache ----------------
+
+@pytest.fixture
+def counted_resolve(monkeypatch):
+    """记下真正打开 .lnk 的次数"""
+    calls = []
+    real = lnk_parser.resolve_lnk_target
+
+    def resolve(path):
+        calls.append(path)
+        return real(path)
+
+    monkeypatch.setattr(lnk_parser, "resolve_lnk_target", resolve)
+    return calls
+
+
+def test_cache_reuses_result_until_file_changes(tmp_path, counted_resolve):
+    cache = LnkTargetCache()
+    lnk = copy_fixture("relative_only.lnk", tmp_path / "desktop", "app.lnk")
+    target = touch(tmp_path / "bin" / "tool.exe")
+
+    assert cache.resolve(lnk) == target
+    assert cache.resolve(lnk) == target
+    assert len(counted_resolve) == 1
+    assert len(cache) == 1
+
+
+def test_cache_rereads_after_size_change(tmp_path, counted_resolve):
+    cache = LnkTargetCache()
+    lnk = copy_fixture("relative_only.lnk", tmp_path, "app.lnk")
+    cache.resolve(lnk)
+    st = os.stat(lnk)
+
+    # 换成另一个快捷方式，mtime 改回原值，只有大小不同
+    shutil.copyfile(fixture_path("unc.lnk"), lnk)
+    os.utime(lnk, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert cache.resolve(lnk).endswith(os.path.join("share", "tools", "app.exe"))
+    assert len(counted_resolve) == 2
+
+
+def test_cache_rereads_after_mtime_change(tmp_path, counted_resolve):
+    cache = LnkTargetCache()
+    lnk = copy_fixture("relative_only.lnk", tmp_path / "desktop", "app.lnk")
+    assert cache.resolve(lnk) == os.path.join(str(tmp_path), "bin", "tool.exe")  # 不存在时给第一个候选
+
+    st = os.stat(lnk)
+    os.utime(lnk, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    cache.resolve(lnk)
+    assert len(counted_resolve) == 2
+
+
+def test_cache_missing_file_returns_none(tmp_path, counted_resolve):
+    assert LnkTargetCache().resolve(str(tmp_path / "gone.lnk")) is None
+    assert counted_resolve == []